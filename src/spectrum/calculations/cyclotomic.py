@@ -0,0 +1,150 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import functools
+import threading
+from collections import Counter, OrderedDict
+
+from spectrum.calculations import factorization
+
+__author__ = 'Daniel Lytkin'
+
+# Module providing algebraic splitting of numbers b^k +- 1 into values of
+# cyclotomic polynomials and a shared cache of factorizations.
+
+
+def divisors(n):
+    """Returns sorted list of positive divisors of n.
+    """
+    ret = [1]
+    for p, k in sorted(factorization.factorize(n).items()):
+        ret = [d * p ** i for d in ret for i in range(k + 1)]
+    ret.sort()
+    return ret
+
+
+def mobius(n):
+    """Returns Mobius function of n.
+    """
+    factors = factorization.factorize(n)
+    if any(k > 1 for k in factors.values()):
+        return 0
+    return -1 if len(factors) % 2 else 1
+
+
+@functools.lru_cache(maxsize=4096)
+def cyclotomic_value(d, b):
+    """Returns value of d-th cyclotomic polynomial at b, using
+    Phi_d(b) = prod_{e | d} (b^e - 1)^mu(d/e).
+    """
+    numerator, denominator = 1, 1
+    for e in divisors(d):
+        mu = mobius(d // e)
+        if mu == 1:
+            numerator *= b ** e - 1
+        elif mu == -1:
+            denominator *= b ** e - 1
+    return numerator // denominator
+
+
+@functools.lru_cache(maxsize=1024)
+def _reduced_base(b):
+    """Returns pair (c, m) with minimal c such that b = c^m.
+    """
+    return factorization.Factorizer.perfect_power(b)
+
+
+def cyclotomic_parts(b, k, sign):
+    """Returns list of values Phi_d(c) whose product equals b^k + sign, where
+    sign is 1 or -1 and c is the smallest number such that b is a power of c.
+    Ones are omitted.
+    """
+    c, m = _reduced_base(b)
+    k *= m
+    if sign == -1:
+        indices = divisors(k)
+    else:
+        indices = [d for d in divisors(2 * k) if k % d != 0]
+    return [value for value in (cyclotomic_value(d, c) for d in indices)
+            if value != 1]
+
+
+class FactorCache:
+    """Bounded cache of prime factorizations with least recently used
+    eviction. Numbers which are not cached are factorized by the current
+    factorization engine. Cache may be shared by several threads.
+    """
+
+    def __init__(self, max_size=8192):
+        self._max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value):
+        with self._lock:
+            self._max_size = value
+            self._evict()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, number):
+        return number in self._cache
+
+    def _evict(self):
+        while len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
+
+    def factorize(self, number):
+        """Returns Counter of prime divisors of number and their exponents.
+        """
+        with self._lock:
+            factors = self._cache.get(number)
+            if factors is not None:
+                self.hits += 1
+                self._cache.move_to_end(number)
+                return Counter(dict(factors))
+            self.misses += 1
+        factors = tuple(factorization.factorize(number).items())
+        with self._lock:
+            self._cache[number] = factors
+            self._evict()
+        return Counter(dict(factors))
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+factor_cache = FactorCache()
+
+
+def factorize_power(b, k, sign):
+    """Returns Counter of prime divisors of b^k + sign (sign is 1 or -1),
+    factorizing each cyclotomic part separately through the shared cache.
+    """
+    factors = Counter()
+    for part in cyclotomic_parts(b, k, sign):
+        factors.update(factor_cache.factorize(part))
+    return factors
@@ -0,0 +1,503 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import functools
+import itertools
+import math
+import random
+from collections import Counter
+
+__author__ = 'Daniel Lytkin'
+
+# Module providing primality tests and integer factorization: trial division,
+# Pollard's rho (Brent's variant) and Lenstra's elliptic curve method.
+
+
+def _small_primes(bound):
+    """Returns list of primes less than bound (sieve of Eratosthenes).
+    """
+    sieve = bytearray([1]) * bound
+    sieve[0:2] = b'\x00\x00'
+    for i in range(2, math.isqrt(bound - 1) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, bound, i)))
+    return [i for i in range(bound) if sieve[i]]
+
+
+SMALL_PRIMES = _small_primes(1000)
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_primes(bound):
+    """Same as _small_primes(), but computed once for every bound, e.g. for
+    every B1 of ECM schedule. Returned list must not be changed.
+    """
+    return _small_primes(bound)
+
+
+def _sieve_segment(low, high, primes):
+    """Returns bytearray, whose i-th byte is 1 iff low + i is prime, for
+    2 <= low < high. `primes' must contain all primes up to sqrt(high).
+    """
+    segment = bytearray([1]) * (high - low)
+    for p in primes:
+        if p * p >= high:
+            break
+        start = max(p * p, (low + p - 1) // p * p)
+        segment[start - low::p] = bytes(len(range(start, high, p)))
+    return segment
+
+
+def iroot(n, k):
+    """Returns integer part of k-th root of n.
+    """
+    if n < 2 or k == 1:
+        return n
+    if k == 2:
+        return math.isqrt(n)
+    x = 1 << -(-n.bit_length() // k)  # initial guess is greater than root
+    while True:
+        y = ((k - 1) * x + n // x ** (k - 1)) // k
+        if y >= x:
+            return x
+        x = y
+
+
+def miller_rabin(n, bases):
+    """Strong probable prime test of odd n > 2 to each of given bases.
+    """
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for a in bases:
+        a %= n
+        if a == 0:
+            continue
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _jacobi(a, n):
+    """Jacobi symbol (a/n) for odd positive n.
+    """
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def strong_lucas(n):
+    """Strong Lucas probable prime test with Selfridge parameters for odd n
+    which is not a perfect square.
+    """
+    d = 5
+    while True:
+        j = _jacobi(d, n)
+        if j == -1:
+            break
+        if j == 0 and abs(d) != n:
+            return False
+        d = -d - 2 if d > 0 else -d + 2
+    p, q = 1, (1 - d) // 4
+
+    k = n + 1
+    s = (k & -k).bit_length() - 1
+    k >>= s
+
+    # compute U_k, V_k, Q^k by binary expansion of k
+    u, v, qk = 0, 2, 1
+    inverse_two = (n + 1) // 2
+    for bit in bin(k)[2:]:
+        u, v = u * v % n, (v * v - 2 * qk) % n
+        qk = qk * qk % n
+        if bit == '1':
+            u, v = ((p * u + v) * inverse_two % n,
+                    (d * u + p * v) * inverse_two % n)
+            qk = qk * q % n
+    if u == 0 or v == 0:
+        return True
+    for _ in range(s - 1):
+        v = (v * v - 2 * qk) % n
+        if v == 0:
+            return True
+        qk = qk * qk % n
+    return False
+
+
+def is_probable_prime(n):
+    """Baillie-PSW primality test. There are no known composites passing it,
+    and it is proven to be exact for n < 2^64.
+    """
+    if n < 2:
+        return False
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    if n < SMALL_PRIMES[-1] ** 2:
+        return True
+    if not miller_rabin(n, (2,)):
+        return False
+    if math.isqrt(n) ** 2 == n:
+        return False
+    return strong_lucas(n)
+
+
+def pollard_brent(n, max_iterations=None, seed=None):
+    """Pollard's rho method with Brent's cycle detection. Returns nontrivial
+    divisor of composite n or None if it was not found within
+    `max_iterations' steps.
+    """
+    if n % 2 == 0:
+        return 2
+    rand = random.Random(seed)
+    m = 128
+    while True:
+        y, c = rand.randrange(1, n), rand.randrange(1, n - 1)
+        g, r, q = 1, 1, 1
+        iterations = 0
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            r *= 2
+            iterations += r
+            if max_iterations is not None and iterations > max_iterations:
+                return None
+        if g == n:
+            # too many factors were collected at once; backtrack
+            while True:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+                if g > 1:
+                    break
+        if g != n:
+            return g
+
+
+class _FoundFactor(Exception):
+    def __init__(self, factor):
+        super(_FoundFactor, self).__init__(factor)
+        self.factor = factor
+
+
+def _inverse(a, n):
+    g = math.gcd(a, n)
+    if g != 1:
+        raise _FoundFactor(g)
+    return pow(a, -1, n)
+
+
+# length of segments of primality table sieved in stage 2 of ECM
+_ECM_SEGMENT = 1 << 16
+
+# stage 2 of ECM writes primes as m * _ECM_D +- j with 0 < j < _ECM_D / 2
+_ECM_D = 2310
+
+
+def _ecm_curve(n, b1, b2, primes, base, rand):
+    """Runs both stages of ECM on one random Montgomery curve (Suyama
+    parametrization). Returns gcd found, which may be 1 or n. `primes' are
+    primes up to b1 and `base' are primes up to sqrt(b2), so that primes of
+    stage 2 are found by segmented sieve.
+    """
+    sigma = rand.randrange(6, n - 1)
+    u = (sigma * sigma - 5) % n
+    v = 4 * sigma % n
+    x, z = pow(u, 3, n), pow(v, 3, n)
+    a24 = (pow(v - u, 3, n) * (3 * u + v) *
+           _inverse(16 * pow(u, 3, n) * v % n, n)) % n
+
+    def double(px, pz):
+        s, d = (px + pz) ** 2 % n, (px - pz) ** 2 % n
+        t = s - d
+        return s * d % n, t * (d + a24 * t) % n
+
+    def add(px, pz, qx, qz, dx, dz):
+        a = (px - pz) * (qx + qz) % n
+        b = (px + pz) * (qx - qz) % n
+        return dz * (a + b) ** 2 % n, dx * (a - b) ** 2 % n
+
+    def multiply(k, px, pz):
+        # Montgomery ladder with add and double inlined, since this loop
+        # takes almost all the time of stage 1
+        rx, rz = px, pz
+        sx, sz = double(px, pz)
+        for bit in bin(k)[3:]:
+            a = (sx - sz) * (rx + rz) % n
+            b = (sx + sz) * (rx - rz) % n
+            ax, az = pz * (a + b) ** 2 % n, px * (a - b) ** 2 % n
+            if bit == '1':
+                s, d = (sx + sz) ** 2 % n, (sx - sz) ** 2 % n
+                t = s - d
+                rx, rz = ax, az
+                sx, sz = s * d % n, t * (d + a24 * t) % n
+            else:
+                s, d = (rx + rz) ** 2 % n, (rx - rz) ** 2 % n
+                t = s - d
+                sx, sz = ax, az
+                rx, rz = s * d % n, t * (d + a24 * t) % n
+        return rx, rz
+
+    # stage 1
+    for p in primes:
+        if p > b1:
+            break
+        pk = p
+        while pk * p <= b1:
+            pk *= p
+        x, z = multiply(pk, x, z)
+    g = math.gcd(z, n)
+    if g != 1:
+        return g
+
+    # stage 2: each prime p = m*d +- j in (b1, b2] divides the order of Q iff
+    # x([m*d]Q) = x([j]Q), so the differences of x-coordinates normalized to
+    # z = 1 are accumulated, one multiplication per prime
+    d = _ECM_D
+    points = {1: (x, z)}
+    x2, z2 = double(x, z)
+    points[3] = add(x2, z2, x, z, x, z)
+    for j in range(5, d // 2, 2):
+        bx, bz = points[j - 2]
+        cx, cz = points[j - 4]
+        points[j] = add(bx, bz, x2, z2, cx, cz)
+    baby = {j: bx * _inverse(bz, n) % n for j, (bx, bz) in points.items()
+            if math.gcd(j, d) == 1}
+
+    m = (b1 + 1 + d // 2) // d
+    step = multiply(d, x, z)
+    giant = multiply(m * d, x, z) if m > 0 else (1, 0)
+    previous = multiply((m - 1) * d, x, z) if m > 1 else None
+    gx = giant[0] * _inverse(giant[1], n) % n if m > 0 else None
+    acc = 1
+    for low in range(b1 + 1, b2 + 1, _ECM_SEGMENT):
+        high = min(low + _ECM_SEGMENT, b2 + 1)
+        segment = _sieve_segment(low, high, base)
+        for p in itertools.compress(range(low, high), segment):
+            k = (p + d // 2) // d
+            if k != m:
+                while m < k:
+                    if previous is not None:
+                        giant, previous = add(giant[0], giant[1], step[0],
+                                              step[1], previous[0],
+                                              previous[1]), giant
+                    elif m == 0:
+                        giant, previous = step, None
+                    else:
+                        giant, previous = double(*giant), giant
+                    m += 1
+                gx = giant[0] * _inverse(giant[1], n) % n
+            acc = acc * (gx - baby[abs(p - k * d)]) % n
+    return math.gcd(acc, n)
+
+
+# (B1, number of curves) schedule for ECM: the tiers are the usual ones for
+# factors of 15, 20, 25, 30 and 35 digits (with B2 = 100 * B1)
+ECM_SCHEDULE = ((2000, 25), (11000, 90), (50000, 300), (250000, 700),
+                (1000000, 1800))
+
+
+def ecm(n, schedule=ECM_SCHEDULE, seed=None):
+    """Lenstra's elliptic curve method. Returns nontrivial divisor of
+    composite n which is not a prime power, or None if it was not found after
+    all the curves from schedule were tried.
+
+    Since arithmetic is done in pure Python, this is practical for factors of
+    up to about 20 digits, which are usually found within seconds (e.g. 40-digit
+    semiprimes). Factors of about 25 digits take from several seconds to a few
+    minutes, and the last tiers of the schedule, aimed at 30-35 digit factors,
+    may run for hours.
+    """
+    rand = random.Random(seed)
+    for b1, curves in schedule:
+        b2 = 100 * b1
+        primes = _cached_primes(b1 + 1)
+        base = _cached_primes(math.isqrt(b2) + 1)
+        for _ in range(curves):
+            try:
+                g = _ecm_curve(n, b1, b2, primes, base, rand)
+            except _FoundFactor as e:
+                g = e.factor
+            if 1 < g < n:
+                return g
+    return None
+
+
+class Factorizer:
+    """Factorization engine. Small factors are removed by trial division,
+    then composite cofactors are split by the sequence of `splitters', each
+    being a function which returns nontrivial divisor of its argument or None.
+    Default splitters are Pollard's rho (with bounded number of iterations)
+    followed by ECM.
+
+    Usage:
+        Factorizer().factorize(2 ** 128 + 1)
+        Factorizer(splitters=[pollard_brent])
+    """
+
+    def __init__(self, splitters=None, trial_bound=SMALL_PRIMES[-1],
+                 rho_iterations=200000):
+        if splitters is None:
+            splitters = [
+                lambda n: pollard_brent(n, max_iterations=rho_iterations),
+                ecm,
+                pollard_brent]
+        self._splitters = list(splitters)
+        self._trial_primes = [p for p in SMALL_PRIMES if p <= trial_bound]
+
+    @staticmethod
+    def is_prime(n):
+        """Checks whether n is prime.
+        """
+        return is_probable_prime(n)
+
+    @staticmethod
+    def perfect_power(n):
+        """Returns pair (b, k) with maximal k such that n = b^k.
+        """
+        for k in SMALL_PRIMES:
+            if 2 ** k > n:
+                break
+            root = iroot(n, k)
+            if root ** k == n:
+                base, power = Factorizer.perfect_power(root)
+                return base, power * k
+        return n, 1
+
+    def prime_power_base(self, n):
+        """Returns prime p such that n is a power of p or None if there is no
+        such prime.
+        """
+        base, _ = self.perfect_power(n)
+        return base if self.is_prime(base) else None
+
+    def _trial_division(self, n, factors):
+        for p in self._trial_primes:
+            if p * p > n:
+                break
+            if n % p == 0:
+                n //= p
+                factors[p] += 1
+                while n % p == 0:
+                    n //= p
+                    factors[p] += 1
+        return n
+
+    def _split(self, n):
+        for splitter in self._splitters:
+            d = splitter(n)
+            if d is not None and 1 < d < n:
+                return d
+        raise ArithmeticError("Could not split {}".format(n))
+
+    def factorize(self, n):
+        """Returns Counter of prime divisors of n and their exponents.
+        """
+        if n < 1:
+            raise ValueError("Can only factorize positive integers")
+        factors = Counter()
+        n = self._trial_division(n, factors)
+        if n == 1:
+            return factors
+        if self._trial_primes and n < (self._trial_primes[-1] + 2) ** 2:
+            factors[n] += 1
+            return factors
+
+        stack = [(n, 1)]
+        while stack:
+            m, power = stack.pop()
+            if self.is_prime(m):
+                factors[m] += power
+                continue
+            base, k = self.perfect_power(m)
+            if k > 1:
+                stack.append((base, power * k))
+                continue
+            d = self._split(m)
+            g = math.gcd(d, m // d)
+            if g == 1:
+                stack.append((d, power))
+                stack.append((m // d, power))
+            else:
+                # split into coprime parts so that exponents stay correct
+                stack.append((g, power))
+                stack.append((m // g, power))
+        return factors
+
+    def smallest_factor(self, n):
+        """Returns smallest divisor of n greater than 1 (n itself if n < 2).
+        """
+        if n < 2:
+            return n
+        for p in self._trial_primes:
+            if n % p == 0:
+                return p
+            if p * p > n:
+                return n
+        if self.is_prime(n):
+            return n
+        return min(self.factorize(n))
+
+
+_engine = Factorizer()
+
+
+def get_engine():
+    """Returns current factorization engine.
+    """
+    return _engine
+
+
+def set_engine(engine):
+    """Replaces factorization engine used by the whole library. Engine must
+    provide is_prime(n), prime_power_base(n), smallest_factor(n) and
+    factorize(n) methods, e.g. be an instance of Factorizer.
+    Returns previous engine.
+    """
+    global _engine
+    previous, _engine = _engine, engine
+    return previous
+
+
+def factorize(n):
+    """Returns Counter of prime divisors of n and their exponents using
+    current engine.
+    """
+    return _engine.factorize(n)
@@ -16,13 +16,27 @@ Copyright 2012 Daniel Lytkin.
 """
 import itertools
 
-from spectrum.calculations import numeric
+from spectrum.calculations import cyclotomic, numeric
 from spectrum.calculations.numeric import Integer
+from spectrum.calculations.semisimple import SpectraElement
 from spectrum.graph.graph import Graph
 
 __author__ = 'Daniel Lytkin'
 
 
+def _prime_divisors(element):
+    """Returns sorted list of prime divisors of apex element. For
+    SpectraElement's, numbers q^k +- 1 it was calculated from are factorized
+    instead of the element itself, using the shared cyclotomic factor cache.
+    """
+    if isinstance(element, SpectraElement):
+        primes = set(element.quotient.copy().factorize())
+        for ni, ei in zip(element.partition, element.signs):
+            primes.update(cyclotomic.factorize_power(element.q, ni, ei))
+        return sorted(primes)
+    return sorted(Integer(element).factorize())
+
+
 class PrimeGraphMeta(type):
     """Provide a metaclass in order to override class-level str method"""
     def __str__(self):
@@ -34,7 +48,7 @@ class PrimeGraph(Graph, metaclass=PrimeGraphMeta):
         Graph.__init__(self)
         apex = group.apex()
         for elem in apex:
-            factors = Integer(elem).factorize().keys()
+            factors = _prime_divisors(elem)
             self.add_vertices(factors)
             self.add_edges(itertools.combinations(factors, 2))
 
@@ -61,8 +75,8 @@ class FastGraph(Graph, metaclass=FastGraphMeta):
     def _add_element(self, a):
         """Add new spectrum element
         """
-        # these are the indices of future neighbors of a
-        neighbors = []
+        # bitmask of the future neighbors of a
+        neighbors = 0
         # memorize initial length so that we don't have to process newly added
         # vertices
         l = len(self._vertices)
@@ -73,21 +87,18 @@ class FastGraph(Graph, metaclass=FastGraphMeta):
                 continue
             bd = numeric.prime_part(b, d)
             if bd == 1:
-                self._vertices[i] = d
-                for neighbor in neighbors:
-                    self._set_adjacency(i, neighbor, True)
-                neighbors.append(i)
+                self._set_vertex(i, d)
+                self._connect(i, neighbors)
+                neighbors |= 1 << i
             else:
-                self._vertices[i] = bd
+                self._set_vertex(i, bd)
                 dIndex = self.clone_vertex(i, d)
-                for neighbor in neighbors:
-                    self._adjacency[dIndex][neighbor] = True
-                neighbors.append(dIndex)
+                self._connect(dIndex, neighbors)
+                neighbors |= 1 << dIndex
 
             a = numeric.prime_part(a, d)
             if a == 1:
                 break
         if a > 1:
             index = self._add_vertex(a)
-            for neighbor in neighbors:
-                self._set_adjacency(index, neighbor, True)
\ No newline at end of file
+            self._connect(index, neighbors)
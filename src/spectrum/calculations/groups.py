@@ -14,21 +14,55 @@ Copyright 2012 Daniel Lytkin.
    limitations under the License.
 
 """
-from functools import reduce
 
 from spectrum.calculations import orders, spectra, numeric
 from spectrum.calculations.numeric import Constraints, Integer
+from spectrum.tools import tasks
 from spectrum.tools.tools import doc_inherit, ObjectCache
-from .partition import Partitions
 
 __author__ = 'Daniel Lytkin'
 
 _CACHE = True  # whether group caching is enabled
 
+# persistent storage for apexes and orders, see set_persistent_cache()
+_persistent_cache = None
+
+# executor evaluating components of classical spectra and number of parts
+# for large components, see set_executor()
+_executor = None
+_pieces = None
+
 # whether to surround group name with \operatorname{} in str_latex()
 #LATEX_OPERATORNAME = True
 
 
+def set_persistent_cache(cache):
+    """Sets persistent cache (e.g. persistent.PersistentCache instance) used
+    to load and store apexes and orders of groups. Pass None to disable it.
+    Returns previous cache.
+    """
+    global _persistent_cache
+    previous, _persistent_cache = _persistent_cache, cache
+    return previous
+
+
+def get_persistent_cache():
+    """Returns persistent cache used by groups or None.
+    """
+    return _persistent_cache
+
+
+def set_executor(executor, pieces=None):
+    """Sets executor (e.g. concurrent.futures.ProcessPoolExecutor instance)
+    used to evaluate independent components of spectra of classical groups in
+    parallel, with large components split into `pieces' parts. Pass None to
+    calculate them in current process. Returns previous executor.
+    """
+    global _executor, _pieces
+    previous, _executor, _pieces = _executor, executor, pieces
+    return previous
+
+
 class Field:
     """Finite field.
     Can be created as Field(order) or Field(base, pow) where base**pow is the
@@ -71,6 +105,17 @@ class Field:
         return "F({}^{})".format(self._base, self._pow)
 
 
+def _field_key(*field):
+    """Returns order of the field specified by the same arguments as
+    accepted by group constructors: Field instance, order or (base, pow).
+    """
+    if isinstance(field[0], Field):
+        return field[0].order
+    if len(field) == 2:
+        return field[0] ** field[1]
+    return field[0]
+
+
 class Group:
     """Abstract class for finite groups.
     """
@@ -86,11 +131,44 @@ class Group:
         """Returns group order."""
         raise NotImplementedError()
 
+    def apex_steps(self):
+        """Generator calculating apex in steps, which yields None after each
+        step, so that calculation may be interrupted between them (e.g. by
+        tasks.BackgroundTask). Returns the apex.
+        """
+        yield
+        return self.apex()
+
     def _hs_str(self):
         """Returns haskell representation
         """
         raise NotImplementedError()
 
+    def _persistent_apex(self, calculate):
+        """Generator returning apex from persistent cache if it is set,
+        otherwise calculating it in steps with generator function `calculate'
+        (see apex_steps()) and storing the result.
+        """
+        cache = _persistent_cache
+        apex = None if cache is None else cache.get_apex(self)
+        if apex is None:
+            apex = yield from calculate()
+            if cache is not None:
+                cache.put_apex(self, apex)
+        return apex
+
+    def _persistent_order(self, calculate):
+        """Same as _persistent_apex, but for group order.
+        """
+        cache = _persistent_cache
+        if cache is None:
+            return calculate()
+        order = cache.get_order(self)
+        if order is None:
+            order = calculate()
+            cache.put_order(self, order)
+        return order
+
 
 class SporadicGroup(Group):
     _groups = ('M11', 'M12', 'J1', 'M22', 'J2', 'M23', "2F4(2)'", 'HS', 'J3',
@@ -132,11 +210,13 @@ class SporadicGroup(Group):
         return SporadicGroup._groups
 
 
-class AlternatingGroup(Group):
+class AlternatingGroup(Group, metaclass=ObjectCache if _CACHE else type):
     """AlternatingGroup(n) represents alternating group of degree n
     """
-    if _CACHE:
-        __metaclass__ = ObjectCache
+
+    @classmethod
+    def _cache_key(cls, degree):
+        return degree
 
     def __init__(self, degree):
         super(AlternatingGroup, self).__init__()
@@ -150,13 +230,18 @@ class AlternatingGroup(Group):
 
     @doc_inherit
     def apex(self):
+        return tasks.complete(self.apex_steps())
+
+    @doc_inherit
+    def apex_steps(self):
         if self._apex is None:
-            n = self._degree
-            partitions = [x for x in Partitions(n) if (len(x) + n) % 2 == 0]
-            self._apex = numeric.sort_and_filter(
-                [reduce(numeric.lcm, partition) for partition in partitions])
+            self._apex = yield from self._persistent_apex(self._calculate_apex)
         return self._apex
 
+    def _calculate_apex(self):
+        yield
+        return spectra.alternating_spectra(self._degree)
+
     @doc_inherit
     def order(self):
         if self._order is None:
@@ -174,14 +259,12 @@ class AlternatingGroup(Group):
         return "Alternating {{degree={}}}".format(self._degree)
 
 
-class ClassicalGroup(Group):
+class ClassicalGroup(Group, metaclass=ObjectCache if _CACHE else type):
     """Usage:
     ClassicalGroup("PSp", 14, Field(2, 5))
     ClassicalGroup("PSp", 14, 32)
     ClassicalGroup("PSp", 14, 2, 5)
     """
-    if _CACHE:
-        __metaclass__ = ObjectCache
 
     _groups = (
         'PGL', 'PGU', 'Omega', 'Omega+', 'POmega+', 'Omega-', 'POmega-', 'SL',
@@ -209,6 +292,10 @@ class ClassicalGroup(Group):
     _field_constraints = {'SO': Constraints(min=3,
                                             primality=numeric.PRIME_POWER, parity=-1)}
 
+    @classmethod
+    def _cache_key(cls, name, dimension, *field):
+        return name, dimension, _field_key(*field)
+
     def __init__(self, name, dimension, *field):
         super(ClassicalGroup, self).__init__()
         self._name = name
@@ -242,18 +329,31 @@ class ClassicalGroup(Group):
         return self._field
 
     def apex(self):
+        return tasks.complete(self.apex_steps())
+
+    def apex_steps(self):
         if self._apex is None:
-            func = spectra.classical_spectra.get(self._name, lambda *arg: [])
-            self._apex = numeric.sort_and_filter(func(self._dim, self._field))
+            self._apex = yield from self._persistent_apex(self._calculate_apex)
         return self._apex
 
+    def _calculate_apex(self):
+        if _executor is not None and self._name in spectra.classical_spectra:
+            return (yield from spectra.parallel_classical_spectra_steps(
+                self._name, self._dim, self._field, _executor, _pieces))
+        func = spectra.classical_spectra.get(self._name, lambda *arg: [])
+        return (yield from numeric.maximal_elements_steps(
+            func(self._dim, self._field)))
+
     def order(self):
         if self._order is None:
-            func = orders.classical_orders.get(self._name,
-                                               lambda *arg: Integer())
-            self._order = func(self._dim, self._field)
+            self._order = self._persistent_order(self._calculate_order)
         return self._order
 
+    def _calculate_order(self):
+        func = orders.classical_orders.get(self._name,
+                                           lambda *arg: Integer())
+        return func(self._dim, self._field)
+
     @staticmethod
     def field_constraints(name):
         """Returns constraints on field for specified kind of groups
@@ -268,9 +368,7 @@ class ClassicalGroup(Group):
         return ClassicalGroup._dim_constraints.get(name, Constraints(min=2))
 
 
-class ExceptionalGroup(Group):
-    if _CACHE:
-        __metaclass__ = ObjectCache
+class ExceptionalGroup(Group, metaclass=ObjectCache if _CACHE else type):
 
     _groups = (
         "E6", "2E6", "E7", "E8", "F4", "2F4", "G2", "2G2", "2B2", "3D4",)
@@ -286,6 +384,10 @@ class ExceptionalGroup(Group):
         '2G2': Constraints(min=2, primality=numeric.ODD_POWER_OF_3),
     }
 
+    @classmethod
+    def _cache_key(cls, name, *field):
+        return name, _field_key(*field)
+
     def __init__(self, name, *field):
         super(ExceptionalGroup, self).__init__()
         self._name = name
@@ -313,18 +415,27 @@ class ExceptionalGroup(Group):
         return self._field
 
     def apex(self):
+        return tasks.complete(self.apex_steps())
+
+    def apex_steps(self):
         if self._apex is None:
-            func = spectra.exceptional_spectra.get(self._name, lambda *arg: [])
-            self._apex = numeric.sort_and_filter(func(self._field))
+            self._apex = yield from self._persistent_apex(self._calculate_apex)
         return self._apex
 
+    def _calculate_apex(self):
+        func = spectra.exceptional_spectra.get(self._name, lambda *arg: [])
+        return (yield from numeric.maximal_elements_steps(func(self._field)))
+
     def order(self):
         if self._order is None:
-            func = orders.exceptional_orders.get(self._name,
-                                                 lambda *arg: Integer())
-            self._order = func(self._field)
+            self._order = self._persistent_order(self._calculate_order)
         return self._order
 
+    def _calculate_order(self):
+        func = orders.exceptional_orders.get(self._name,
+                                             lambda *arg: Integer())
+        return func(self._field)
+
     @classmethod
     def field_constraints(cls, name):
         return cls._field_constraints.get(name, Constraints(min=2, primality=numeric.PRIME_POWER))
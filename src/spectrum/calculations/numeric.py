@@ -15,10 +15,14 @@ Copyright 2012 Daniel Lytkin.
 
 """
 import functools
+import itertools
 import math
 import operator
 from collections import Counter
 
+from spectrum.calculations import cyclotomic, factorization, primes
+from spectrum.tools import tasks
+
 __author__ = 'Daniel Lytkin'
 
 # Module providing methods to calculate GCD and LCM etc.
@@ -69,6 +73,120 @@ def prime_part(n, b):
     return n
 
 
+class DivisibilityAntichain:
+    """Set of numbers none of which divides another. Adding a number which
+    divides some element does nothing, otherwise elements dividing the new
+    number are removed. Numbers may be added in any order, though adding
+    them in decreasing order is fastest.
+
+    Elements are indexed by their prime divisors less than 1000, so that a
+    new number is only compared with elements divisible by its rarest small
+    prime. Elements are also grouped by the product of their small prime
+    divisors, and only groups with product dividing the one of a new number
+    may contain its divisors. Up to `max_seen' last added numbers are
+    remembered, so repeated numbers are rejected in constant time.
+    """
+
+    _INDEX_PRIMES = primes.primes_less_than(1000)
+    _PRIMORIAL = reduce(operator.mul, _INDEX_PRIMES)
+
+    def __init__(self, iterable=(), max_seen=1 << 16):
+        # element -> product of its small prime divisors
+        self._elements = {}
+        # prime -> set of elements divisible by it
+        self._index = {}
+        # product of small prime divisors -> set of elements
+        self._groups = {}
+        self._seen = set()
+        self._max_seen = max_seen
+        self._smallest = None
+        # product of small primes -> list of them, bounded by max_seen
+        self._divisors_cache = {}
+        self.update(iterable)
+
+    def _small_primes(self, d):
+        ret = self._divisors_cache.get(d)
+        if ret is None:
+            if len(self._divisors_cache) >= self._max_seen:
+                self._divisors_cache.clear()
+            ret = [p for p in self._INDEX_PRIMES if d % p == 0]
+            self._divisors_cache[d] = ret
+        return ret
+
+    def _candidates(self, small_primes):
+        if not small_primes:
+            return self._elements
+        return min((self._index.get(p, ()) for p in small_primes), key=len)
+
+    def _remove(self, element):
+        d = self._elements.pop(element)
+        for p in self._small_primes(d):
+            self._index[p].discard(element)
+        group = self._groups[d]
+        group.discard(element)
+        if not group:
+            del self._groups[d]
+
+    def _divisor_groups(self, d, small_primes):
+        """Returns groups of elements whose small prime divisors divide d.
+        """
+        if 1 << len(small_primes) < len(self._groups):
+            products = [1]
+            for p in small_primes:
+                products += [x * p for x in products]
+            return [self._groups[x] for x in products if x in self._groups]
+        return [group for group_d, group in self._groups.items()
+                if d % group_d == 0]
+
+    def add(self, number):
+        """Adds number unless it divides some element. Returns whether the
+        number was added.
+        """
+        if number in self._seen:
+            return False
+        if len(self._seen) >= self._max_seen:
+            # remembered numbers only speed up rejection of repeated ones
+            self._seen.clear()
+        self._seen.add(number)
+        d = math.gcd(number, self._PRIMORIAL)
+        small_primes = self._small_primes(d)
+        if any(x % number == 0 for x in self._candidates(small_primes)):
+            return False
+        if self._smallest is not None and number > self._smallest:
+            # elements dividing the number are less than it and their small
+            # prime divisors divide the number
+            divisors = [x for group in self._divisor_groups(d, small_primes)
+                        for x in group if x < number and number % x == 0]
+            for x in divisors:
+                self._remove(x)
+        if self._smallest is None or number < self._smallest:
+            self._smallest = number
+        self._elements[number] = d
+        for p in small_primes:
+            self._index.setdefault(p, set()).add(number)
+        self._groups.setdefault(d, set()).add(number)
+        return True
+
+    def update(self, iterable):
+        for number in iterable:
+            self.add(number)
+
+    def __contains__(self, number):
+        return number in self._elements
+
+    def __iter__(self):
+        return iter(self._elements)
+
+    def __len__(self):
+        return len(self._elements)
+
+    def sorted(self, reverse=False):
+        """Returns list of elements in increasing order, or in decreasing if
+        reverse is true.
+        """
+        return sorted(self._elements, reverse=reverse)
+
+
 def filter_divisors(iterable, reverse=False):
     """Removes all elements that divide any other.
 
@@ -78,24 +196,69 @@ def filter_divisors(iterable, reverse=False):
 
     Args:
         iterable: Input iterable of integers in decreasing order.
-        reverse: If true, returns list in increasing order. Default is false.
+        reverse: If true, returns list in decreasing order. Default is false.
 
     Returns:
         List without divisors.
 
     """
-    ret = []
-    if not reverse:
-        def append_left(element): ret.insert(0, element)
+    return DivisibilityAntichain(iterable).sorted(reverse=reverse)
 
-        add_element = append_left
-    else:
-        add_element = ret.append
-    for element in iterable:
-        if not any(x % element == 0 for x in ret):
-            add_element(element)
 
-    return ret
+def maximal_elements(iterable, reverse=False, chunk_size=4096):
+    """Returns sorted list of elements of iterable which are maximal by
+    divisibility. Unlike sort_and_filter, iterable is consumed lazily and
+    only current maximal elements and a chunk of at most `chunk_size'
+    elements are stored.
+
+    Args:
+        iterable: Input iterable of integers in any order.
+        reverse: If true, returns list in decreasing order. Default is false.
+        chunk_size: Number of elements sorted at once.
+
+    Returns:
+        List without divisors.
+
+    """
+    return tasks.complete(
+        maximal_elements_steps(iterable, reverse, chunk_size))
+
+
+def maximal_elements_steps(iterable, reverse=False, chunk_size=4096):
+    """Generator version of maximal_elements, which yields None after each
+    chunk, so that calculation may be interrupted (see tasks.BackgroundTask).
+    Returns the list.
+    """
+    antichain = DivisibilityAntichain()
+    iterator = iter(iterable)
+    while True:
+        # numbers are added in decreasing order in chunks of bounded size,
+        # which makes removals of divisors rare
+        chunk = dict.fromkeys(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            break
+        antichain.update(sorted(chunk, reverse=True))
+        yield
+    return antichain.sorted(reverse=reverse)
+
+
+def iter_maximal(iterable, bound=None):
+    """Yields elements of iterable which are maximal by divisibility, each of
+    them as soon as it is confirmed. If `bound' is given, no element of
+    iterable may exceed it, so elements greater than bound/2 can not divide
+    any other and are yielded immediately. Other elements are yielded in
+    decreasing order when iterable is exhausted.
+    """
+    antichain = DivisibilityAntichain()
+    confirmed = set()
+    for number in iterable:
+        if (antichain.add(number) and bound is not None and
+                2 * number > bound):
+            confirmed.add(number)
+            yield number
+    for number in antichain.sorted(reverse=True):
+        if number not in confirmed:
+            yield number
 
 
 def sort_and_filter(sequence, reverse=False):
@@ -103,13 +266,14 @@ def sort_and_filter(sequence, reverse=False):
 
     Args:
         sequence: Input iterable of sequence.
-        reverse: If true, returns list in increasing order. Default is false.
+        reverse: If true, returns list in decreasing order. Default is false.
 
     Returns:
         List without divisors.
 
     """
-    ret = list(sequence)
+    # first occurrences of repeated numbers are kept
+    ret = list(dict.fromkeys(sequence))
     ret.sort(reverse=True)
     return filter_divisors(ret, reverse=reverse)
 
@@ -124,16 +288,7 @@ def first_divisor(number):
         Smallest (prime) divisor of given number greater than 1.
 
     """
-    if number % 2 == 0: return 2
-    #primes = []
-    for j in range(1, int(math.sqrt(number)) // 2 + 1):
-        i = 2 * j + 1
-        if number % i == 0:
-            return i
-            #if any(i % p == 0 for p in primes):
-            #    continue
-            #primes.append(i)
-    return number
+    return factorization.get_engine().smallest_factor(number)
 
 
 def is_prime(n):
@@ -146,7 +301,7 @@ def is_prime(n):
         Whether n is a prime number.
 
     """
-    return n == first_divisor(n)
+    return primes.is_prime(n)
 
 
 def is_prime_power(n):
@@ -159,10 +314,9 @@ def is_prime_power(n):
         Whether n is a power of a prime number.
 
     """
-    if n % 2 == 0:
-        return n & (n - 1) == 0
-    base = first_divisor(n)
-    return get_exponent(n, base) is not None
+    if n <= 1:
+        return n == 1
+    return primes.is_prime_power(n)
 
 
 def closest_prime(n):
@@ -181,13 +335,8 @@ def closest_prime(n):
         return 2
     if is_prime(n):
         return n
-    offset = 1 if n % 2 == 0 else 2
-    while True:
-        if is_prime(n - offset):
-            return n - offset
-        if is_prime(n + offset):
-            return n + offset
-        offset += 2
+    lower, upper = primes.prev_prime(n), primes.next_prime(n)
+    return lower if n - lower <= upper - n else upper
 
 
 def closest_prime_power(n):
@@ -206,13 +355,8 @@ def closest_prime_power(n):
         return 2
     if is_prime_power(n):
         return n
-    offset = 1
-    while True:
-        if is_prime_power(n - offset):
-            return n - offset
-        if is_prime_power(n + offset):
-            return n + offset
-        offset += 1
+    lower, upper = primes.prev_prime_power(n), primes.next_prime_power(n)
+    return lower if n - lower <= upper - n else upper
 
 
 def closest_power_of_two(n):
@@ -298,13 +442,14 @@ def closest_odd_prime_power(n):
         return 3
     if n % 2 == 1 and is_prime_power(n):
         return n
-    offset = 1 if n % 2 == 0 else 2
-    while True:
-        if is_prime_power(n - offset):
-            return n - offset
-        if is_prime_power(n + offset):
-            return n + offset
-        offset += 2
+    # powers of two are skipped
+    lower = primes.prev_prime_power(n)
+    while lower % 2 == 0:
+        lower = primes.prev_prime_power(lower)
+    upper = primes.next_prime_power(n)
+    while upper % 2 == 0:
+        upper = primes.next_prime_power(upper)
+    return lower if n - lower <= upper - n else upper
 
 
 def next_odd_divisor(number, previous):
@@ -325,7 +470,7 @@ def get_exponent(number, base):
     k = 0
     if base > 1:
         while number % base == 0:
-            number /= base
+            number //= base
             k += 1
     return k if number == 1 else None
 
@@ -339,34 +484,73 @@ def _removeFactor(number, factor):
     """
     power = 0
     while number % factor == 0:
-        number /= factor
+        number //= factor
         power += 1
     return power, number
 
 
 def _factorize_number(number):
-    factors = Counter()
-    # first handle the 2 for other primes are odd, so that we can then
-    # increment divisor by two
-    power, remainder = _removeFactor(number, 2)
-    if power:
-        factors[2] += power
-
-    currentDivisor = 1
-    while remainder > 1:
-        # search for the next divisor
-        currentDivisor = next_odd_divisor(remainder, currentDivisor)
-        # and remove it
-        power, remainder = _removeFactor(remainder,
-            currentDivisor)
-        if power:
-            factors[currentDivisor] += power
-    return factors
+    return cyclotomic.factor_cache.factorize(number)
+
+
+def _refine(factors):
+    """Factor refinement: returns Counter of pairwise coprime numbers with
+    exponents, whose product is the same as of given Counter of factors.
+    No factorization is performed, only gcd's are computed.
+    """
+    if 0 in factors:
+        return Counter({0: 1})
+    base = Counter()
+    stack = [(factor, power) for factor, power in factors.items() if power]
+    while stack:
+        x, k = stack.pop()
+        if x == 1:
+            continue
+        for b in base:
+            d = gcd(x, b)
+            if d > 1:
+                m = base.pop(b)
+                stack.extend(((b // d, m), (d, m + k), (x // d, k)))
+                break
+        else:
+            base[x] += k
+    return base
 
 
+def coprime_base(numbers):
+    """Returns sorted list of pairwise coprime numbers greater than 1, such
+    that each of given numbers is a product of their powers. Zero is not
+    such a product, so ValueError is raised for it.
+    """
+    numbers = Counter(numbers)
+    if 0 in numbers:
+        raise ValueError("zero has no coprime base")
+    return sorted(_refine(numbers))
+
+
+def _exponents(factors, base):
+    """Returns exponents of elements of coprime base in the product of
+    factors. Each factor must be a product of powers of base elements.
+    """
+    exponents = Counter()
+    for factor, power in factors.items():
+        for b in base:
+            while factor % b == 0:
+                factor //= b
+                exponents[b] += power
+            if factor == 1:
+                break
+    return exponents
+
+
+@functools.total_ordering
 class Integer:
     """Represents integer with methods to factorize.
     Usage: Integer(12345) for number 12345 or Integer((2,5), (3,2), 5, 7) for number 2^5 * 3^3 * 5 * 7
+
+    Stored factors need not be prime. Methods gcd, lcm, divides and floor
+    division refine factors into pairwise coprime ones instead of factorizing
+    them, so that full factorization is only done for display.
     """
 
     def __init__(self, *args):
@@ -392,6 +576,17 @@ class Integer:
                     if arg[1]: self._factors[arg[0]] += arg[1]
             self._multiply()
 
+    @classmethod
+    def from_power(cls, base, power, sign):
+        """Returns Integer equal to base^power + sign, where sign is 1 or -1.
+        The number is split into values of cyclotomic polynomials, so that
+        factorizations of these values are shared between different powers.
+        """
+        ret = cls()
+        ret._factors = Counter(cyclotomic.cyclotomic_parts(base, power, sign))
+        ret._int = base ** power + sign
+        return ret
+
     def _multiply(self):
         self._int = reduce(operator.mul, self._factors.elements(), 1)
 
@@ -414,6 +609,9 @@ class Integer:
             return self._cmp(self._int, other._int)
         return self._cmp(self._int, other)
 
+    def __lt__(self, other):
+        return self._int < int(other)
+
     def copy(self):
         copy = Integer()
         copy._factors = self._factors.copy()
@@ -471,6 +669,66 @@ class Integer:
     def __mod__(self, other):
         return self._int % int(other)
 
+    def refine(self):
+        """Replaces factors of this number by pairwise coprime ones without
+        factorizing them. Returns the new factors.
+        """
+        self._factors = _refine(self._factors)
+        return self._factors
+
+    def _common_exponents(self, other):
+        """Returns exponents of this and other number over their common
+        coprime base.
+        """
+        if not isinstance(other, Integer):
+            other = Integer(other)
+        base = sorted(_refine(self._factors + other._factors))
+        return (_exponents(self._factors, base),
+                _exponents(other._factors, base))
+
+    @staticmethod
+    def _from_exponents(exponents):
+        ret = Integer()
+        ret._factors = +exponents
+        ret._multiply()
+        return ret
+
+    def gcd(self, other):
+        """Returns greatest common divisor as Integer. GCD of zero and x is
+        x.
+        """
+        if not self._int:
+            return Integer(other)
+        if not int(other):
+            return self.copy()
+        a, b = self._common_exponents(other)
+        return self._from_exponents(a & b)
+
+    def lcm(self, other):
+        """Returns least common multiple as Integer, which is zero if either
+        number is zero.
+        """
+        if not self._int or not int(other):
+            return Integer(0)
+        a, b = self._common_exponents(other)
+        return self._from_exponents(a | b)
+
+    def divides(self, other):
+        """Returns whether this number divides other.
+        """
+        if not int(other):
+            return True
+        if not self._int:
+            return False
+        a, b = self._common_exponents(other)
+        return not a - b
+
+    def __floordiv__(self, other):
+        if self._int and int(other) != 0 and self._int % int(other) == 0:
+            a, b = self._common_exponents(other)
+            return self._from_exponents(a - b)
+        return Integer(self._int // int(other))
+
     def __str__(self):
         return str(self._int)
 
@@ -57,8 +57,8 @@ def _symplectic_order(n, field):
     n //= 2
     q = field.order
     return (Integer({field.char: field.pow * n * n}) *
-            prod((Integer(q ** i - 1) *
-                  Integer(q ** i + 1) for i in range(1, n + 1))))
+            prod((Integer.from_power(q, i, -1) *
+                  Integer.from_power(q, i, 1) for i in range(1, n + 1))))
 
 
 def _projective_symplectic_order(n, field):
@@ -77,9 +77,9 @@ def _omega_pm_order(sign):
         q = field.order
         n //= 2
         o = (Integer({field.char: field.pow * n * (n - 1)}) *
-             Integer(q ** n - e) *
-             prod((Integer(q ** i - 1) *
-                   Integer(q ** i + 1) for i in range(1, n))))
+             Integer.from_power(q, n, -e) *
+             prod((Integer.from_power(q, i, -1) *
+                   Integer.from_power(q, i, 1) for i in range(1, n))))
         if field.char != 2:
             o.div_by_prime(2)
         return o
@@ -113,15 +113,16 @@ def _special_orthogonal_order(sign):
     def order(n, field):
         q = field.order
         n //= 2
-        part = prod((Integer(q ** k - 1) *
-                     Integer(q ** k + 1) for k in range(1, n)))
+        part = prod((Integer.from_power(q, k, -1) *
+                     Integer.from_power(q, k, 1) for k in range(1, n)))
         if not e:
             return (part * Integer({field.char: field.pow * n * n}) *
-                    Integer(q ** n - 1) * Integer(q ** n + 1))
+                    Integer.from_power(q, n, -1) *
+                    Integer.from_power(q, n, 1))
         if field.char == 2:
             part *= 2
         return (part * Integer({field.char: field.pow * n * (n - 1)}) *
-                Integer(q ** n - e))
+                Integer.from_power(q, n, -e))
 
     return order
 
@@ -129,33 +130,33 @@ def _special_orthogonal_order(sign):
 def _projective_general_linear_order(n, field):
     q = field.order
     return (Integer({field.char: field.pow * (n * (n - 1) // 2)}) *
-            prod((Integer(q ** i - 1) for i in range(2, n + 1))))
+            prod((Integer.from_power(q, i, -1) for i in range(2, n + 1))))
 
 
 def _projective_general_unitary_order(n, field):
     q = field.order
     return (Integer({field.char: field.pow * (n * (n - 1) // 2)}) *
-            prod((Integer(q ** i - 1) *
-                  Integer(q ** i + 1) for i in range(1, n // 2 + 1))) *
-            prod((Integer(q ** (2 * i + 1) + 1)) for i in range(1,
+            prod((Integer.from_power(q, i, -1) *
+                  Integer.from_power(q, i, 1) for i in range(1, n // 2 + 1))) *
+            prod((Integer.from_power(q, 2 * i + 1, 1)) for i in range(1,
                 (n + 1) // 2)))
 
 
 def _projective_special_linear_order(n, field):
     q = field.order
     return (Integer({field.char: field.pow * (n * (n - 1) // 2)}) *
-            prod((Integer(q ** i - 1) for i in range(3, n + 1))) *
-            Integer(q + 1) * Integer((q - 1) // gcd(n, q - 1)))
+            prod((Integer.from_power(q, i, -1) for i in range(3, n + 1))) *
+            Integer.from_power(q, 1, 1) * Integer((q - 1) // gcd(n, q - 1)))
 
 
 def _projective_special_unitary_order(n, field):
     q = field.order
     return (Integer({field.char: field.pow * (n * (n - 1) // 2)}) *
-            prod((Integer(q ** i - 1) *
-                  Integer(q ** i + 1) for i in range(2, n // 2 + 1))) *
-            prod((Integer(q ** (2 * i + 1) + 1)) for i in range(1,
+            prod((Integer.from_power(q, i, -1) *
+                  Integer.from_power(q, i, 1) for i in range(2, n // 2 + 1))) *
+            prod((Integer.from_power(q, 2 * i + 1, 1)) for i in range(1,
                 (n + 1) // 2)) *
-            Integer(q - 1) * Integer((q + 1) // gcd(n, q + 1)))
+            Integer.from_power(q, 1, -1) * Integer((q + 1) // gcd(n, q + 1)))
 
 
 classical_orders = {
@@ -181,8 +182,8 @@ classical_orders = {
 def _order_product(field, pow, pluses, minuses):
     q = field.order
     return (Integer({field.char: field.pow * pow}) *
-            prod((Integer(q ** i + 1) for i in pluses)) *
-            prod((Integer(q ** i - 1) for i in minuses)))
+            prod((Integer.from_power(q, i, 1) for i in pluses)) *
+            prod((Integer.from_power(q, i, -1) for i in minuses)))
 
 
 def _e6_order(field):
@@ -26,8 +26,23 @@ class Partitions:
         min_part, max_part - minimum and maximum for partition elements
         min_slope, max_slope - minimum and maximum for numbers a[i]-a[i+1] for
         i=0..n-1 and a[i] for i=n
+        copy - if False, the same list is yielded on each step and changed in
+        place afterwards, so it must be copied if it is to be kept
+
+    Partitions are generated in reverse lexicographic order. Iterators are
+    independent of each other, so several of them may be used at once.
+    Partitions may be counted and addressed by their index in this order,
+    e.g. to split enumeration into chunks:
+        partitions = Partitions(40, max_part=10)
+        total = partitions.count()
+        chunk = list(partitions.chunk(1000, 2000))
     """
 
+    # tables of completions shared by instances with the same constraints,
+    # at most max_tables of them are kept
+    _tables = {}
+    max_tables = 4
+
     @staticmethod
     def transpose(partition):
         """Transposes the partition, e. g. its Ferrers diagram.
@@ -44,105 +59,385 @@ class Partitions:
                 break
         return transposed
 
-    @staticmethod
-    def _slope(seq):
-        return list(map(lambda x, y: x - y, seq, seq[1:] + [0]))
-
-    def _isValid(self, seq):
-        return all(func(seq) for func in self._validators)
-
     def __init__(self, number, length=None, min_length=None, max_length=None,
-                 min_part=None, max_part=None, min_slope=None, max_slope=None):
+                 min_part=None, max_part=None, min_slope=None, max_slope=None,
+                 copy=True):
         self._number, self._length = number, length
-        validators = [(min_length, lambda seq: len(seq) >= min_length),
-            (max_length, lambda seq: len(seq) <= max_length),
-            (min_part, lambda seq: all(x >= min_part for x in seq)),
-            (max_part, lambda seq: all(x <= max_part for x in seq)),
-            (min_slope,
-             lambda seq: all(x >= min_slope for x in Partitions._slope(seq))),
-            (max_slope,
-             lambda seq: all(x <= max_slope for x in Partitions._slope(seq)))]
-        self._validators = [func for (c, func) in validators if c is not None]
-
+        self._copy = copy
+        self._min_length = max(length or 0, min_length or 0)
+        self._max_length = min(x for x in (length, max_length, number)
+                               if x is not None)
+        self._min_part = max(min_part or 1, 1)
+        self._max_part = number if max_part is None else max_part
+        self._min_slope = min_slope
+        self._max_slope = max_slope
+        # only fixed length is supported by plain generators, other
+        # constraints are pushed into enumeration
+        self._constrained = any(c is not None for c in (
+            min_length, max_length, min_part, max_part, min_slope,
+            max_slope)) and (number <= 0 or self._cuts())
+        self._table = None
 
-    _h = 0
+    def _cuts(self):
+        """Checks if constraints exclude some of partitions (of fixed length,
+        if it is given), so that plain generators can not be used.
+        """
+        number = self._number
+        if (self._min_part > 1 or self._max_part < number or
+                (self._min_slope or 0) > 0 or
+                (self._max_slope is not None and self._max_slope < number)):
+            return True
+        if self._length is None and 1 <= self._min_length == self._max_length:
+            self._length = self._min_length
+        if self._length is not None:
+            return False
+        return self._min_length > 1 or self._max_length < number
 
     @staticmethod
-    def _next(partition):
-        r"""
+    def _iter_all(x):
+        r"""Generates partitions starting from x, changing x in place.
         Based on ZS1 algorithm from http://www.site.uottawa.ca/~ivan/F49-int-part.pdf
         """
-        if partition[0] <= 1:
-            return None
-
-        # not a really good idea;
-        # needed to simplify iterator definition
-        h = Partitions._h
-        x = list(partition)  # make a copy of this partition
-        if x[h - 1] == 2:
-            x[h - 1] = 1
-            x.append(1)
-            h -= 1
-        else:
-            r = x[
-                h - 1] - 1   # the last element which is greater then 1 minus 1
-            t = len(x) - h + 1   # number of ones + 1
-            x[h - 1] = r
-            while t >= r:
-                h += 1
-                x[h - 1] = r
-                t -= r
-            if not t:
-                del x[h:]  # remove redundant ones
+        # h is the index (starting with 1) of the last element greater than 1
+        h = sum(1 for part in x if part > 1)
+        while True:
+            yield x
+            if x[0] <= 1:
+                return
+            if x[h - 1] == 2:
+                x[h - 1] = 1
+                x.append(1)
+                h -= 1
             else:
-                m = h + 1 - len(x)
-                if m <= 0:
-                    del x[h + 1:]
-                else:
-                    x[len(x):] = [1] * m
-                if t > 1:
+                r = x[h - 1] - 1
+                t = len(x) - h + 1   # number of ones + 1
+                x[h - 1] = r
+                while t >= r:
                     h += 1
-                    x[h - 1] = t
-        Partitions._h = h
-        return x
+                    x[h - 1] = r
+                    t -= r
+                if not t:
+                    del x[h:]  # remove redundant ones
+                else:
+                    m = h + 1 - len(x)
+                    if m <= 0:
+                        del x[h + 1:]
+                    else:
+                        x[len(x):] = [1] * m
+                    if t > 1:
+                        h += 1
+                        x[h - 1] = t
 
     @staticmethod
-    def _nextFixedLength(partition):
-        smallest = partition[-1]
-        i = 1
-        try:
-            while partition[-i - 1] - smallest < 2:
+    def _iter_fixed_length(x):
+        """Generates partitions of the same length starting from x, changing x
+        in place.
+        """
+        while True:
+            yield x
+            smallest = x[-1]
+            i = 1
+            while i < len(x) and x[-i - 1] - smallest < 2:
                 i += 1
-        except IndexError:
-            return None
+            if i == len(x):
+                return
+            x[-i - 1] -= 1
+            s = sum(x[-i:]) + 1
+            while i > 0:
+                x[-i] = min(x[-i - 1], s - i + 1)
+                s -= x[-i]
+                i -= 1
 
-        x = list(partition)
-        x[-i - 1] -= 1
-        s = sum(x[-i:]) + 1
-        while i > 0:
-            x[-i] = min(x[-i - 1], s - i + 1)
-            s -= x[-i]
-            i -= 1
+    def _first(self):
+        """Returns the first valid partition or None.
+        """
+        if self._constrained:
+            partition = []
+            if self._number <= 0 or not self._complete(partition,
+                                                       self._number):
+                return None
+            return partition
+        n, l = self._number, self._length
+        if l is None:
+            return [n] if n >= 0 else None
+        return [n - l + 1] + [1] * (l - 1) if 0 < l <= n else None
 
-        return x
+    def _complete(self, x, remainder):
+        """Appends to x the greatest valid completion with given sum. Returns
+        False if there are no valid completions.
+        """
+        while remainder:
+            lower, upper = self._bounds(x[-1] if x else None)
+            part = min(upper, remainder)
+            while (part >= lower and
+                   not self._feasible(remainder - part, part, len(x) + 1)):
+                part -= 1
+            if part < lower:
+                return False
+            x.append(part)
+            remainder -= part
+        return True
+
+    def _iter_constrained(self, x):
+        """Generates valid partitions starting from x, changing x in place.
+        Only prefixes having valid completions are visited.
+        """
+        while True:
+            yield x
+            remainder = 0
+            while x:
+                part = x.pop()
+                remainder += part
+                lower, _ = self._bounds(x[-1] if x else None)
+                for part in range(part - 1, lower - 1, -1):
+                    if self._feasible(remainder - part, part, len(x) + 1):
+                        x.append(part)
+                        self._complete(x, remainder - part)
+                        break
+                else:
+                    continue
+                break
+            else:
+                return
+
+    def _iter_from(self, current):
+        if self._constrained:
+            generator = self._iter_constrained(current)
+        elif self._length is None:
+            generator = Partitions._iter_all(current)
+        else:
+            generator = Partitions._iter_fixed_length(current)
+        if self._copy:
+            generator = map(list, generator)
+        return generator
 
     def __iter__(self):
-        l = self._length
+        current = self._first()
+        if current is None:
+            return iter(())
+        return self._iter_from(current)
+
+    def _bounds(self, previous):
+        """Returns bounds for the part following the part `previous'.
+        """
+        lower, upper = self._min_part, self._max_part
+        if previous is not None:
+            upper = min(upper, previous - (self._min_slope or 0))
+            if self._max_slope is not None:
+                lower = max(lower, previous - self._max_slope)
+        return lower, upper
+
+    def _is_last(self, part, length):
+        """Checks if partition of given length may end with `part'.
+        """
+        return (self._min_length <= length <= self._max_length and
+                (self._min_slope is None or part >= self._min_slope) and
+                (self._max_slope is None or part <= self._max_slope))
+
+    def _feasible(self, remainder, part, length):
+        """Checks if a partition beginning with `length' parts, the last of
+        which is `part', has valid completions with sum `remainder'. Without
+        slope constraints this is checked directly, since any number of parts
+        k can sum to any value between k * min_part and k * max_part.
+        """
+        if self._min_slope is not None or self._max_slope is not None:
+            return self._completions(remainder, part, length) > 0
+        if not remainder:
+            return self._min_length <= length <= self._max_length
+        upper = min(part, self._max_part, remainder)
+        if upper < self._min_part:
+            return False
+        # numbers of remaining parts are between least and most
+        least = max(-(-remainder // upper), self._min_length - length)
+        most = min(remainder // self._min_part, self._max_length - length)
+        return least <= most
+
+    def _level(self, length, remainder):
+        """Returns key of the length state for the table of completions. If
+        the upper bound for length can not be reached with the remaining sum,
+        all lengths starting from min_length are equivalent and have key -1.
+        Returns None if there are too many parts.
+        """
+        if length > self._max_length:
+            return None
+        if (length >= self._min_length and
+                length + remainder // self._min_part <= self._max_length):
+            return -1
+        return length
+
+    def _table_key(self):
+        return (self._number, self._min_length, self._max_length,
+                self._min_part, self._max_part, self._min_slope,
+                self._max_slope)
+
+    def _rows(self):
+        """Returns dict of rows of the table of completions for these
+        constraints, shared by all instances with the same ones.
+        """
+        if self._table is None:
+            key = self._table_key()
+            tables = Partitions._tables
+            self._table = tables.pop(key, None)
+            if self._table is None:
+                self._table = {}
+            tables[key] = self._table
+            while len(tables) > Partitions.max_tables:
+                del tables[next(iter(tables))]
+        return self._table
+
+    def _next_levels(self, level, remainder, top):
+        """Yields pairs (x, key of the level after adding part x) for parts x
+        from min_part to top.
+        """
+        for x in range(self._min_part, top + 1):
+            if level < 0:
+                yield x, -1
+            else:
+                yield x, self._level(level + 1, remainder - x)
+
+    def _row(self, level, remainder):
+        """Returns list of numbers of valid completions with sum `remainder'
+        for partitions at given length state, indexed by their last part.
+        Rows are computed on demand, and those the row depends on (with less
+        remainder) are computed first using explicit stack.
+        """
+        rows = self._rows()
+        row = rows.get((level, remainder))
+        if row is not None:
+            return row
         n = self._number
-        if self._length is None:
-            # we use class variable to generalize next() function
-            Partitions._h = 1
-            nextPartition = Partitions._next
-            current = [n]
-        else:
-            nextPartition = Partitions._nextFixedLength
-            current = [n - l + 1] + [1] * (l - 1) if l <= n else None
+        stack = [(level, remainder)]
+        while stack:
+            level, r = stack[-1]
+            if (level, r) in rows:
+                stack.pop()
+                continue
+            top = min(r, self._max_part)
+            missing = [(l, r - x) for x, l in self._next_levels(level, r, top)
+                       if l is not None and (l, r - x) not in rows]
+            if missing:
+                stack.extend(missing)
+                continue
+            stack.pop()
+            # previous part a does not exceed max_part and n - r
+            width = max(min(self._max_part, n - r) + 1, 1)
+            row = [0] * width
+            if not r:
+                length = self._min_length if level < 0 else level
+                for a in range(1, width):
+                    row[a] = int(self._is_last(a, length))
+            else:
+                # diagonal[y] = sum of completions with next part <= y
+                diagonal = [0] * (top + 1)
+                for x, l in self._next_levels(level, r, top):
+                    following = 0
+                    if l is not None:
+                        next_row = rows[(l, r - x)]
+                        if x < len(next_row):
+                            following = next_row[x]
+                    diagonal[x] = diagonal[x - 1] + following
+                for a in range(1, width):
+                    lower, upper = self._bounds(a)
+                    upper = min(upper, top)
+                    if lower <= upper:
+                        row[a] = diagonal[upper] - diagonal[lower - 1]
+            rows[(level, r)] = row
+        return rows[(level, remainder)]
 
-        if not self._validators:
-            while current is not None:
-                yield current
-                current = nextPartition(current)
-        else:
-            while current is not None:
-                if self._isValid(current): yield current
-                current = nextPartition(current)
+    def _completions(self, remainder, part, length):
+        """Returns number of valid partitions beginning with `length' parts,
+        the last of which is `part', and having remaining parts sum to
+        `remainder'.
+        """
+        level = self._level(length, remainder)
+        if level is None:
+            return 0
+        row = self._row(level, remainder)
+        return row[part] if part < len(row) else 0
+
+    def count(self):
+        """Returns the number of partitions satisfying the constraints.
+        """
+        if self._number <= 0:
+            # unconstrained partitions of zero consist of the only [0]
+            return int(self._number == 0 and not self._constrained and
+                       self._length is None)
+        if self._min_slope is None and self._max_slope is None:
+            return self._count_by_lengths()
+        lower, upper = self._bounds(None)
+        return sum(self._completions(self._number - x, x, 1)
+                   for x in range(lower, min(upper, self._number) + 1))
+
+    def _count_by_lengths(self):
+        """Counts partitions without slope constraints. Subtracting min_part
+        from every part of a partition of length k gives a partition of
+        n - k * min_part into at most k parts not exceeding
+        w = max_part - min_part, and these are counted by coefficients of
+        Gaussian binomial [k + w, k]_q, which are found consecutively for all
+        k by multiplying by (1 - q^(w + k)) / (1 - q^k).
+        """
+        n, lower = self._number, self._min_part
+        width = min(self._max_part, n) - lower
+        if width < 0:
+            return 0
+        # coefficients of [k + width, k]_q up to q^n
+        coefficients = [1] + [0] * n
+        total = 0
+        for k in range(1, min(self._max_length, n // lower) + 1):
+            shift = width + k
+            for d in range(n, shift - 1, -1):
+                coefficients[d] -= coefficients[d - shift]
+            for d in range(k, n + 1):
+                coefficients[d] += coefficients[d - k]
+            if k >= self._min_length:
+                total += coefficients[n - k * lower]
+        return total
+
+    def unrank(self, index):
+        """Returns partition with given index (starting with 0) in the order
+        of iteration.
+        """
+        if not 0 <= index < self.count():
+            raise IndexError("partition index out of range")
+        if not self._number:
+            return [0]
+        partition = []
+        remainder, previous = self._number, None
+        while remainder:
+            lower, upper = self._bounds(previous)
+            for part in range(min(upper, remainder), lower - 1, -1):
+                count = self._completions(remainder - part, part,
+                                          len(partition) + 1)
+                if index < count:
+                    break
+                index -= count
+            partition.append(part)
+            remainder -= part
+            previous = part
+        return partition
+
+    def rank(self, partition):
+        """Returns index of the partition in the order of iteration. The
+        partition must satisfy the constraints.
+        """
+        index = 0
+        remainder, previous = self._number, None
+        for length, current in enumerate(partition):
+            lower, upper = self._bounds(previous)
+            for part in range(min(upper, remainder), current, -1):
+                index += self._completions(remainder - part, part, length + 1)
+            remainder -= current
+            previous = current
+        return index
+
+    def chunk(self, start, stop=None):
+        """Iterates over partitions with indices from `start' to `stop'
+        (excluding), so that the enumeration may be split between independent
+        workers.
+        """
+        total = self.count()
+        stop = total if stop is None else min(stop, total)
+        if start >= stop:
+            return iter(())
+        generator = self._iter_from(self.unrank(start))
+        return (x for _, x in zip(range(stop - start), generator))
@@ -0,0 +1,175 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import hashlib
+import json
+import os
+import sqlite3
+
+from spectrum.calculations import (cyclotomic, groups, numeric, orders,
+                                   partition, primes, semisimple)
+from spectrum.calculations import set as sets
+from spectrum.calculations.numeric import Integer
+from spectrum.calculations.semisimple import SpectraElement
+from spectrum.calculations.spectra import (alternating, classical,
+                                           exceptional, sporadic)
+
+__author__ = 'Daniel Lytkin'
+
+# Module providing persistent on-disk storage for group apexes and orders.
+
+# increase when the stored data layout changes
+FORMAT_VERSION = 1
+
+# modules whose code defines the stored values, i.e. every module producing
+# apexes and orders of groups together with their helpers
+_FORMULA_MODULES = (groups, classical, exceptional, alternating, sporadic,
+                    semisimple, orders, sets, partition, numeric, cyclotomic,
+                    primes)
+
+
+def formulas_version():
+    """Returns version string which changes whenever source code of spectra
+    or order formulas changes, so that stale entries are never used.
+    """
+    digest = hashlib.sha1(str(FORMAT_VERSION).encode())
+    for module in _FORMULA_MODULES:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _encode_integer(integer):
+    return [[factor, power] for factor, power in integer.factors.items()]
+
+
+def _decode_integer(factors):
+    return Integer({factor: power for factor, power in factors})
+
+
+def _encode_element(element):
+    if isinstance(element, SpectraElement):
+        return [int(element), _encode_integer(element.quotient), element.q,
+                list(element.partition), list(element.signs)]
+    return int(element)
+
+
+def _decode_element(data):
+    if isinstance(data, int):
+        return data
+    value, quotient, q, partition, signs = data
+    element = int.__new__(SpectraElement, value)
+    element.__init__(quotient=_decode_integer(quotient), q=q,
+                     partition=partition, signs=signs)
+    return element
+
+
+class PersistentCache:
+    """Stores group apexes (with provenance of SpectraElement's) and
+    factorized orders in sqlite database file. Entries are keyed by string
+    representation of the group and by the version of spectra formulas.
+
+    Usage:
+        cache = PersistentCache('spectra.sqlite')
+        groups.set_persistent_cache(cache)
+    """
+
+    def __init__(self, path, factorize_orders=True):
+        self._path = path
+        self._factorize_orders = factorize_orders
+        self._version = formulas_version()
+        self._connection = None
+        self._pid = None
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def version(self):
+        return self._version
+
+    def _connect(self):
+        # sqlite connections must not be shared with forked processes
+        if self._connection is None or self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._path, timeout=60)
+            self._pid = os.getpid()
+            with self._connection:
+                self._connection.execute(
+                    "CREATE TABLE IF NOT EXISTS entries ("
+                    "version TEXT, grp TEXT, kind TEXT, data TEXT, "
+                    "PRIMARY KEY (version, grp, kind))")
+        return self._connection
+
+    def _get(self, group, kind):
+        row = self._connect().execute(
+            "SELECT data FROM entries WHERE version=? AND grp=? AND kind=?",
+            (self._version, str(group), kind)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _put(self, group, kind, data):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                (self._version, str(group), kind, json.dumps(data)))
+
+    def get_apex(self, group):
+        """Returns stored apex of the group or None.
+        """
+        data = self._get(group, 'apex')
+        return None if data is None else [_decode_element(x) for x in data]
+
+    def put_apex(self, group, apex):
+        """Stores apex of the group.
+        """
+        self._put(group, 'apex', [_encode_element(x) for x in apex])
+
+    def get_order(self, group):
+        """Returns stored order of the group as Integer or None.
+        """
+        data = self._get(group, 'order')
+        return None if data is None else _decode_integer(data)
+
+    def put_order(self, group, order):
+        """Stores order of the group, factorizing it first if this cache was
+        created with factorize_orders=True.
+        """
+        if self._factorize_orders:
+            order.factorize()
+        self._put(group, 'order', _encode_integer(order))
+
+    def purge(self):
+        """Removes entries stored for other versions of formulas.
+        """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM entries WHERE version != ?",
+                               (self._version,))
+
+    def clear(self):
+        """Removes all entries.
+        """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM entries")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None
+        return state
@@ -0,0 +1,252 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import bisect
+import itertools
+import threading
+
+from spectrum.calculations import factorization
+
+__author__ = 'Daniel Lytkin'
+
+# Module providing shared table of small primes and prime powers, built by
+# segmented sieve of Eratosthenes and extended on demand.
+
+
+class PrimeTable:
+    """Table of primes less than `limit'. Sieve is stored as bytearray with
+    one byte for each odd number: byte i is 1 iff 2i+1 is prime. When a
+    number beyond the limit is requested, the table is extended by sieving
+    new segment with primes already found, up to `max_limit'. Larger numbers
+    are checked by the factorization engine.
+    """
+
+    def __init__(self, limit=1 << 16, max_limit=1 << 24):
+        self._max_limit = max_limit
+        self._lock = threading.Lock()
+        # table initially holds numbers less than 3: only 2 is prime
+        self._sieve = bytearray(1)
+        self._limit = 2
+        self._powers = []
+        self._power_set = frozenset()
+        self._extend(min(limit, max_limit))
+
+    @property
+    def limit(self):
+        return self._limit
+
+    @property
+    def max_limit(self):
+        return self._max_limit
+
+    def _extend(self, limit):
+        """Extends table to contain all numbers less than given limit.
+        """
+        with self._lock:
+            if limit <= self._limit:
+                return
+            while self._limit < limit:
+                # base primes must be less than the current limit
+                self._sieve_segment(min(limit, self._limit ** 2))
+            self._update_powers()
+
+    def _sieve_segment(self, stop):
+        # segment contains odd numbers in [low, stop)
+        low = 2 * len(self._sieve) + 1
+        size = max(0, stop // 2 - len(self._sieve))
+        segment = bytearray(b'\x01') * size
+        for p in self._odd_primes(3, int(stop ** 0.5) + 1):
+            start = max(p * p, (low + p - 1) // p * p)
+            if start % 2 == 0:
+                start += p
+            index = (start - low) // 2
+            if index < size:
+                segment[index::p] = bytes(len(range(index, size, p)))
+        self._sieve += segment
+        self._limit = stop
+
+    def _odd_primes(self, start, stop):
+        """Yields odd primes in [start, stop) from the existing table.
+        """
+        sieve = self._sieve
+        end = min(stop // 2, len(sieve))
+        index = sieve.find(1, start // 2, end)
+        while index != -1:
+            yield 2 * index + 1
+            index = sieve.find(1, index + 1, end)
+
+    def _update_powers(self):
+        powers = []
+        small_primes = self._odd_primes(3, int(self._limit ** 0.5) + 1)
+        for p in itertools.chain((2,), small_primes):
+            power = p * p
+            while power < self._limit:
+                powers.append(power)
+                power *= p
+        powers.sort()
+        self._powers = powers
+        self._power_set = frozenset(powers)
+
+    def _ensure(self, n):
+        """Tries to extend table to contain n. Returns whether n is in
+        the table.
+        """
+        if n < self._limit:
+            return True
+        if n >= self._max_limit:
+            return False
+        self._extend(min(max(2 * self._limit, n + 1), self._max_limit))
+        return True
+
+    def is_prime(self, n):
+        """Checks whether n is prime. Takes constant time for n in the table.
+        """
+        if n < 3 or n % 2 == 0:
+            return n == 2
+        if self._ensure(n):
+            return self._sieve[n // 2] == 1
+        return factorization.get_engine().is_prime(n)
+
+    def is_prime_power(self, n):
+        """Checks whether n = p^k for prime p and k > 0.
+        """
+        if self._ensure(n):
+            return self.is_prime(n) or n in self._power_set
+        if n % 2 == 0:
+            return n & (n - 1) == 0
+        return factorization.get_engine().prime_power_base(n) is not None
+
+    def primes_in_range(self, start, stop=None):
+        """Yields primes p such that start <= p < stop in increasing order.
+        If stop is None, the sequence is infinite.
+        """
+        n = max(start, 2)
+        if n == 2 and (stop is None or stop > 2):
+            yield 2
+            n = 3
+        while stop is None or n < stop:
+            if not self._ensure(n):
+                break
+            end = self._limit if stop is None else min(stop, self._limit)
+            yield from self._odd_primes(n, end)
+            n = end
+        # beyond the table primes are checked one by one
+        n += 1 - n % 2
+        while stop is None or n < stop:
+            if factorization.get_engine().is_prime(n):
+                yield n
+            n += 2
+
+    def first_primes(self, n):
+        """Returns list of n first primes.
+        """
+        return list(itertools.islice(self.primes_in_range(2), n))
+
+    def primes_less_than(self, n):
+        """Returns list of primes less than n.
+        """
+        return list(self.primes_in_range(2, n))
+
+    def next_prime(self, n):
+        """Returns smallest prime greater than n.
+        """
+        return next(self.primes_in_range(n + 1))
+
+    def prev_prime(self, n):
+        """Returns largest prime less than n, or None if n <= 2.
+        """
+        if n <= 3:
+            return 2 if n == 3 else None
+        if self._ensure(n - 1):
+            index = self._sieve.rfind(1, 0, n // 2)
+            return 2 if index == -1 else 2 * index + 1
+        n -= 1 + n % 2
+        while not factorization.get_engine().is_prime(n):
+            n -= 2
+        return n
+
+    def next_prime_power(self, n):
+        """Returns smallest prime power greater than n.
+        """
+        prime = self.next_prime(n)
+        if prime < self._limit:
+            index = bisect.bisect_right(self._powers, n)
+            if index < len(self._powers):
+                return min(prime, self._powers[index])
+            return prime
+        n += 1
+        while not self.is_prime_power(n):
+            n += 1
+        return n
+
+    def prev_prime_power(self, n):
+        """Returns largest prime power less than n, or None if n <= 2.
+        """
+        if n <= 2:
+            return None
+        if self._ensure(n - 1):
+            prime = self.prev_prime(n)
+            index = bisect.bisect_left(self._powers, n)
+            if index > 0:
+                return max(prime, self._powers[index - 1])
+            return prime
+        n -= 1
+        while not self.is_prime_power(n):
+            n -= 1
+        return n
+
+
+table = PrimeTable()
+
+
+def is_prime(n):
+    return table.is_prime(n)
+
+
+def is_prime_power(n):
+    return table.is_prime_power(n)
+
+
+def primes_in_range(start, stop=None):
+    return table.primes_in_range(start, stop)
+
+
+def first_primes(n):
+    """Returns n first prime numbers.
+    """
+    return table.first_primes(n)
+
+
+def primes_less_than(n):
+    """Returns list of primes less than n.
+    """
+    return table.primes_less_than(n)
+
+
+def next_prime(n):
+    return table.next_prime(n)
+
+
+def prev_prime(n):
+    return table.prev_prime(n)
+
+
+def next_prime_power(n):
+    return table.next_prime_power(n)
+
+
+def prev_prime_power(n):
+    return table.prev_prime_power(n)
@@ -14,10 +14,12 @@ Copyright 2012 Daniel Lytkin.
    limitations under the License.
 
 """
+import collections
 import itertools
+import threading
 from functools import reduce
 
-from spectrum.calculations import numeric
+from spectrum.calculations import cyclotomic, numeric
 from spectrum.calculations.numeric import Integer
 from spectrum.calculations.set import MaximalBoundedSets, FullBoundedSets, BoundedSets
 from spectrum.tools.tools import ObjectCache
@@ -27,10 +29,160 @@ __author__ = 'Daniel Lytkin'
 _CACHE = True
 
 
+def _term_divides(term, other):
+    """Checks whether q^k + e divides q^m + f for every q, where
+    term = (k, e) and other = (m, f).
+    """
+    (k, e), (m, f) = term, other
+    if m % k:
+        return False
+    if e == -1:
+        return f == -1
+    # q^k + 1 divides q^m + 1 iff m/k is odd and q^m - 1 iff m/k is even
+    return (m // k) % 2 == (1 if f == 1 else 0)
+
+
+def _bits(mask):
+    """Yields indices of set bits of mask.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def _bounded_sets(bound, codes, maximal=False, leading=None):
+    """Generates pairs (parts, code) for integer sets {n_1, ..., n_k} with
+    n_1 + ... + n_k <= bound in the same order as BoundedSets, or as
+    MaximalBoundedSets if `maximal' is True. Code is bitwise OR of codes[n_i]
+    and it is carried along the depth-first search, so that each set costs one
+    OR. If `leading' is given, only sets with the greatest element n_1 in
+    `leading' are generated.
+    """
+    if not bound:
+        yield [], 0
+        return
+    parts = []
+    prefix = [0]
+    total = 0
+    candidate = bound
+    while True:
+        if candidate > 0:
+            if leading is not None and not parts and candidate not in leading:
+                candidate -= 1
+                continue
+            parts.append(candidate)
+            prefix.append(prefix[-1] | codes[candidate])
+            total += candidate
+            candidate = min(candidate - 1, bound - total)
+            continue
+        if not parts:
+            return
+        rest = bound - total
+        if (not maximal or rest == 0 or
+                (len(parts) >= rest and parts[-rest] == rest)):
+            yield list(parts), prefix[-1]
+        last = parts.pop()
+        prefix.pop()
+        total -= last
+        candidate = last - 1
+
+
+class _TermMasks:
+    """Bit mask representation of sets of terms q^k + e for k <= n. Term
+    (k, e) has bit 2k if e = -1 and bit 2k + 1 if e = 1.
+    """
+
+    def __init__(self, n):
+        terms = [(k, e) for k in range(1, n + 1) for e in (-1, 1)]
+        size = 2 * n + 2
+        # terms dividing given one, including itself
+        self.divisors = [0] * size
+        # indices d of cyclotomic polynomials dividing the term
+        self.cyclotomic = [0] * size
+        for term in terms:
+            bit = self.bit(*term)
+            for other in terms:
+                if _term_divides(other, term):
+                    self.divisors[bit] |= 1 << self.bit(*other)
+            k, e = term
+            m = k if e == -1 else 2 * k
+            for d in range(1, m + 1):
+                if m % d == 0 and (e == -1 or k % d):
+                    self.cyclotomic[bit] |= 1 << d
+
+    @staticmethod
+    def bit(k, e):
+        return 2 * k + (e == 1)
+
+    def describe(self, partition, sign):
+        """Returns tuple (mask, divisors, cyclotomic) for terms q^k + sign,
+        k in partition, where `divisors' is mask of terms properly dividing
+        some of them and `cyclotomic' is mask of cyclotomic polynomials
+        dividing some of them. `sign' may also be a list of signs of the
+        terms.
+        """
+        signs = itertools.repeat(sign) if isinstance(sign, int) else sign
+        mask = divisors = cyclotomic = 0
+        for k, e in zip(partition, signs):
+            bit = self.bit(k, e)
+            mask |= 1 << bit
+            divisors |= self.divisors[bit] & ~(1 << bit)
+            cyclotomic |= self.cyclotomic[bit]
+        return mask, divisors, cyclotomic
+
+    def down(self, mask):
+        """Returns mask of all terms dividing some term of mask.
+        """
+        result = 0
+        for bit in _bits(mask):
+            result |= self.divisors[bit]
+        return result
+
+    def maximal(self, masks):
+        """Returns set of masks that are not dominated by other ones. Set A is
+        dominated by set B if every term of A divides some term of B, so that
+        LCM of A divides LCM of B for every q. Masks must be reduced, i.e.
+        contain no term dividing other term, and `masks' must be a dict
+        mapping them to masks of cyclotomic polynomials.
+        """
+        # dominated set has no more cyclotomic factors than dominating one, so
+        # dominating sets mostly come first
+        order = sorted(masks, key=lambda mask: -bin(masks[mask]).count('1'))
+        kept = {}
+        # bit i of dominating[bit] is set iff i-th kept set contains multiple
+        # of the term
+        dominating = [0] * len(self.divisors)
+        same_cyclotomic = collections.defaultdict(list)
+        for index, mask in enumerate(order):
+            candidates = -1
+            for bit in _bits(mask):
+                candidates &= dominating[bit]
+                if not candidates:
+                    break
+            if candidates:
+                continue
+            # kept dominated sets must have the same cyclotomic factors
+            down = self.down(mask)
+            for other, other_index in same_cyclotomic[masks[mask]]:
+                if other in kept and other & ~down == 0:
+                    del kept[other]
+                    for bit in _bits(self.down(other)):
+                        dominating[bit] &= ~(1 << other_index)
+            kept[mask] = index
+            same_cyclotomic[masks[mask]].append((mask, index))
+            for bit in _bits(down):
+                dominating[bit] |= 1 << index
+        return set(kept)
+
+
 class SpectraElement(int):
     """Special int extension for spectra elements. It contains information on
     how it was calculated. If 'verbose' is False, creates int, without any
     additional info.
+    Information is stored compactly: quotient as int and parts with signs as
+    one tuple of numbers k for q^k + 1 and -k for q^k - 1. Integer quotient
+    and lists of parts and signs are built on demand.
     """
 
     def __new__(cls, quotient=1, q=0, partition=None, signs=None,
@@ -48,38 +200,50 @@ class SpectraElement(int):
         """Creates element = quotient * [q ^ n_1 + e_1, ...] for n_i in
         'partition', e_i in 'signs'
         """
-        if partition is None:
-            partition = []
-        if signs is None:
-            signs = []
-        self._quotient = Integer(quotient)
+        self._quotient = int(quotient)
         self._q = q
-        self._partition = partition
-        self._signs = signs
+        self._terms = tuple(ni if ei > 0 else -ni for (ni, ei) in
+                            zip(partition or (), signs or ()))
+
+    @classmethod
+    def _from_terms(cls, value, quotient, q, terms):
+        elem = int.__new__(cls, value)
+        elem._quotient = quotient
+        elem._q = q
+        elem._terms = terms
+        return elem
 
     @property
     def quotient(self):
-        return self._quotient
+        return Integer(self._quotient)
+
+    @property
+    def q(self):
+        return self._q
 
     @property
     def partition(self):
-        return self._partition
+        return [abs(t) for t in self._terms]
 
     @property
     def signs(self):
-        return self._signs
+        return [1 if t > 0 else -1 for t in self._terms]
+
+    def _quotient_str(self):
+        if self._quotient == 1:
+            return ""
+        return Integer(self._quotient).str_factorized()
 
     def str_verbose(self):
-        quotient = self._quotient.str_factorized() if (
-            self._quotient != 1) else ""
+        quotient = self._quotient_str()
         sign = lambda e: "+" if e > 0 else "-"
         power = lambda k: "^" + str(k) if k > 1 else ""
         element = lambda ni, ei: "{}{} {} 1".format(self._q, power(ni),
                                                     sign(ei))
         elements = ", ".join(
             element(ni, ei) for (ni, ei) in sorted(
-                zip(self._partition, self._signs)))
-        if len(self._partition) == 1:
+                zip(self.partition, self.signs)))
+        if len(self._terms) == 1:
             brackets = "({})" if self._quotient != 1 else "{}"
         else:
             brackets = "[{}]"
@@ -87,8 +251,7 @@ class SpectraElement(int):
         return " * ".join(filter(bool, (quotient, lcm_str)))
 
     def str_latex(self):
-        quotient = self._quotient.str_factorized() if (
-            self._quotient != 1) else ""
+        quotient = self._quotient_str()
         sign = lambda e: "+" if e > 0 else "-"
 
         def power(k):
@@ -101,8 +264,8 @@ class SpectraElement(int):
                                                     sign(ei))
         elements = ", ".join(
             element(ni, ei) for (ni, ei) in sorted(
-                zip(self._partition, self._signs), reverse=True))
-        if len(self._partition) == 1:
+                zip(self.partition, self.signs), reverse=True))
+        if len(self._terms) == 1:
             brackets = "({})" if self._quotient != 1 else "{}"
         else:
             brackets = "[{}]"
@@ -113,26 +276,336 @@ class SpectraElement(int):
         """Returns lcm of this and other. 'q' must be the same. Quotients are
         multiplied.
         """
-        elem = int.__new__(SpectraElement, numeric.lcm(self, other))
-        quotient = self._quotient * other._quotient
-        elem.__init__(quotient=quotient, q=self._q,
-                      partition=list(self._partition) + list(other._partition),
-                      signs=list(self._signs) + list(other._signs))
-        return elem
+        return SpectraElement._from_terms(
+            numeric.lcm(self, other), self._quotient * other._quotient,
+            self._q, self._terms + other._terms)
 
     def __mul__(self, other):
         """Multiplies quotient by integer
         """
-        elem = int.__new__(SpectraElement, int(self) * other)
-        elem.__init__(quotient=self._quotient * other, q=self._q,
-                      partition=self._partition, signs=self._signs)
-        return elem
+        return SpectraElement._from_terms(
+            int(self) * other, self._quotient * int(other), self._q,
+            self._terms)
 
     def __rmul__(self, other):
         return self * other
 
 
-class SemisimpleElements:
+class PowerTable(metaclass=ObjectCache if _CACHE else type):
+    """Table of numbers q^k + e for k <= n and e = 1 or -1. Each number is
+    stored as a vector of exponents of pairwise coprime components, which are
+    obtained by refining values of cyclotomic polynomials. LCM of several
+    numbers is then the product of components in maximal exponents, so no
+    gcd's of large numbers are computed.
+    """
+    # tables hold many large numbers, so only a few of them are kept
+    _cache_max = 8
+
+    def __init__(self, q, n, max_cached=1 << 10):
+        self._q = q
+        self._n = n
+        parts = {(k, e): cyclotomic.cyclotomic_parts(q, k, e)
+                 for k in range(1, n + 1) for e in (-1, 1)}
+        self._base = numeric.coprime_base(
+            set(itertools.chain.from_iterable(parts.values())))
+        decompositions = {}
+        self._exponents = {}
+        for term, term_parts in parts.items():
+            exponents = collections.Counter()
+            for part in term_parts:
+                if part not in decompositions:
+                    decompositions[part] = self._decompose(part)
+                exponents.update(decompositions[part])
+            self._exponents[term] = tuple(sorted(exponents.items()))
+        # Each term is encoded as an integer, whose bit j * len(base) + i is
+        # set iff exponent of i-th component is greater than j. Then LCM is
+        # encoded by bitwise OR of encodings.
+        width = len(self._base)
+        self._codes = {term: sum(1 << (j * width + index)
+                                 for index, exponent in exponents
+                                 for j in range(exponent))
+                       for term, exponents in self._exponents.items()}
+        # distinct partitions often have the same LCM
+        self._values = {}
+        self._max_cached = max_cached
+
+    def _decompose(self, number):
+        """Returns Counter of indices of base components and their exponents
+        in number.
+        """
+        exponents = collections.Counter()
+        for index, component in enumerate(self._base):
+            while number % component == 0:
+                number //= component
+                exponents[index] += 1
+            if number == 1:
+                break
+        return exponents
+
+    @property
+    def q(self):
+        return self._q
+
+    @property
+    def n(self):
+        return self._n
+
+    @property
+    def base(self):
+        """Sorted list of pairwise coprime components.
+        """
+        return self._base
+
+    def exponents(self, k, e):
+        """Returns tuple of pairs (i, a) such that q^k + e is the product of
+        base[i] ** a.
+        """
+        return self._exponents[(k, e)]
+
+    def term_code(self, k, e):
+        """Returns code of q^k + e. Code of LCM of several numbers is bitwise
+        OR of their codes.
+        """
+        return self._codes[(k, e)]
+
+    def code(self, partition, signs):
+        """Returns code of LCM(q^{n_1} + e_1, ..., q^{n_k} + e_k) for n_i in
+        'partition', e_i in 'signs'.
+        """
+        codes = self._codes
+        code = 0
+        for term in zip(partition, signs):
+            code |= codes[term]
+        return code
+
+    def value(self, code):
+        """Returns number encoded by code.
+        """
+        value = self._values.get(code)
+        if value is None:
+            value = self._decode(code)
+            if len(self._values) >= self._max_cached:
+                self._values.clear()
+            self._values[code] = value
+        return value
+
+    def _decode(self, code):
+        base = self._base
+        width = len(base)
+        value = 1
+        while code:
+            low = code & -code
+            value *= base[(low.bit_length() - 1) % width]
+            code ^= low
+        return value
+
+    def lcm(self, partition, signs):
+        """Returns LCM(q^{n_1} + e_1, ..., q^{n_k} + e_k) for n_i in
+        'partition', e_i in 'signs'.
+        """
+        return self.value(self.code(partition, signs))
+
+    def element(self, partition, signs, verbose=True, code=None):
+        """Returns SpectraElement for partition and signs, or int if
+        'verbose' is False. Code of the element may be given if known.
+        """
+        if code is None:
+            code = self.code(partition, signs)
+        value = self.value(code)
+        if not verbose:
+            return value
+        return SpectraElement._from_terms(
+            value, 1, self._q,
+            tuple(ni if ei > 0 else -ni for (ni, ei) in zip(partition, signs)))
+
+
+class ElementsCache:
+    """Bounded cache of generated sequences of semisimple elements, shared by
+    all spectrum functions. Size of the cache is the total number of stored
+    elements, and least recently used sequences are evicted when it exceeds
+    `max_size'. Cache may be shared by several threads.
+    """
+
+    def __init__(self, max_size=1 << 18):
+        self._max_size = max_size
+        self._size = 0
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value):
+        with self._lock:
+            self._max_size = value
+            self._evict()
+
+    @property
+    def size(self):
+        """Total number of stored elements.
+        """
+        return self._size
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, key):
+        return key in self._cache
+
+    def _evict(self):
+        while self._size > self._max_size:
+            _, elements = self._cache.popitem(last=False)
+            self._size -= len(elements)
+
+    def get(self, key):
+        """Returns stored tuple of elements or None.
+        """
+        with self._lock:
+            elements = self._cache.get(key)
+            if elements is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return elements
+
+    def put(self, key, elements):
+        """Stores tuple of elements. Sequences longer than `max_size' are not
+        stored.
+        """
+        with self._lock:
+            if len(elements) > self._max_size or key in self._cache:
+                return
+            self._cache[key] = elements
+            self._size += len(elements)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._size = 0
+            self.hits = self.misses = 0
+
+
+elements_cache = ElementsCache()
+
+
+class SemisimpleTemplate(metaclass=ObjectCache if _CACHE else type):
+    """Template of semisimple elements generated by SemisimpleElements in
+    maximal mode, which does not depend on q. Elements are stored as sets of
+    terms q^{n_i} + 1 and q^{n_i} - 1, and sets dominated by other ones
+    (i.e. having LCM dividing other LCM for every q) are removed. Elements
+    for particular q are obtained by evaluating LCMs of remaining sets, so
+    the template is built once for all fields.
+    Arguments have the same meaning as for SemisimpleElements.
+    """
+
+    @classmethod
+    def _cache_key(cls, n, min_length=1, parity=0, sign=0):
+        return n, min_length, parity, sign
+
+    def __init__(self, n, min_length=1, parity=0, sign=0):
+        self._n = n
+        self._min_length = min_length
+        self._parity = parity
+        self._sign = sign
+        self._terms = None
+
+    @property
+    def terms(self):
+        """Returns tuple of sets of terms, each one as a tuple of numbers k
+        for q^k + 1 and -k for q^k - 1.
+        """
+        if self._terms is None:
+            masks = _TermMasks(self._n)
+            # reduced term mask -> terms where it first occurs
+            candidates = {}
+            cyclotomic = {}
+            for partition, signs in self._candidates():
+                mask, divisors, cyclotomic_mask = masks.describe(partition,
+                                                                 signs)
+                mask &= ~divisors
+                if mask not in candidates:
+                    candidates[mask] = tuple(
+                        k if e > 0 else -k for k, e in zip(partition, signs))
+                    cyclotomic[mask] = cyclotomic_mask
+            maximal = masks.maximal(cyclotomic)
+            self._terms = tuple(terms for mask, terms in candidates.items()
+                                if mask in maximal)
+        return self._terms
+
+    def __len__(self):
+        return len(self.terms)
+
+    def _candidates(self):
+        """Generates pairs (partition, signs) in the same order as
+        SemisimpleElements with the same arguments.
+        """
+        n, min_length = self._n, self._min_length
+        if self._sign:
+            f = lambda nk: (-1 if (self._sign == 1 or nk % 2 == 0) else 1)
+            for ni in BoundedSets(n, copy=False):
+                if len(ni) + n - sum(ni) >= min_length:
+                    yield ni, list(map(f, ni))
+        elif self._parity:
+            plusesMod = 0 if self._parity == 1 else 1
+            for pluses in range(plusesMod, n + 1):
+                plusPartitions = FullBoundedSets(pluses, copy=False)
+                if pluses > 0:
+                    plusPartitions = itertools.chain(
+                        plusPartitions, (partition + [1] for partition in
+                                         FullBoundedSets(pluses - 1,
+                                                         copy=False)))
+                for plusPartition in plusPartitions:
+                    if len(plusPartition) % 2 != plusesMod:
+                        continue
+                    plusPart = plusPartition if pluses else []
+                    for minusPart in MaximalBoundedSets(n - pluses,
+                                                        copy=False):
+                        rest = n - sum(plusPart) - sum(minusPart)
+                        if (len(plusPart) + len(minusPart) + rest <
+                                min_length):
+                            continue
+                        yield (plusPart + minusPart,
+                               [1] * len(plusPart) + [-1] * len(minusPart))
+        else:
+            sides = {}
+            for left in range((n + 2) // 2):
+                if left not in sides:
+                    sides[left] = list(MaximalBoundedSets(left))
+                if n - left not in sides:
+                    sides[n - left] = list(MaximalBoundedSets(n - left))
+                for lPart in sides[left]:
+                    for rPart in sides[n - left]:
+                        rest = n - sum(lPart) - sum(rPart)
+                        if len(lPart) + len(rPart) + rest < min_length:
+                            continue
+                        # same order of signs as in general generator
+                        for e in (-1, 1):
+                            yield (lPart + rPart,
+                                   [e] * len(lPart) + [-e] * len(rPart))
+
+    def expressions(self):
+        """Returns list of elements as strings like "[q - 1, q^3 + 1]".
+        """
+        return [SpectraElement._from_terms(0, 1, 'q', terms).str_verbose()
+                for terms in self.terms]
+
+    def elements(self, q, verbose=True, piece=0, pieces=1):
+        """Generates elements for field order q. If `pieces' is set, only
+        every pieces-th element starting with `piece' is generated.
+        """
+        table = PowerTable(q, self._n)
+        for terms in self.terms[piece::pieces]:
+            yield table.element([abs(k) for k in terms],
+                                [1 if k > 0 else -1 for k in terms], verbose)
+
+
+class SemisimpleElements(metaclass=ObjectCache if _CACHE else type):
     """Generates elements of form LCM(q^{n_1} \pm 1, ..., q^{n_k} \pm 1) for
     all partitions n_1 + ... + n_k = n.
     If `min_length' is set to t, then k >= t. Only min_length=1, 2 or 3 are supported.
@@ -141,110 +614,176 @@ class SemisimpleElements:
     If `sign' is set to 1 or -1, generates elements of form
     LCM(q^{n_1}-sign^{n_1}, ..., q^{n_k}-sign^{n_k})
     `sign' or `parity' arguments must be only used separately.
+    If `maximal' is True, skips elements dividing some other element for
+    every q, so that maximal elements by divisibility are the same, but the
+    generated sequence is shorter. Such elements are found once for all q,
+    see SemisimpleTemplate.
     """
 
-    if _CACHE:
-        __metaclass__ = ObjectCache
+    @classmethod
+    def _cache_key(cls, q, n, min_length=1, parity=0, sign=0, verbose=True,
+                   maximal=False):
+        return q, n, min_length, parity, sign, verbose, maximal
 
-    def __init__(self, q, n, min_length=1, parity=0, sign=0, verbose=True):
+    def __init__(self, q, n, min_length=1, parity=0, sign=0, verbose=True,
+                 maximal=False):
         self._q = q
         self._n = n
         self._min_length = min_length
         self._parity = parity
         self._sign = sign
         self._verbose = verbose
-        self._stored = None
+        self._maximal = maximal
 
-    def _with_sign_generator(self):
+    def _with_sign_generator(self, leading=None):
         """Generates semisimple element with specified sign
         (for Linear and Unitary groups)
         """
-        q = self._q
         n = self._n
+        table = PowerTable(self._q, n)
         # [q^n_1 - 1, ..., q^n_k - 1] if sign = 1, else
         # [q^n_1 - sign^n_1, ..., q^n_k - sign^n_k]
         f = lambda nk: (-1 if (self._sign == 1 or nk % 2 == 0) else 1)
         #        f = ((lambda ni: -1) if self._sign == 1 else
         #             lambda ni: (-1 if nk % 2 == 0 else 1 for nk in ni))
-        for ni in BoundedSets(n):
+        codes = [0] + [table.term_code(k, f(k)) for k in range(1, n + 1)]
+        for ni, code in _bounded_sets(n, codes, leading=leading):
             if len(ni) + n - sum(ni) < self._min_length:
                 continue
-            yield SpectraElement(q=q, partition=ni, signs=list(map(f, ni)),
-                                 verbose=self._verbose)
+            yield table.element(ni, list(map(f, ni)), self._verbose, code)
 
-    def _with_parity_generator(self):
+    def _with_parity_generator(self, pluses_range=None):
         """Generates semisimple elements with even or odd number of pluses"""
-        q = self._q
         n = self._n
+        table = PowerTable(self._q, n)
+        plusCodes = [0] + [table.term_code(k, 1) for k in range(1, n + 1)]
+        minusCodes = [0] + [table.term_code(k, -1) for k in range(1, n + 1)]
         plusesMod = 0 if self._parity == 1 else 1
-        for pluses in range(plusesMod, n + 1):
-            plusPartitions = FullBoundedSets(pluses)
+        if pluses_range is None:
+            pluses_range = range(plusesMod, n + 1)
+        for pluses in pluses_range:
+            plusPartitions = FullBoundedSets(pluses, copy=False)
             if pluses > 0:
                 plusPartitions = itertools.chain(plusPartitions,
-                                                 (partition + [1] for partition in FullBoundedSets(pluses - 1)))
+                                                 (partition + [1] for partition in FullBoundedSets(pluses - 1, copy=False)))
             for plusPartition in plusPartitions:
                 minuses = n - pluses
                 if not len(plusPartition) % 2 == plusesMod:
                     continue
                 plusPart = plusPartition if pluses else []
-                for minusPartition in MaximalBoundedSets(minuses):
-                    rest = n - sum(plusPartition) - sum(minusPartition)
-                    if len(plusPartition) + len(
-                            minusPartition) + rest < self._min_length:
+                plusCode = 0
+                for k in plusPart:
+                    plusCode |= plusCodes[k]
+                for minusPart, minusCode in _bounded_sets(
+                        minuses, minusCodes, maximal=True):
+                    rest = n - sum(plusPart) - sum(minusPart)
+                    if len(plusPart) + len(
+                            minusPart) + rest < self._min_length:
                         continue
-                    minusPart = minusPartition if minuses else []
-                    yield SpectraElement(q=q,
-                                         partition=plusPart + minusPart,
-                                         signs=[1] * len(plusPart) + [-1] * len(minusPart),
-                                         verbose=self._verbose)
+                    code = plusCode | minusCode
+                    yield table.element(plusPart + minusPart,
+                                        [1] * len(plusPart) + [-1] * len(minusPart),
+                                        self._verbose, code)
 
-    def _general_generator(self):
+    def _general_generator(self, lefts=None):
         """Generates all semisimple elements"""
-        q = self._q
         n = self._n
-        for left in range((n + 2) // 2):
+        table = PowerTable(self._q, n)
+        minusCodes = [0] + [table.term_code(k, -1) for k in range(1, n + 1)]
+        sides = {}
+
+        def side(size):
+            # maximal sets with codes of their minus and plus terms
+            if size not in sides:
+                sides[size] = [
+                    (part, minusCode, table.code(part, [1] * len(part)))
+                    for part, minusCode in _bounded_sets(size, minusCodes,
+                                                         maximal=True)]
+            return sides[size]
+
+        if lefts is None:
+            lefts = range((n + 2) // 2)
+        for left in lefts:
             right = n - left
-            leftPartitions = MaximalBoundedSets(left)
-            for lPartition in leftPartitions:
-                lPart = lPartition if left else []
-                rightPartitions = MaximalBoundedSets(right)
-                for rPartition in rightPartitions:
-                    rest = n - sum(lPartition) - sum(rPartition)
-                    length = len(lPartition) + len(rPartition)
+            for lPart, lMinus, lPlus in side(left):
+                for rPart, rMinus, rPlus in side(right):
+                    rest = n - sum(lPart) - sum(rPart)
+                    length = len(lPart) + len(rPart)
                     if length + rest < self._min_length:
                         continue
-                    rPart = rPartition if right else []
-                    yield self._store_and_return(
-                        SpectraElement(q=q, partition=lPart + rPart, signs=[-1] * len(lPart) + [1] * len(rPart),
-                                       verbose=self._verbose))
-                    yield self._store_and_return(
-                        SpectraElement(q=q, partition=lPart + rPart,
-                                       signs=[1] * len(lPart) +
-                                             [-1] * len(rPart),
-                                       verbose=self._verbose))
+                    yield table.element(lPart + rPart, [-1] * len(lPart) + [1] * len(rPart),
+                                        self._verbose, lMinus | rPlus)
+                    yield table.element(lPart + rPart,
+                                        [1] * len(lPart) +
+                                        [-1] * len(rPart),
+                                        self._verbose, lPlus | rMinus)
 
     def __iter__(self):
-        if self._stored is not None:
-            return iter(self._stored)
+        key = self._cache_key(self._q, self._n, self._min_length,
+                              self._parity, self._sign, self._verbose,
+                              self._maximal)
+        stored = elements_cache.get(key) if _CACHE else None
+        if stored is not None:
+            return iter(stored)
+        if self._maximal:
+            generator = self._template().elements(self._q, self._verbose)
+        elif self._sign:
+            generator = self._with_sign_generator()
+        elif self._parity:
+            generator = self._with_parity_generator()
+        else:
+            generator = self._general_generator()
+        return self._store_when_done(key, generator)
+
+    def _template(self):
+        return SemisimpleTemplate(self._n, self._min_length, self._parity,
+                                  self._sign)
+
+    def split(self, parts):
+        """Splits generation into at most `parts' independent generators,
+        which together give the same elements in different order.
+        """
+        n = self._n
+        if self._maximal:
+            # template is built lazily by the first generator evaluated in
+            # the process, so pieces may be counted without building it
+            template = self._template()
+            return [template.elements(self._q, self._verbose, i, parts)
+                    for i in range(parts)]
         if self._sign:
-            return self._with_sign_generator()
+            return [self._with_sign_generator(range(n, 0, -1)[i::parts])
+                    for i in range(min(parts, n))]
         if self._parity:
-            return self._with_parity_generator()
-        return self._general_generator()
-
-    def _store_and_return(self, element):
-        if self._stored is None:
-            self._stored = []
-        self._stored.append(element)
-        return element
+            pluses = range(0 if self._parity == 1 else 1, n + 1)
+            return [self._with_parity_generator(pluses[i::parts])
+                    for i in range(min(parts, len(pluses)))]
+        lefts = range((n + 2) // 2)
+        return [self._general_generator(lefts[i::parts])
+                for i in range(min(parts, len(lefts)))]
+
+    @staticmethod
+    def _store_when_done(key, generator):
+        """Yields elements of generator and stores them in the shared cache
+        after it is exhausted, so that partially consumed iterations are never
+        stored.
+        """
+        stored = []
+        for element in generator:
+            stored.append(element)
+            yield element
+        if _CACHE:
+            elements_cache.put(key, tuple(stored))
 
 
 class MixedElements:
     """Generates elements of form g(k) * LCM(q^{n_1} \pm 1, ..., q^{n_s} \pm 1)
     for all k and partitions f(k) + n_1 + ... + n_s = n, where k, s > 0.
+    Arguments `min_length', `parity', `sign' and `maximal' are passed to
+    SemisimpleElements.
     """
 
-    def __init__(self, q, n, f, g, min_length=1, parity=0, sign=0):
+    def __init__(self, q, n, f, g, min_length=1, parity=0, sign=0,
+                 maximal=False):
         self._q = q
         self._n = n
         self._f = f
@@ -252,16 +791,29 @@ class MixedElements:
         self._min_length = min_length
         self._parity = parity
         self._sign = sign
+        self._maximal = maximal
 
 
     def __iter__(self):
+        return self._elements()
+
+    def split(self, parts):
+        """Splits generation into `parts' independent generators, the i-th of
+        which takes i-th parts of every SemisimpleElements.split().
+        """
+        return [self._elements(i, parts) for i in range(parts)]
+
+    def _elements(self, piece=0, pieces=1):
         k = 1
         while True:
             toPart = self._n - self._f(k)
             if toPart <= 0: break
-            for elem in SemisimpleElements(self._q, toPart,
-                                           min_length=self._min_length, parity=self._parity,
-                                           sign=self._sign):
+            elements = SemisimpleElements(self._q, toPart,
+                                          min_length=self._min_length, parity=self._parity,
+                                          sign=self._sign, maximal=self._maximal)
+            if pieces > 1:
+                generators = elements.split(pieces)
+                elements = generators[piece] if piece < len(generators) else ()
+            for elem in elements:
                 yield elem * self._g(k)
             k += 1
-
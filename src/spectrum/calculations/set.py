@@ -17,48 +17,110 @@ Copyright 2012 Daniel Lytkin.
 __author__ = 'Daniel Lytkin'
 
 
+def _leading_weights(bound):
+    """Returns list w, such that w[k] is the number of sets bounded by
+    `bound' with the greatest element k. Used to balance ranges of leading
+    elements.
+    """
+    # counts[s] is the number of sets with sum s of elements less than k
+    counts = [1] + [0] * bound
+    weights = [0] * (bound + 1)
+    for k in range(1, bound + 1):
+        weights[k] = sum(counts[:bound - k + 1])
+        for s in range(bound, k - 1, -1):
+            counts[s] += counts[s - k]
+    return weights
+
+
 class BoundedSets:
     """Generates integer sets {n_1,...,n_k}, such that n_1+...+n_k <= n.
+    Sets are generated in reversed lexicographical order, each one as a
+    decreasing list. Optional parameters:
+        max_leading, min_leading - bounds for the greatest element n_1, so
+        that enumeration can be split into disjoint ranges, see split()
+        copy - if False, the same list is yielded on each step and changed in
+        place afterwards
     """
 
     @staticmethod
-    def _next(sequence, bound, sum):
-        if sequence[0] <= 1:
-            return None, None
-
-        x = list(sequence)
+    def _step(x, bound, sum):
+        """Changes x to the next set in place and returns its sum, or None if
+        x is the last set.
+        """
+        if x[0] <= 1:
+            return None
         sum -= 1
         if x[-1] == 1: # if the last element is 1, remove it
             del x[-1]
         else:
             x[-1] -= 1
-            while True:
-                t = min(x[-1] - 1, bound - sum)
-                if not t: break
-                sum += t
-                x.append(t)
-        return x, sum
+            sum = BoundedSets._fill(x, bound, sum)
+        return sum
+
+    @staticmethod
+    def _fill(x, bound, sum):
+        """Greedily appends elements to x while the bound allows it.
+        """
+        while True:
+            t = min(x[-1] - 1, bound - sum)
+            if not t: break
+            sum += t
+            x.append(t)
+        return sum
 
     @classmethod
     def next(cls, sequence, bound):
         """Returns next bounded set after sequence in reversed lexicographical order
         """
-        return cls._next(sequence, bound, sum(sequence))[0]
-
+        x = list(sequence)
+        if cls._step(x, bound, sum(x)) is None:
+            return None
+        return x
 
-    def __init__(self, bound):
+    @classmethod
+    def split(cls, bound, parts):
+        """Splits enumeration into at most `parts' disjoint ranges of leading
+        elements with roughly equal numbers of sets. Returns list of
+        generators, which together give the same sets in the same order.
+        """
+        if bound <= 0:
+            return [cls(bound)]
+        weights = _leading_weights(bound)
+        total = sum(weights)
+        generators = []
+        max_leading, accumulated = bound, 0
+        for leading in range(bound, 0, -1):
+            accumulated += weights[leading]
+            if (accumulated * parts >= total * (len(generators) + 1) or
+                    leading == 1):
+                generators.append(cls(bound, max_leading, leading))
+                max_leading = leading - 1
+        return generators
+
+    def __init__(self, bound, max_leading=None, min_leading=1, copy=True):
         self._bound = bound
-        self._next = BoundedSets._next
+        self._max_leading = bound if max_leading is None else min(
+            max_leading, bound)
+        self._min_leading = max(min_leading, 1)
+        self._copy = copy
+
+    def _first(self):
+        """Returns the first set in the range and its sum.
+        """
+        x = [self._max_leading]
+        return x, BoundedSets._fill(x, self._bound, self._max_leading)
 
     def __iter__(self):
-        if self._bound:
-            current = [self._bound]
-            sum = self._bound
-            while current is not None:
-                yield current
-                current, sum = type(self)._next(current, self._bound, sum)
-        else:
+        if not self._bound:
             yield []
+            return
+        if self._max_leading < self._min_leading:
+            return
+        bound, step = self._bound, type(self)._step
+        current, sum = self._first()
+        while sum is not None and current[0] >= self._min_leading:
+            yield list(current) if self._copy else current
+            sum = step(current, bound, sum)
 
 
 class MaximalBoundedSets(BoundedSets):
@@ -66,29 +128,28 @@ class MaximalBoundedSets(BoundedSets):
     """
 
     @staticmethod
-    def _next(sequence, bound, sum):
-        if sequence[0] <= 1:
-            return None, None
-
-        x = list(sequence)
-        try:
-            i = 1
-            while x[
-                  -1] == i: # if tail is [N, i, i-1, i-2, ..., 1], remove it ant set to [N-1]
-                i += 1
-                sum -= x[-1]
-                del x[-1]
-        except IndexError:
-            # if we're here then our sequence is [i, i-1, i-2, ..., 1], thus it is the last possible maximal set
-            return None, None
+    def _step(x, bound, sum):
+        if x[0] <= 1:
+            return None
+
+        i = 1
+        while x[-1] == i: # if tail is [N, i, i-1, i-2, ..., 1], remove it ant set to [N-1]
+            i += 1
+            sum -= x[-1]
+            del x[-1]
+            if not x:
+                # our sequence was [i, i-1, i-2, ..., 1], thus it is the last possible maximal set
+                return None
 
         x[-1] -= 1
-        sum -= 1
-        while True:
-            t = min(x[-1] - 1, bound - sum)
-            if not t: break
-            sum += t
-            x.append(t)
+        return BoundedSets._fill(x, bound, sum - 1)
+
+    def _first(self):
+        x, sum = BoundedSets._first(self)
+        # if x is [N, N-1, ..., 1] and some greater element may be added,
+        # there are no maximal sets in the range
+        if self._bound - sum > x[0]:
+            sum = None
         return x, sum
 
 
@@ -97,9 +158,14 @@ class FullBoundedSets(BoundedSets):
     """
 
     @staticmethod
-    def _next(sequence, bound, sum):
-        x = sequence
+    def _step(x, bound, sum):
         while True:
-            x, sum = MaximalBoundedSets._next(x, bound, sum)
-            if sum == bound or x is None: break
+            sum = MaximalBoundedSets._step(x, bound, sum)
+            if sum == bound or sum is None: break
+        return sum
+
+    def _first(self):
+        x, sum = BoundedSets._first(self)
+        if sum != self._bound:
+            sum = self._step(x, self._bound, sum)
         return x, sum
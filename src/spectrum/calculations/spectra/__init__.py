@@ -15,7 +15,9 @@ Copyright 2012 Daniel Lytkin.
 
 """
 
-from .classical import classical_spectra
+from .alternating import alternating_spectra, symmetric_spectra
+from .classical import (classical_spectra, parallel_classical_spectra,
+                        parallel_classical_spectra_steps)
 from .exceptional import exceptional_spectra
 from .sporadic import sporadic_spectra
 
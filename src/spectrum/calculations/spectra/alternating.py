@@ -0,0 +1,103 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+from spectrum.calculations.primes import primes_less_than
+
+__author__ = 'Daniel Lytkin'
+
+# Element of order m = p1^a1...pk^ak of minimal degree is a product of
+# cycles of lengths pi^ai, so it lies in Sym(n) iff the sum S(m) of these
+# prime powers is at most n. Even permutations need even number of cycles
+# of even length, so if m is even, additional transposition is required,
+# and m is an element order of Alt(n) iff S(m) + 2 <= n.
+# In both cases the set of element orders is closed under taking divisors,
+# so m is maximal iff m*p is not an element order for any prime p.
+
+
+def _cost(p, alternating):
+    """Returns degree needed to add prime p to an odd order.
+    """
+    return p + 2 if alternating and p == 2 else p
+
+
+def _maximal_orders(n, alternating):
+    """Returns list of maximal element orders of Alt(n) or Sym(n).
+    Orders are built by choosing exponents of primes in increasing order;
+    `budget' is the degree left for the remaining primes, and `bound' is
+    the least degree needed to increase the order by any of chosen or
+    skipped primes, so that the order is maximal iff the final budget is
+    less than `bound'.
+    """
+    primes = primes_less_than(n + 1)
+    orders = []
+
+    def choose(i, budget, order, bound):
+        if i == len(primes) or primes[i] > budget:
+            if budget < bound:
+                orders.append(order)
+            return
+        p = primes[i]
+        cost = _cost(p, alternating)
+        choose(i + 1, budget, order, min(bound, cost))
+        power = p
+        while cost <= budget:
+            increment = power * (p - 1)
+            choose(i + 1, budget - cost, order * power, min(bound, increment))
+            cost += increment
+            power *= p
+
+    choose(0, n, 1, n + 1)
+    orders.sort()
+    return orders
+
+
+def max_order(n, alternating=False):
+    """Returns maximal element order of Sym(n), i.e. Landau's function, or of
+    Alt(n) if `alternating' is True. Computed by knapsack-like dynamic
+    programming over primes not exceeding n.
+    """
+    # best[d] is the maximal order of odd degree at most d, without 2 if
+    # alternating
+    best = [1] * (n + 1)
+    for p in primes_less_than(n + 1):
+        if alternating and p == 2:
+            continue
+        for degree in range(n, p - 1, -1):
+            power = p
+            while power <= degree:
+                best[degree] = max(best[degree],
+                                   best[degree - power] * power)
+                power *= p
+    if not alternating:
+        return best[n]
+    result = best[n]
+    power = 2
+    while power + 2 <= n:
+        result = max(result, best[n - power - 2] * power)
+        power *= 2
+    return result
+
+
+def alternating_spectra(n):
+    """Returns apex of alternating group of degree n in increasing order.
+    """
+    return _maximal_orders(n, True)
+
+
+def symmetric_spectra(n):
+    """Returns apex of symmetric group of degree n in increasing order.
+    """
+    return _maximal_orders(n, False)
@@ -22,9 +22,11 @@ Copyright 2012 Daniel Lytkin.
    limitations under the License.
 
 """
+import concurrent.futures
 import itertools
+import os
 import typing
-from typing import Iterable
+from typing import Iterable, List
 
 if typing.TYPE_CHECKING:
     from spectrum.calculations.groups import Field
@@ -33,11 +35,44 @@ from spectrum.calculations import numeric
 from spectrum.calculations.numeric import gcd, lcm
 from spectrum.calculations.semisimple import MixedElements, SemisimpleElements, SpectraElement
 from spectrum.calculations.set import FullBoundedSets
+from spectrum.tools import tasks
 
 
 __author__ = 'Daniel Lytkin'
 
 
+class _Components:
+    """Spectrum given as independent components, which are iterables of
+    numbers. Iteration goes through all components in order, but they may
+    also be evaluated separately, see parallel_classical_spectra().
+    """
+
+    def __init__(self, *parts):
+        self.parts = parts
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(self.parts)
+
+
+class _Transformed:
+    """Component consisting of numbers `transform(elem)' (which is a list)
+    for all elements of given SemisimpleElements, in the same order. It is
+    split along with the elements.
+    """
+
+    def __init__(self, elements, transform):
+        self._elements = elements
+        self._transform = transform
+
+    def __iter__(self):
+        return itertools.chain.from_iterable(
+            map(self._transform, self._elements))
+
+    def split(self, parts):
+        return [itertools.chain.from_iterable(map(self._transform, piece))
+                for piece in self._elements.split(parts)]
+
+
 def _symplectic_spectrum_odd_c(n: int, field: 'Field') -> Iterable[int]:
     """Spectra of symplectic groups in odd characteristic.
     [1, Corollary 1]
@@ -47,17 +82,17 @@ def _symplectic_spectrum_odd_c(n: int, field: 'Field') -> Iterable[int]:
     p = field.char
 
     # (1)
-    a1 = SemisimpleElements(q, n)
+    a1 = SemisimpleElements(q, n, maximal=True)
 
     # (2)
     a2 = MixedElements(q, n,
                        lambda k: (p ** (k - 1) + 1) // 2,
-                       lambda k: p ** k)
+                       lambda k: p ** k, maximal=True)
 
     # (3)
     k = numeric.get_exponent(2 * n - 1, p)
     a3 = [] if k is None else [2 * p * (2 * n - 1)]
-    return itertools.chain(a1, a2, a3)
+    return _Components(a1, a2, a3)
 
 
 def _symplectic_spectrum_even_c(n: int, field: 'Field') -> Iterable[int]:
@@ -68,20 +103,21 @@ def _symplectic_spectrum_even_c(n: int, field: 'Field') -> Iterable[int]:
     q = field.order
 
     # (1)
-    a1 = SemisimpleElements(q, n)
+    a1 = SemisimpleElements(q, n, maximal=True)
 
     # (2)
-    a2 = (2 * elem for elem in SemisimpleElements(q, n - 1))
+    a2 = _Transformed(SemisimpleElements(q, n - 1, maximal=True),
+                      lambda elem: [2 * elem])
 
     # (3)
     a3 = MixedElements(q, n,
                        lambda k: 2 ** (k - 1) + 1,
-                       lambda k: 2 ** (k + 1))
+                       lambda k: 2 ** (k + 1), maximal=True)
 
     # (4)
     k = numeric.get_exponent(n - 1, 2)
     a4 = [] if k is None else [(n - 1) * 4]
-    return itertools.chain(a1, a2, a3, a4)
+    return _Components(a1, a2, a3, a4)
 
 
 def _symplectic_spectrum(n: int, field: 'Field') -> Iterable[int]:
@@ -106,16 +142,16 @@ def _projective_symplectic_spectrum_odd_c(n: int, field: 'Field') -> Iterable[in
     a1 = [t, t + 1]
 
     # (2)
-    a2 = SemisimpleElements(q, n, min_length=2)
+    a2 = SemisimpleElements(q, n, min_length=2, maximal=True)
 
     # (3)
     a3 = MixedElements(q, n, lambda k: (p ** (k - 1) + 1) // 2,
-                       lambda k: p ** k)
+                       lambda k: p ** k, maximal=True)
 
     # (4)
     k = numeric.get_exponent(2 * n - 1, p)
     a4 = [] if k is None else [p * (2 * n - 1)]
-    return itertools.chain(a1, a2, a3, a4)
+    return _Components(a1, a2, a3, a4)
 
 
 def _projective_symplectic_spectrum(n: int, field: 'Field') -> Iterable[int]:
@@ -141,7 +177,7 @@ def _omega_spectrum_odd_c(n: int, field: 'Field') -> Iterable[int]:
     a1 = [t, t + 1]
 
     # (2)
-    a2 = SemisimpleElements(q, n, min_length=2)
+    a2 = SemisimpleElements(q, n, min_length=2, maximal=True)
 
     # (3)
     k = 1
@@ -157,12 +193,12 @@ def _omega_spectrum_odd_c(n: int, field: 'Field') -> Iterable[int]:
     # (4)
     a4 = MixedElements(q, n,
                        lambda k: (p ** (k - 1) + 1) // 2,
-                       lambda k: p ** k, min_length=2)
+                       lambda k: p ** k, min_length=2, maximal=True)
 
     # (5)
     k = numeric.get_exponent(2 * n - 1, p)
     a5 = [] if k is None else [p * (2 * n - 1)]
-    return itertools.chain(a1, a2, a3, a4, a5)
+    return _Components(a1, a2, a3, a4, a5)
 
 
 def _omega_spectrum(n: int, field: 'Field') -> Iterable[int]:
@@ -193,7 +229,7 @@ def _omega_pm_spectrum_odd_c(n: int, field: 'Field', sign: int) -> Iterable[int]
     a1 = [(q ** n - sign) // 2]
 
     # (2)
-    a2 = SemisimpleElements(q, n, min_length=2, parity=sign)
+    a2 = SemisimpleElements(q, n, min_length=2, parity=sign, maximal=True)
 
     # (3)
     a3 = []
@@ -214,13 +250,14 @@ def _omega_pm_spectrum_odd_c(n: int, field: 'Field', sign: int) -> Iterable[int]
         k += 1
 
     # (4)
-    a4 = MixedElements(q, n, nk, lambda k: p ** k, min_length=2)
+    a4 = MixedElements(q, n, nk, lambda k: p ** k, min_length=2,
+                       maximal=True)
 
     # (5)
-    a5 = []
-    for elem in SemisimpleElements(q, n - 2, min_length=2, parity=sign):
-        a5.append(elem.lcm(SpectraElement(p, q, [1], [-1])))
-        a5.append(elem.lcm(SpectraElement(p, q, [1], [1])))
+    a5 = _Transformed(
+        SemisimpleElements(q, n - 2, min_length=2, parity=sign, maximal=True),
+        lambda elem: [elem.lcm(SpectraElement(p, q, [1], [e]))
+                      for e in (-1, 1)])
 
     # (6)
     t = (q ** (n - 2) - sign) // 2
@@ -235,7 +272,7 @@ def _omega_pm_spectrum_odd_c(n: int, field: 'Field', sign: int) -> Iterable[int]
 
     # (9)
     a9 = [9 * (q - 1), 9 * (q + 1)] if n == 4 and p == 3 and sign == 1 else []
-    return itertools.chain(a1, a2, a3, a4, a5, a6, a7, a8, a9)
+    return _Components(a1, a2, a3, a4, a5, a6, a7, a8, a9)
 
 
 def _omega_pm_spectrum_even_c(n: int, field: 'Field', sign: int) -> Iterable[int]:
@@ -246,21 +283,21 @@ def _omega_pm_spectrum_even_c(n: int, field: 'Field', sign: int) -> Iterable[int
     q = field.order
 
     # (1)
-    a1 = SemisimpleElements(q, n, parity=sign)
+    a1 = SemisimpleElements(q, n, parity=sign, maximal=True)
 
     # (2)
     a2 = MixedElements(q, n,
                        lambda k: 2 ** (k - 1) + 2,
-                       lambda k: 2 ** (k + 1))
+                       lambda k: 2 ** (k + 1), maximal=True)
 
     # (3)
-    a3 = (2 * elem for elem in SemisimpleElements(q, n - 2))
+    a3 = _Transformed(SemisimpleElements(q, n - 2, maximal=True),
+                      lambda elem: [2 * elem])
 
     # (4)
-    a4 = []
-    for elem in SemisimpleElements(q, n - 2, parity=sign):
-        a4.append(2 * lcm(q - 1, elem))
-        a4.append(2 * lcm(q + 1, elem))
+    a4 = _Transformed(
+        SemisimpleElements(q, n - 2, parity=sign, maximal=True),
+        lambda elem: [2 * lcm(q + e, elem) for e in (-1, 1)])
 
     # (5)
     a5 = []
@@ -272,12 +309,14 @@ def _omega_pm_spectrum_even_c(n: int, field: 'Field', sign: int) -> Iterable[int
                                      signs=[-1] + [1] * len(ni)))
 
     # (6)
-    a6 = (elem.lcm(SpectraElement(4, q, [1], [1])) for elem in SemisimpleElements(q, n - 3, parity=-sign))
+    a6 = _Transformed(
+        SemisimpleElements(q, n - 3, parity=-sign, maximal=True),
+        lambda elem: [elem.lcm(SpectraElement(4, q, [1], [1]))])
 
     # (7)
     k = numeric.get_exponent(n - 2, 2)
     a7 = [] if k is None else [4 * (n - 2)]
-    return itertools.chain(a1, a2, a3, a4, a5, a6, a7)
+    return _Components(a1, a2, a3, a4, a5, a6, a7)
 
 
 def _equal_two_part(a, b):
@@ -318,7 +357,7 @@ def _projective_omega_pm_spectrum(sign: int):
                 a2.append(lcm(a, b) // d)
 
         # (3)
-        a3 = SemisimpleElements(q, n, min_length=3, parity=sign)
+        a3 = SemisimpleElements(q, n, min_length=3, parity=sign, maximal=True)
 
         # (4)
         a4 = []
@@ -332,13 +371,15 @@ def _projective_omega_pm_spectrum(sign: int):
             k += 1
 
         # (5)
-        a5 = MixedElements(q, n, nk, lambda k: p ** k, min_length=2)
+        a5 = MixedElements(q, n, nk, lambda k: p ** k, min_length=2,
+                           maximal=True)
 
         # (6)
-        a6 = []
-        for elem in SemisimpleElements(q, n - 2, min_length=2, parity=sign):
-            a6.append(elem.lcm(SpectraElement(p, q, [1], [-1])))
-            a6.append(elem.lcm(SpectraElement(p, q, [1], [1])))
+        a6 = _Transformed(
+            SemisimpleElements(q, n - 2, min_length=2, parity=sign,
+                               maximal=True),
+            lambda elem: [elem.lcm(SpectraElement(p, q, [1], [e1]))
+                          for e1 in (-1, 1)])
 
         # (7)
         t = (q ** (n - 2) - sign) // 2
@@ -347,7 +388,7 @@ def _projective_omega_pm_spectrum(sign: int):
         # (8)
         k = numeric.get_exponent(2 * n - 3, p)
         a8 = [] if k is None else [p * (2 * n - 3)]
-        return itertools.chain(a1, a2, a3, a4, a5, a6, a7, a8)
+        return _Components(a1, a2, a3, a4, a5, a6, a7, a8)
 
     return spectrum
 
@@ -373,17 +414,17 @@ def _special_orthogonal_odd_c_spectrum(n: int, field: 'Field') -> Iterable[int]:
     p = field.char
 
     # (1)
-    a1 = SemisimpleElements(q, n)
+    a1 = SemisimpleElements(q, n, maximal=True)
 
     # (2)
     a2 = MixedElements(q, n,
                        lambda k: (p ** (k - 1) + 1) // 2,
-                       lambda k: p ** k)
+                       lambda k: p ** k, maximal=True)
 
     # (3)
     k = numeric.get_exponent(2 * n - 1, p)
     a3 = [] if k is None else [p * (2 * n - 1)]
-    return itertools.chain(a1, a2, a3)
+    return _Components(a1, a2, a3)
 
 
 def _special_orthogonal_pm_spectrum(sign: int):
@@ -398,23 +439,23 @@ def _special_orthogonal_pm_spectrum(sign: int):
         p = field.char
 
         # (1)
-        a1 = SemisimpleElements(q, n, parity=e)
+        a1 = SemisimpleElements(q, n, parity=e, maximal=True)
 
         # (2)
         a2 = MixedElements(q, n,
                            lambda k: (p ** (k - 1) + 3) // 2,
-                           lambda k: p ** k)
+                           lambda k: p ** k, maximal=True)
 
         # (3)
-        a3 = []
-        for elem in SemisimpleElements(q, n - 2, parity=e):
-            a3.append(elem.lcm(SpectraElement(p, q, [1], [-1])))
-            a3.append(elem.lcm(SpectraElement(p, q, [1], [1])))
+        a3 = _Transformed(
+            SemisimpleElements(q, n - 2, parity=e, maximal=True),
+            lambda elem: [elem.lcm(SpectraElement(p, q, [1], [e1]))
+                          for e1 in (-1, 1)])
 
         # (4)
         k = numeric.get_exponent(2 * n - 3, p)
         a4 = [] if k is None else [2 * p * (2 * n - 3)]
-        return itertools.chain(a1, a2, a3, a4)
+        return _Components(a1, a2, a3, a4)
 
     return spectrum
 
@@ -435,17 +476,18 @@ def _projective_general_linear_spectrum(sign: int):
         a1 = [(q ** n - eps) // (q - e)]
 
         # (2)
-        a2 = SemisimpleElements(q, n, min_length=2, sign=e)
+        a2 = SemisimpleElements(q, n, min_length=2, sign=e, maximal=True)
 
         # (3)
         a3 = MixedElements(q, n,
                            lambda k: p ** (k - 1) + 1,
-                           lambda k: p ** k, sign=e)
+                           lambda k: p ** k, sign=e,
+                           maximal=True)
 
         # (4)
         k = numeric.get_exponent(n - 1, p)
         a4 = [] if k is None else [p * (n - 1)]
-        return itertools.chain(a1, a2, a3, a4)
+        return _Components(a1, a2, a3, a4)
 
     return spectrum
 
@@ -465,7 +507,7 @@ def _special_linear_spectrum(sign: int):
         a1 = [(q ** n - eps) // (q - e)]
 
         # (2)
-        a2 = SemisimpleElements(q, n, min_length=2, sign=e)
+        a2 = SemisimpleElements(q, n, min_length=2, sign=e, maximal=True)
 
         # (3)
         a3 = []
@@ -482,7 +524,8 @@ def _special_linear_spectrum(sign: int):
         # (4)
         a4 = MixedElements(q, n,
                            lambda k: p ** (k - 1) + 1,
-                           lambda k: p ** k, min_length=2, sign=e)
+                           lambda k: p ** k, min_length=2, sign=e,
+                           maximal=True)
 
         # (5)
         k = numeric.get_exponent(n - 1, p)
@@ -490,7 +533,7 @@ def _special_linear_spectrum(sign: int):
 
         # (6)
         a6 = [p * gcd(2, q - 1) * (q + e)] if n == 4 else []
-        return itertools.chain(a1, a2, a3, a4, a5, a6)
+        return _Components(a1, a2, a3, a4, a5, a6)
 
     return spectrum
 
@@ -520,7 +563,7 @@ def _projective_special_linear_spectrum(sign: int):
                       gcd(n // gcd(n1, n - n1), q - e))
 
         # (3)
-        a3 = SemisimpleElements(q, n, min_length=3, sign=e)
+        a3 = SemisimpleElements(q, n, min_length=3, sign=e, maximal=True)
 
         # (4)
         a4 = []
@@ -536,12 +579,13 @@ def _projective_special_linear_spectrum(sign: int):
         # (5)
         a5 = MixedElements(q, n,
                            lambda k: p ** (k - 1) + 1,
-                           lambda k: p ** k, min_length=2, sign=e)
+                           lambda k: p ** k, min_length=2, sign=e,
+                           maximal=True)
 
         # (6)
         k = numeric.get_exponent(n - 1, p)
         a6 = [] if k is None else [p * (n - 1)]
-        return itertools.chain(a1, a2, a3, a4, a5, a6)
+        return _Components(a1, a2, a3, a4, a5, a6)
 
     return spectrum
 
@@ -564,3 +608,74 @@ classical_spectra = {
     'PSL': _projective_special_linear_spectrum(1),
     'PSU': _projective_special_linear_spectrum(-1),
 }
+
+
+def _pieces(part, pieces):
+    """Returns generators splitting the component, or None if it is a list
+    or tuple, which is cheaper to evaluate in current process. Components
+    which can not be split give a single generator.
+    """
+    if isinstance(part, (list, tuple)):
+        return None
+    split = getattr(part, 'split', None)
+    if split is None or pieces <= 1:
+        return [part]
+    return split(pieces)
+
+
+def _component_maxima(name, dimension, field, index, piece, pieces):
+    """Returns maximal elements of the piece of the component of spectrum.
+    Spectrum is built again by the worker, so that only arguments and
+    results are passed between processes.
+    """
+    part = classical_spectra[name](dimension, field).parts[index]
+    return numeric.maximal_elements(_pieces(part, pieces)[piece])
+
+
+def parallel_classical_spectra(name: str, dimension: int, field: 'Field',
+                               executor, pieces: int = None) -> List[int]:
+    """Returns maximal elements of spectrum of classical group, evaluating its
+    components in `executor' (e.g. concurrent.futures.ProcessPoolExecutor).
+    Large components are split into `pieces' parts, which defaults to the
+    number of processors. Small components are evaluated in current process.
+    """
+    return tasks.complete(parallel_classical_spectra_steps(
+        name, dimension, field, executor, pieces))
+
+
+def parallel_classical_spectra_steps(name: str, dimension: int,
+                                     field: 'Field', executor,
+                                     pieces: int = None,
+                                     interval: float = 0.1):
+    """Generator version of parallel_classical_spectra, which yields None
+    at least every `interval' seconds while waiting for the executor, so that
+    calculation may be interrupted. Pending pieces are cancelled if the
+    generator is closed. Returns the list.
+    """
+    if pieces is None:
+        pieces = os.cpu_count() or 1
+    components = classical_spectra[name](dimension, field)
+    local = []
+    futures = []
+    try:
+        for index, part in enumerate(components.parts):
+            generators = _pieces(part, pieces)
+            if generators is None:
+                local.append(part)
+                continue
+            futures.extend(
+                executor.submit(_component_maxima, name, dimension, field,
+                                index, piece, pieces)
+                for piece in range(len(generators)))
+        values = list(itertools.chain.from_iterable(local))
+        for future in futures:
+            while not concurrent.futures.wait([future], interval).done:
+                yield
+            values.extend(future.result())
+    finally:
+        for future in futures:
+            future.cancel()
+    # partial maxima are sorted all at once, so that the merge adds them in
+    # decreasing order
+    return (yield from numeric.maximal_elements_steps(
+        values, chunk_size=len(values) or 1))
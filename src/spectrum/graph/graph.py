@@ -14,6 +14,8 @@ Copyright 2012 Daniel Lytkin.
    limitations under the License.
 
 """
+import time
+
 __author__ = 'Daniel Lytkin'
 
 
@@ -25,35 +27,65 @@ def ordered_pair(a, b):
     return a, b
 
 
+def bits(mask):
+    """Yields indices of set bits of non-negative integer in increasing order.
+    """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
 class Graph:
     """Class representing graph. Vertices are indexed by numbers 0, 1, ...
     Values are stored in 'vertices' array.
+    Adjacency is stored as a list of integer bitmasks: i-th bit of
+    _adjacency[j] is set iff vertices i and j are adjacent.
     """
 
     def __init__(self, vertices=None):
         if vertices is None:
             vertices = []
         self._vertices = []
+        self._indices = {}
         self._adjacency = []
         for vertex in set(vertices):
             self._add_no_check(vertex)
 
-    def _add_no_check(self, vertex):
-        self._adjacency.append([False] * len(self._adjacency))
+    def _add_no_check(self, vertex, mask=0):
+        self._indices[vertex] = len(self._vertices)
+        self._adjacency.append(mask)
         self._vertices.append(vertex)
 
+    def _set_vertex(self, index, value):
+        """Replaces value of vertex with given index.
+        """
+        del self._indices[self._vertices[index]]
+        self._vertices[index] = value
+        self._indices[value] = index
+
     def index(self, vertex):
         """Returns the index of vertex with given value. If there is no such
         vertex, returns None
         """
-        try:
-            return self._vertices.index(vertex)
-        except ValueError:
-            return None
+        return self._indices.get(vertex)
 
     def _set_adjacency(self, index1, index2, value):
-        index1, index2 = ordered_pair(index1, index2)
-        self._adjacency[index2][index1] = value
+        if value:
+            self._adjacency[index1] |= 1 << index2
+            self._adjacency[index2] |= 1 << index1
+        else:
+            self._adjacency[index1] &= ~(1 << index2)
+            self._adjacency[index2] &= ~(1 << index1)
+
+    def _connect(self, index, mask):
+        """Connects vertex with given index with all vertices from bitmask.
+        """
+        mask &= ~(1 << index)
+        self._adjacency[index] |= mask
+        bit = 1 << index
+        for i in bits(mask):
+            self._adjacency[i] |= bit
 
     @property
     def vertices(self):
@@ -66,11 +98,9 @@ class Graph:
         """Returns list o graph's edges.
         """
         edges = list()
-        for i in range(len(self._adjacency)):
-            for j in range(len(self._adjacency[i])):
-                if self._adjacency[i][j]:
-                    edges.append(
-                        ordered_pair(self._vertices[i], self._vertices[j]))
+        for i, mask in enumerate(self._adjacency):
+            for j in bits(mask & ((1 << i) - 1)):
+                edges.append(ordered_pair(self._vertices[i], self._vertices[j]))
         edges.sort()
         return edges
 
@@ -98,14 +128,8 @@ class Graph:
     def add_edge(self, v1, v2):
         """Add new edge to graph. Adds missing vertices if necessary
         """
-        i1 = self.index(v1)
-        i2 = self.index(v2)
-        if i1 is None:
-            self._add_no_check(v1)
-            i1 = len(self._vertices) - 1
-        if i2 is None:
-            self._add_no_check(v2)
-            i2 = len(self._vertices) - 1
+        i1 = self._add_vertex(v1)
+        i2 = self._add_vertex(v2)
         self._set_adjacency(i1, i2, True)
 
     def add_edges(self, edges):
@@ -117,14 +141,12 @@ class Graph:
     def neighbors(self, index):
         """Returns indices of neighbors of vertex with specified index.
         """
-        neighbors = []
-        for i in range(index):
-            if self._adjacency[index][i]:
-                neighbors.append(i)
-        for j in range(index + 1, len(self._adjacency)):
-            if self._adjacency[j][index]:
-                neighbors.append(j)
-        return neighbors
+        return list(bits(self._adjacency[index]))
+
+    def neighbors_mask(self, index):
+        """Returns bitmask of neighbors of vertex with specified index.
+        """
+        return self._adjacency[index]
 
     def clone_vertex(self, index, value):
         """Add new vertex 'value' with same neighbors as given, and connect to
@@ -133,26 +155,19 @@ class Graph:
 
         """
         # adjacency of new vertex with all other vertices:
-        new_row = (list(self._adjacency[index]) +
-                  [True] +
-                  [self._adjacency[j][index]
-                   for j in range(index + 1, len(self._adjacency))])
+        new_mask = self._adjacency[index] | (1 << index)
         v_index = self.index(value)
         if v_index is None:
-            self._adjacency.append(new_row)
-            self._vertices.append(value)
-            return len(self._adjacency) - 1
-        else:
-            for i in range(len(self._adjacency)):
-                if i != v_index and new_row[i]:
-                    self._set_adjacency(v_index, i, True)
+            v_index = len(self._vertices)
+            self._add_no_check(value)
+        self._connect(v_index, new_mask)
+        return v_index
 
     def adjacent(self, index1, index2):
         """Returns true iff vertices with indices index1 and index2 are
         adjacent
         """
-        index1, index2 = ordered_pair(index1, index2)
-        return self._adjacency[index2][index1]
+        return bool(self._adjacency[index1] >> index2 & 1)
 
     def as_sparse_graph(self):
         """Returns pair <vertices>, <edges> for this graph
@@ -161,51 +176,140 @@ class Graph:
         vertices.sort()
         return vertices, self.edges
 
-    def _max_cocliques_between_indices(self, indices):
-        """Searches for largest cocliques among vertices with specified indices
-        """
-        if sum(1 for _ in indices) == 1:
-            return [list(indices)]
-
-        limit = 0
-        cocliques = [[]]
-        len_indices = sum(1 for _ in indices)
-
-        for j in range(len_indices - limit - 1):
-            i = indices[j]
-            # candidates for the next vertex in coclique:
-            t = [x for x in indices if (x > i and not self._adjacency[x][i])]
-            len_t = sum(1 for _ in t)
-            if len_t < limit:
-                continue
-            next_cocliques = self._max_cocliques_between_indices(t)
-            for coclique in next_cocliques:
-                if len(coclique) < limit:
-                    continue
-                if len(coclique) > limit:
-                    # found larger coclique, delete old ones
-                    cocliques = []
-                    limit = len(coclique)
-                coclique.insert(0, i)
-                cocliques.append(coclique)
-
-        return cocliques
-
-    def max_cocliques(self):
-        """Returns set of cocliques of maximal size (slow)
-        """
-        # TODO: iterator-based version?
-        cocliquesIndices = self._max_cocliques_between_indices(
-            list(range(len(self._adjacency))))
+    def _complement_masks(self):
+        full = (1 << len(self._adjacency)) - 1
+        return [full & ~mask & ~(1 << i)
+                for i, mask in enumerate(self._adjacency)]
+
+    def iter_max_cocliques(self, time_budget=None):
+        """Lazily yields cocliques of maximal size as lists of vertices.
+        Cliques of the complement graph are searched by branch and bound,
+        with bitset candidate sets and greedy coloring upper bounds. Maximal
+        size is found first, then all cocliques of that size are enumerated.
+        If `time_budget' (in seconds) is exceeded, the search stops and
+        cocliques of the largest size found so far are yielded, which may be
+        not maximal.
+        """
+        search = _CocliqueSearch(self._complement_masks(), time_budget)
+        for coclique in search:
+            yield [self._vertices[i] for i in coclique]
+
+    def max_cocliques(self, time_budget=None):
+        """Returns set of cocliques of maximal size. See iter_max_cocliques()
+        """
+        search = _CocliqueSearch(self._complement_masks(), time_budget)
+        cocliques = sorted(search)
         return [[self._vertices[i] for i in coclique]
-                for coclique in cocliquesIndices]
+                for coclique in cocliques]
+
+
+class _SearchTimeout(Exception):
+    pass
+
+
+class _CocliqueSearch:
+    """Search of maximum cliques in graph given by list of adjacency bitmasks
+    (complement of the graph we search cocliques in). Iterating over it
+    yields sorted lists of vertex indices.
+    """
+
+    def __init__(self, adjacency, time_budget=None):
+        self._adjacency = adjacency
+        self._deadline = (None if time_budget is None
+                          else time.monotonic() + time_budget)
+        self._best = []
+
+    def _check_time(self):
+        # the first descent always finishes, so some coclique is found
+        if (self._deadline is not None and self._best and
+                time.monotonic() > self._deadline):
+            raise _SearchTimeout()
+
+    def _color_sort(self, candidates):
+        """Greedy coloring of candidates. Returns list of vertices and list of
+        colors, non-decreasing. Number of colors used for the first i+1
+        vertices bounds size of clique among them.
+        """
+        adjacency = self._adjacency
+        order, colors = [], []
+        color = 0
+        uncolored = candidates
+        while uncolored:
+            color += 1
+            available = uncolored
+            while available:
+                low = available & -available
+                v = low.bit_length() - 1
+                available &= ~adjacency[v] & ~low
+                uncolored &= ~low
+                order.append(v)
+                colors.append(color)
+        return order, colors
+
+    def _expand(self, clique, candidates):
+        """Branch and bound search of a clique larger than the best one.
+        """
+        self._check_time()
+        order, colors = self._color_sort(candidates)
+        for i in range(len(order) - 1, -1, -1):
+            if len(clique) + colors[i] <= len(self._best):
+                return
+            v = order[i]
+            clique.append(v)
+            new_candidates = candidates & self._adjacency[v]
+            if new_candidates:
+                self._expand(clique, new_candidates)
+            elif len(clique) > len(self._best):
+                self._best = list(clique)
+            clique.pop()
+            candidates &= ~(1 << v)
+
+    def _enumerate(self, clique, candidates, size):
+        """Yields all cliques of given size, which must be maximal, pruning
+        branches by the same coloring bound.
+        """
+        self._check_time()
+        order, colors = self._color_sort(candidates)
+        for i in range(len(order) - 1, -1, -1):
+            if len(clique) + colors[i] < size:
+                return
+            v = order[i]
+            clique.append(v)
+            new_candidates = candidates & self._adjacency[v]
+            if new_candidates:
+                yield from self._enumerate(clique, new_candidates, size)
+            elif len(clique) == size:
+                yield sorted(clique)
+            clique.pop()
+            candidates &= ~(1 << v)
+
+    def __iter__(self):
+        n = len(self._adjacency)
+        if not n:
+            # the only maximal clique of empty graph is empty
+            yield []
+            return
+        try:
+            self._expand([], (1 << n) - 1)
+        except _SearchTimeout:
+            if self._best:
+                yield sorted(self._best)
+            return
+        found = False
+        try:
+            for clique in self._enumerate([], (1 << n) - 1, len(self._best)):
+                found = True
+                yield clique
+        except _SearchTimeout:
+            if not found:
+                yield sorted(self._best)
 
 
 def full_graph(n):
     """Creates full graph on n vertices
     """
     g = Graph()
+    full_mask = (1 << n) - 1
     for i in range(n):
-        g._vertices.append(i)
-        g._adjacency.append([True] * len(g._adjacency))
+        g._add_no_check(i, full_mask ^ (1 << i))
     return g
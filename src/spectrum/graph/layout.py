@@ -131,16 +131,20 @@ class CircleLayout(Layout):
 
 class SpringLayout(Layout):
     """Provides force-based layout. Edges are springs, vertices are charged
-    particles.
+    particles. Coordinates and velocities are processed as flat arrays of
+    floats, so one step does not create intermediate Point objects.
     """
 
     def __init__(self, graph, spring_rate=0.2, spring_length=30,
-                 electric_rate=6.0, damping=0.5, **kw):
+                 electric_rate=6.0, damping=0.5, tolerance=1e-3,
+                 stable_steps=10, **kw):
         super(SpringLayout, self).__init__(graph, **kw)
         self._spring_rate = spring_rate
         self._spring_length = spring_length
         self._electric_rate = electric_rate
         self._damping = damping
+        self._tolerance = tolerance
+        self._stable_steps = stable_steps
 
         self.reset() # set random initial positions
 
@@ -152,77 +156,266 @@ class SpringLayout(Layout):
             self.set_unlocked_location(vertex,
                 Point(self.size.x * random.random(),
                     self.size.y * random.random()))
-        self._velocities = dict.fromkeys(
-            list(range(len(self._graph.vertices))), Point())
+        n = len(self._graph.vertices)
+        self._vx = [0.0] * n
+        self._vy = [0.0] * n
+        self._energy = None
+        self._stable_count = 0
 
+    @property
+    def converged(self):
+        """True if total kinetic energy changed by less than relative
+        `tolerance' during last `stable_steps' steps. Moving or (un)locking
+        a vertex from outside makes layout not converged again.
+        """
+        return self._stable_count >= self._stable_steps
 
-    def _repulsion_force(self, vertex, other):
-        r = (self[vertex] - self[other]).square()
-        if r == 0.0:
-            return Point()#random(), random())
-        c = 10 ** 6 * self._electric_rate / (r ** 1.5)
-        return (self[vertex] - self[other]) * c
+    def __setitem__(self, vertex, point):
+        super(SpringLayout, self).__setitem__(vertex, point)
+        self._stable_count = 0
 
-    def _attraction_force(self, vertex, other):
-        r = (self[vertex] - self[other]).square() ** 0.5
-        if r == 0.0:
-            return Point()
-        c = 10 * self._spring_rate * (self._spring_length - r) / r
-        return (self[vertex] - self[other]) * c
+    def set_lock(self, vertex, locked):
+        super(SpringLayout, self).set_lock(vertex, locked)
+        self._stable_count = 0
+
+    def _update_convergence(self):
+        energy = self.total_kinetic_energy()
+        if (self._energy is not None and abs(energy - self._energy) <=
+                self._tolerance * max(energy, self._energy, 1.0)):
+            self._stable_count += 1
+        else:
+            self._stable_count = 0
+        self._energy = energy
+
+    def _resize(self, n):
+        """Adjusts velocity arrays to the current number of vertices.
+        """
+        if len(self._vx) != n:
+            # new vertices are not in equilibrium
+            self._stable_count = 0
+        if len(self._vx) < n:
+            self._vx.extend([0.0] * (n - len(self._vx)))
+            self._vy.extend([0.0] * (n - len(self._vy)))
+        del self._vx[n:], self._vy[n:]
+
+    def _repulsion_forces(self, xs, ys, fx, fy):
+        """Adds electric forces between all pairs of vertices to arrays fx
+        and fy.
+        """
+        rate = 10 ** 6 * self._electric_rate
+        n = len(xs)
+        for i in range(n):
+            xi, yi = xs[i], ys[i]
+            fxi = fyi = 0.0
+            for j in range(i + 1, n):
+                dx = xi - xs[j]
+                dy = yi - ys[j]
+                r = dx * dx + dy * dy
+                if r == 0.0:
+                    continue
+                c = rate / (r * math.sqrt(r))
+                dx *= c
+                dy *= c
+                fxi += dx
+                fyi += dy
+                fx[j] -= dx
+                fy[j] -= dy
+            fx[i] += fxi
+            fy[i] += fyi
+
+    def _attraction_forces(self, xs, ys, fx, fy):
+        """Adds spring forces between ends of edges to arrays fx and fy.
+        """
+        rate = 10 * self._spring_rate
+        length = self._spring_length
+        for i in range(len(xs)):
+            for j in self._graph.neighbors(i):
+                if j <= i:
+                    continue
+                dx = xs[i] - xs[j]
+                dy = ys[i] - ys[j]
+                r = math.sqrt(dx * dx + dy * dy)
+                if r == 0.0:
+                    continue
+                c = rate * (length - r) / r
+                dx *= c
+                dy *= c
+                fx[i] += dx
+                fy[i] += dy
+                fx[j] -= dx
+                fy[j] -= dy
 
     def step(self, time_step=0.2):
         """Calculates position of vertices after a lapse of `time_step' after
-        last position.
+        last position. Forces are computed from positions at the beginning of
+        the step.
         """
-        for vertex in range(len(self._graph.vertices)):
-            force = Point()
-
-            # repulsion between vertices
-            for other in range(len(self._graph.vertices)):
-                if other == vertex: continue
-                force += self._repulsion_force(vertex, other)
-
-            # attraction between edges' ends
-            for other in self._graph.neighbors(vertex):
-                force += self._attraction_force(vertex, other)
-
-            # border contact force
-            def transform_force(coord, right_border, f):
-                if coord == 0:
-                    return max(0, f)
-                if coord == right_border:
-                    return min(0, f)
-                return f
-
-            force = Point(
-                transform_force(self[vertex].x, self.size.x, force.x),
-                transform_force(self[vertex].y, self.size.y, force.y))
-
-            vel = self._damping * (self._velocities[vertex] +
-                                   time_step * force)
-            vel = Point(
-                transform_force(self[vertex].x, self.size.x, vel.x),
-                transform_force(self[vertex].y, self.size.y, vel.y))
+        n = len(self._graph.vertices)
+        self._resize(n)
+        points = [self[vertex] for vertex in range(n)]
+        xs = [float(p[0]) for p in points]
+        ys = [float(p[1]) for p in points]
+        fx = [0.0] * n
+        fy = [0.0] * n
+        self._repulsion_forces(xs, ys, fx, fy)
+        self._attraction_forces(xs, ys, fx, fy)
+
+        width, height = self.size.x, self.size.y
+        damping = self._damping
+        max_x, max_y = 0.1 * width, 0.1 * height
+        vxs, vys = self._vx, self._vy
+        for i in range(n):
+            if i in self._locked:
+                vxs[i] = vys[i] = 0.0
+                continue
+            x, y = xs[i], ys[i]
+            # border contact: vertices on a border can not move outside
+            at_left, at_right = x == 0, x == width
+            at_top, at_bottom = y == 0, y == height
+            fxi, fyi = fx[i], fy[i]
+            if at_left and fxi < 0 or at_right and fxi > 0:
+                fxi = 0.0
+            if at_top and fyi < 0 or at_bottom and fyi > 0:
+                fyi = 0.0
+            vx = damping * (vxs[i] + time_step * fxi)
+            vy = damping * (vys[i] + time_step * fyi)
+            if at_left and vx < 0 or at_right and vx > 0:
+                vx = 0.0
+            if at_top and vy < 0 or at_bottom and vy > 0:
+                vy = 0.0
 
             # here we constrain maximal speed
-            step_distance_x = math.fabs(vel.x) * time_step
-            if step_distance_x > self.size.x * 0.1:
-                vel *= 0.1 * self.size.x / step_distance_x
-            step_distance_y = math.fabs(vel.y) * time_step
-            if step_distance_y > self.size.y * 0.1:
-                vel *= 0.1 * self.size.x / step_distance_y
+            step_distance = abs(vx) * time_step
+            if step_distance > max_x:
+                vx *= max_x / step_distance
+                vy *= max_x / step_distance
+            step_distance = abs(vy) * time_step
+            if step_distance > max_y:
+                vx *= max_y / step_distance
+                vy *= max_y / step_distance
+            vxs[i], vys[i] = vx, vy
+
+            # this is to prevent going behind borders, locations are set
+            # bypassing __setitem__, which resets convergence
+            Layout.__setitem__(
+                self, i, Point(min(max(0, x + time_step * vx), width),
+                               min(max(0, y + time_step * vy), height)))
+        self._update_convergence()
 
-            self._velocities[vertex] = vel
+    def total_kinetic_energy(self):
+        return sum(vx * vx + vy * vy for vx, vy in zip(self._vx, self._vy))
 
-            # this is to prevent going behind borders:
-            fx = lambda a: min(max(0, a), self.size.x)
-            fy = lambda b: min(max(0, b), self.size.y)
-            p = self[vertex] + time_step * vel  # next position of vertex
 
-            self.set_unlocked_location(vertex, Point(fx(p.x), fy(p.y)))
+class BarnesHutLayout(SpringLayout):
+    """Spring layout computing electric forces approximately with quadtree.
+    Group of vertices in a cell of size s at distance d is replaced by its
+    center of mass if s / d < theta. Zero theta gives exact forces, larger
+    values are faster and less accurate. Cells near the threshold are opened
+    partially, so that the approximate force is continuous and the layout
+    converges.
+    """
 
-    def total_kinetic_energy(self):
-        return sum((v.square() for v in self._velocities.values()))
+    # cells smaller than this are not divided, holding all their vertices
+    _MIN_CELL = 1e-6
 
+    # cells with (s / d)^2 between _BLEND * theta^2 and theta^2 are opened
+    # partially, which prevents vertices from oscillating between two
+    # approximations near equilibrium
+    _BLEND = 0.7
 
+    def __init__(self, graph, theta=0.8, **kw):
+        self._theta = theta
+        super(BarnesHutLayout, self).__init__(graph, **kw)
 
+    @property
+    def theta(self):
+        return self._theta
+
+    @theta.setter
+    def theta(self, value):
+        self._theta = value
+
+    def _build(self, xs, ys, indices, x0, y0, size):
+        """Returns quadtree node for given vertices in the square cell with
+        lower corner (x0, y0). Node is list [mass, x, y, size, x0, y0,
+        children, indices], where children is None for leaves.
+        """
+        mass = len(indices)
+        cx = sum(xs[i] for i in indices) / mass
+        cy = sum(ys[i] for i in indices) / mass
+        if mass == 1 or size < self._MIN_CELL:
+            return [mass, cx, cy, size, x0, y0, None, indices]
+        half = size / 2
+        xm, ym = x0 + half, y0 + half
+        quadrants = ([], [], [], [])
+        for i in indices:
+            quadrants[(xs[i] >= xm) + 2 * (ys[i] >= ym)].append(i)
+        children = [self._build(xs, ys, quadrant,
+                                xm if k & 1 else x0, ym if k & 2 else y0,
+                                half)
+                    for k, quadrant in enumerate(quadrants) if quadrant]
+        return [mass, cx, cy, size, x0, y0, children, None]
+
+    def _repulsion_forces(self, xs, ys, fx, fy):
+        n = len(xs)
+        if n < 2:
+            return
+        x0, y0 = min(xs), min(ys)
+        size = max(max(xs) - x0, max(ys) - y0) * (1 + 1e-9) or 1.0
+        root = self._build(xs, ys, list(range(n)), x0, y0, size)
+        rate = 10 ** 6 * self._electric_rate
+        theta_square = self._theta ** 2
+        for i in range(n):
+            fxi, fyi = self._cell_forces(xs, ys, xs[i], ys[i], [root], rate,
+                                         theta_square)
+            fx[i] += fxi
+            fy[i] += fyi
+
+    def _cell_forces(self, xs, ys, xi, yi, stack, rate, theta_square):
+        """Returns electric force at (xi, yi) of vertices in quadtree nodes
+        from `stack', which is consumed.
+        """
+        blend = self._BLEND
+        sqrt = math.sqrt
+        fxi = fyi = 0.0
+        while stack:
+            mass, cx, cy, size, x0, y0, children, indices = stack.pop()
+            dx = xi - cx
+            dy = yi - cy
+            r = dx * dx + dy * dy
+            if children is None:
+                if mass > 1:
+                    # vertices in tiny cell are treated one by one
+                    for j in indices:
+                        dx = xi - xs[j]
+                        dy = yi - ys[j]
+                        r = dx * dx + dy * dy
+                        if r != 0.0:
+                            c = rate / (r * sqrt(r))
+                            fxi += dx * c
+                            fyi += dy * c
+                    continue
+            elif x0 <= xi <= x0 + size and y0 <= yi <= y0 + size:
+                # cells containing the vertex itself are always opened
+                stack.extend(children)
+                continue
+            else:
+                far = theta_square * r
+                near = size * size - blend * far
+                if near > 0:
+                    if near >= (1 - blend) * far:
+                        stack.extend(children)
+                        continue
+                    # cell is opened partially, so that the force changes
+                    # continuously when the vertex moves
+                    share = near / ((1 - blend) * far)
+                    gx, gy = self._cell_forces(xs, ys, xi, yi, list(children),
+                                               rate, theta_square)
+                    fxi += share * gx
+                    fyi += share * gy
+                    mass *= 1 - share
+            if r != 0.0:
+                c = mass * rate / (r * sqrt(r))
+                fxi += dx * c
+                fyi += dy * c
+        return fxi, fyi
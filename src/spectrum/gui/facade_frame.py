@@ -15,12 +15,14 @@ Copyright 2012 Daniel Lytkin.
 
 """
 import codecs
-from tkinter import Frame, PanedWindow, LabelFrame, Button, Menu, TclError, Listbox, filedialog
+from tkinter import Frame, PanedWindow, LabelFrame, Button, Menu, TclError, Listbox, Label, filedialog
 
+from spectrum.calculations.numeric import Integer
 from spectrum.graph.layout import SpringLayout
 from spectrum.gui.graph.graph_canvas import GraphCanvas, IterationsPlugin
 from spectrum.gui.gui_elements import GroupNameLabel, IntegerContainer, ApexListContainer, ListContainer
 from spectrum.tools import tools
+from spectrum.tools.tasks import TaskScheduler
 
 __author__ = 'Daniel Lytkin'
 
@@ -41,6 +43,12 @@ class Facade(Frame):
         #        self._show_apex = True
         self._show_graph = show_graph
         self._graph_class = graph_class
+        self.graph = None
+        self._cocliques = []
+        # whether cocliques are calculated as soon as graph is ready
+        self._cocliques_requested = False
+        # calculations run in background, so that window is not frozen
+        self._scheduler = TaskScheduler(self.after)
         # self._init_variables()  # TODO: fix vertex label automatic positioning
         self._init_menu()
         self._init_components()
@@ -57,11 +65,106 @@ class Facade(Frame):
     def graph_canvas(self):
         return self._graph_canvas
 
-    def _show_graph_canvas(self):
+    def _calculate_group(self, show_graph):
+        """Generator calculating group properties in background. Yields pairs
+        (name, value) which are handled by _show_result.
+        """
+        yield 'status', "Calculating order..."
+        order = self._group.order()
+        yield 'order', order
+        yield 'status', "Calculating apex..."
+        apex = yield from self._steps(self._group.apex_steps(),
+                                      "Calculating apex...")
+        yield 'apex', apex
+        if show_graph:
+            yield from self._calculate_graph()
+        # order is factorized last, since it may take long
+        yield 'status', "Factorizing order..."
+        order = Integer(order)
+        order.factorize()
+        yield 'order', order
+
+    @staticmethod
+    def _steps(generator, status):
+        """Yields status after every step of generator, so that the task may
+        be cancelled between steps, and returns result of the generator.
+        Generator is closed if the task is cancelled.
+        """
+        try:
+            while True:
+                try:
+                    next(generator)
+                except StopIteration as stop:
+                    return stop.value
+                yield 'status', status
+        finally:
+            generator.close()
+
+    def _calculate_graph(self):
+        yield 'status', "Calculating graph..."
+        yield 'graph', self._graph_class(self._group)
+
+    def _calculate_cocliques(self):
+        yield 'status', "Calculating cocliques..."
+        for coclique in self.graph.iter_max_cocliques():
+            yield 'coclique', coclique
+
+    def _show_status_pane(self, cancellable=True):
+        self._status_pane.pack(fill='x', after=self._group_name.master)
+        if cancellable:
+            self._cancel_button.pack(side='right')
+        else:
+            self._cancel_button.forget()
+
+    def _run(self, generator):
+        self._show_status_pane()
+        self._scheduler.submit(generator, on_progress=self._show_result, on_done=self._calculation_finished,
+                               on_error=self._calculation_failed)
+
+    def _show_result(self, result):
+        name, value = result
+        if name == 'status':
+            self._status_label['text'] = value
+        elif name == 'order':
+            self._group_order.integer = value
+            self._group_order.pack(expand=True, fill='both')
+        elif name == 'apex':
+            self._apex_container.set_apex(value)
+        elif name == 'graph':
+            self._show_graph_canvas(value)
+            if self._cocliques_requested:
+                self._show_cocliques()
+        elif name == 'coclique':
+            self._cocliques.append(value)
+            self._cocliques_list.insert('end', ', '.join(map(str, value)))
+
+    def _calculation_finished(self, *_):
+        if not self._scheduler.running:
+            self._status_pane.forget()
+
+    def _calculation_failed(self, error):
+        self._status_label['text'] = "Error: {}".format(error)
+        self._show_status_pane(cancellable=False)
+
+    def cancel_calculations(self):
+        """Cancels all running calculations of this facade.
+        """
+        self._scheduler.cancel_all()
+        if self.graph is None:
+            # graph may be requested again
+            self._cocliques_requested = False
+            self._cocliques_button.pack(anchor='nw')
+            self._show_graph_button.pack()
+        self._calculation_finished()
+
+    def _request_graph(self):
         self._show_graph_button.forget()
+        self._run(self._calculate_graph())
+
+    def _show_graph_canvas(self, graph):
         # TODO: add different layouts and other options
         graph_class = self._graph_class
-        self.graph = graph_class(self._group)
+        self.graph = graph
         self._graph_canvas = GraphCanvas(self._right_pane, SpringLayout(self.graph), caption=str(graph_class))
         self._graph_canvas.pack(expand=True, fill='both')
 
@@ -89,18 +192,25 @@ class Facade(Frame):
         self._group_name = GroupNameLabel(group_name_pane, self._group)
         self._group_name.pack(expand=True, fill='both')
 
+        # status of background calculations, shown while they are running
+        self._status_pane = Frame(self._left_pane)
+        self._status_label = Label(self._status_pane, anchor='w')
+        self._status_label.pack(side='left', expand=True, fill='x')
+        self._cancel_button = Button(self._status_pane, text="Cancel", command=self.cancel_calculations)
+        self._cancel_button.pack(side='right')
+
         # group order
         group_order_pane = LabelFrame(self._left_pane, text="Order", padx=10, pady=5)
         group_order_pane.pack(fill='x')
 
-        self._group_order = IntegerContainer(group_order_pane, integer=self._group.order())
-        self._group_order.pack(expand=True, fill='both')
+        # packed when the order is calculated
+        self._group_order = IntegerContainer(group_order_pane)
 
         # apex
         self._apex_pane = LabelFrame(self._left_pane, text="Apex", padx=10, pady=5)
         self._apex_pane.pack(expand=True, fill='both')
 
-        self._apex_container = ApexListContainer(self._apex_pane, apex=self._group.apex())
+        self._apex_container = ApexListContainer(self._apex_pane)
         self._apex_container.pack(expand=True, fill='both')
 
         # graph controls
@@ -118,12 +228,11 @@ class Facade(Frame):
 
         # this is a button that show up instead of graph canvas if we uncheck 'Show graph' checkbox.
         self._show_graph_button = Button(self._right_pane, text='Show graph',
-                                         command=self._show_graph_canvas)
+                                         command=self._request_graph)
         self._graph_canvas = None
-        if self._show_graph:
-            self._show_graph_canvas()
-        else:
+        if not self._show_graph:
             self._show_graph_button.pack()
+        self._run(self._calculate_group(self._show_graph))
 
     def _init_variables(self):
         def set_default_var(name):
@@ -171,28 +280,38 @@ class Facade(Frame):
 
     #noinspection PyUnusedLocal
     def __destroy_menu(self, event):
+        self._scheduler.cancel_all()
         try:
             self._menu.delete(self._menu_index)
         except TclError:
             pass
 
     def _show_cocliques(self):
-        cocliques = self.graph.max_cocliques()
+        self._cocliques_button.forget()
+        if self.graph is None:
+            # cocliques are calculated after the graph
+            self._cocliques_requested = True
+            if self._show_graph_button.winfo_manager():
+                self._request_graph()
+            self._status_label['text'] = "Waiting for graph to find cocliques..."
+            self._show_status_pane()
+            return
+        self._cocliques_requested = False
 
         def select_coclique(*_):
             index = next(iter(self._cocliques_list.curselection()), None)
             if index is not None:
-                selected = cocliques[int(index)]
+                selected = self._cocliques[int(index)]
                 pick_state = self._graph_canvas.picked_vertex_state
                 pick_state.clear()
                 for value in selected:
                     pick_state.pick(self._graph_canvas.get_vertex(value))
 
-        self._cocliques_list.insert(0, *[', '.join(map(str, coclique)) for coclique in cocliques])
         self._cocliques_list.bind("<Double-Button-1>", select_coclique)
 
-        self._cocliques_button.forget()
         self._cocliques_container.pack(expand=True, fill='both')
+        # cocliques are added to the list as soon as they are found
+        self._run(self._calculate_cocliques())
 
     def call_graph_save_dialog(self):
         file_name = filedialog.asksaveasfilename(defaultextension='.ps',
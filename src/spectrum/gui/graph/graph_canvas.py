@@ -153,21 +153,36 @@ class IterationsPlugin:
         self._event_id = None
         self.time_step = time_step
 
+    def _converged(self):
+        return getattr(self._canvas.layout, 'converged', False)
+
     def _step(self):
         self._canvas.layout.step()
         self._canvas.reset()  # TODO: temp
+        if self._converged():
+            self._event_id = None
+            return
         self._event_id = self._canvas.after(self.time_step, self._step)
 
     def iterate(self, times):
-        for i in range(times):
+        """Makes at most `times' steps, stopping as soon as layout converges,
+        so no steps are made if it has already converged and no vertices
+        were moved since then. Returns number of steps made.
+        """
+        steps = 0
+        while steps < times and not self._converged():
             self._canvas.layout.step()
+            steps += 1
         self._canvas.reset()
+        return steps
 
     def start(self):
         self._step()
 
     def stop(self):
-        self._canvas.after_cancel(self._event_id)
+        if self._event_id is not None:
+            self._canvas.after_cancel(self._event_id)
+            self._event_id = None
 
 
 class Vertex:
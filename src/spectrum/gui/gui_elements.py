@@ -23,6 +23,7 @@ from tkinter.font import Font
 from spectrum.calculations.numeric import Integer, Constraints
 from spectrum.calculations.semisimple import SpectraElement
 from spectrum.tools import pyperclip, tools
+from spectrum.tools.tasks import TaskScheduler
 from spectrum.tools.tools import MultiModeStringFormatter
 
 __author__ = 'Daniel Lytkin'
@@ -213,6 +214,12 @@ class ApexListContainer(Frame):
         buttons_pane.grid(row=1, sticky='nesw')
         search_pane.grid(row=2, sticky='nesw')
 
+    def set_apex(self, apex):
+        """Sets apex shown in the list
+        """
+        self._apex = apex
+        self.apex_list.set_apex(apex)
+
     def _find_number(self, *_):
         self._reset_search_box_alert()
 
@@ -317,6 +324,8 @@ class CheckBox(Checkbutton):
 
 class IntegerView(Label, object):
     """This is the frame for displaying Integer with ability to factorize it.
+    Factorization may take long, so it is done by background task and the
+    number is shown unfactorized until it finishes.
     """
 
     def __init__(self, parent, integer=Integer(), **kw):
@@ -328,6 +337,7 @@ class IntegerView(Label, object):
         kw.setdefault('justify', 'left')
         self._var = StringVar()
         Label.__init__(self, parent, textvariable=self._var, **kw)
+        self._scheduler = TaskScheduler(self.after)
         self._factorization_enabled = False
         self.integer = integer
         self.bind("<Configure>", self._update_width)
@@ -350,7 +360,8 @@ class IntegerView(Label, object):
         pyperclip.setcb(str(self._integer))
 
     def _copy_latex(self):
-        if self._factorization_enabled:
+        # integer is only factorized when background task is finished
+        if self._integer.str_mode == 'verbose':
             cb = self._integer.str_latex()
         else:
             cb = self._integer.str_normal()
@@ -368,15 +379,36 @@ class IntegerView(Label, object):
 
     @integer.setter
     def integer(self, value):
+        self._scheduler.cancel_all()
         self._integer = MultiModeStringFormatter.mixin_to(value)
-        if self._factorization_enabled:
-            self._integer.str_mode = 'verbose'
         self._update_integer()
+        if self._factorization_enabled:
+            self._factorize()
 
     def toggle_factorization(self, value):
         self._factorization_enabled = value
-        self._integer.str_mode = 'verbose' if value else 'normal'
+        self._scheduler.cancel_all()
+        self._integer.str_mode = 'normal'
         self._update_integer()
+        if value:
+            self._factorize()
+
+    def _factorize(self):
+        self._scheduler.submit(self._factorization(self._integer),
+                               on_done=self._factorized)
+
+    @staticmethod
+    def _factorization(integer):
+        """Generator factorizing integer in background task.
+        """
+        yield
+        integer.factorize()
+        return integer
+
+    def _factorized(self, integer):
+        if integer is self._integer and self._factorization_enabled:
+            integer.str_mode = 'verbose'
+            self._update_integer()
 
 
 class IntegerContainer(Frame):
@@ -396,6 +428,14 @@ class IntegerContainer(Frame):
     def _set_factorization(self):
         self._integer_view.toggle_factorization(self._button.is_selected())
 
+    @property
+    def integer(self):
+        return self._integer_view.integer
+
+    @integer.setter
+    def integer(self, value):
+        self._integer_view.integer = value
+
 
 class GroupNameLabel(Label):
     """Label with group name"""
@@ -0,0 +1,205 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from spectrum.calculations import groups, numeric
+from spectrum.calculations.graphs import PrimeGraph
+from spectrum.calculations.groups import (AlternatingGroup, ClassicalGroup,
+                                          ExceptionalGroup)
+from spectrum.calculations.persistent import PersistentCache
+
+__author__ = 'Daniel Lytkin'
+
+# Headless batch calculation of apexes, orders and prime graphs.
+# Usage:
+#     python -m spectrum.modules.batch PSp --dim 4..40 --q ..1000 -o psp.jsonl
+
+ALTERNATING = 'Alt'
+
+CSV_FIELDS = ('group', 'order', 'apex', 'vertices', 'edges')
+
+
+def parse_range(text):
+    """Parses ranges like '4..40', '..1000', '5' or '4,6,10..12' into sorted
+    list of integers. Omitted lower bound is 2.
+    """
+    values = set()
+    for part in text.split(','):
+        if '..' in part:
+            low, high = part.split('..')
+            values.update(range(int(low) if low else 2, int(high) + 1))
+        else:
+            values.add(int(part))
+    return sorted(values)
+
+
+def group_parameters(family, dimensions=(), orders=()):
+    """Returns list of constructor arguments of all valid groups of given
+    family with dimensions and field orders from given ranges, in the order
+    of increasing dimension and field order.
+    """
+    if family == ALTERNATING:
+        return [(n,) for n in dimensions if n >= 5]
+    if family in ExceptionalGroup.types():
+        constraints = ExceptionalGroup.field_constraints(family)
+        return [(family, q) for q in orders if constraints.is_valid(q)]
+    if family in ClassicalGroup.types():
+        dim_constraints = ClassicalGroup.dim_constraints(family)
+        field_constraints = ClassicalGroup.field_constraints(family)
+        valid_orders = [q for q in orders if field_constraints.is_valid(q)]
+        return [(family, n, q) for n in dimensions
+                if dim_constraints.is_valid(n) for q in valid_orders]
+    raise ValueError("Unknown group family: {}".format(family))
+
+
+def _make_group(params):
+    if len(params) == 1:
+        return AlternatingGroup(*params)
+    if len(params) == 2:
+        return ExceptionalGroup(*params)
+    return ClassicalGroup(*params)
+
+
+def calculate(params):
+    """Calculates apex, order and prime graph of the group with given
+    constructor arguments. Returns dict suitable for json serialization.
+    """
+    group = _make_group(params)
+    apex = sorted(int(x) for x in group.apex())
+    vertices, edges = PrimeGraph(group).as_sparse_graph()
+    return {'group': str(group),
+            'order': int(group.order()),
+            'apex': apex,
+            'vertices': vertices,
+            'edges': [list(edge) for edge in edges]}
+
+
+def _init_worker(cache_path):
+    if cache_path is not None:
+        groups.set_persistent_cache(PersistentCache(cache_path))
+
+
+class _JsonLinesWriter:
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, record):
+        self._stream.write(json.dumps(record) + '\n')
+        self._stream.flush()
+
+
+class _CsvWriter:
+    def __init__(self, stream, header):
+        self._stream = stream
+        self._writer = csv.writer(stream, lineterminator='\n')
+        if header:
+            self._writer.writerow(CSV_FIELDS)
+
+    def write(self, record):
+        join = lambda seq: ' '.join(map(str, seq))
+        self._writer.writerow((
+            record['group'], record['order'], join(record['apex']),
+            join(record['vertices']),
+            join('{}-{}'.format(*edge) for edge in record['edges'])))
+        self._stream.flush()
+
+
+def _done_groups(path, fmt):
+    """Returns names of groups already written to the output file and
+    truncates the last line if it was not completely written.
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'rb+') as f:
+        data = f.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            f.truncate(complete)
+    lines = data[:complete].decode('utf-8').splitlines()
+    if fmt == 'csv':
+        return {row[0] for row in csv.reader(lines[1:]) if row}
+    return {json.loads(line)['group'] for line in lines if line}
+
+
+def run(params, stream, fmt='jsonl', jobs=None, cache_path=None, skip=(),
+        header=True):
+    """Calculates all groups with given parameters and writes results to
+    stream in the order of params. Groups whose names are in `skip' are not
+    calculated. If jobs is 1, everything is calculated in current process.
+    """
+    params = [p for p in params if str(_make_group(p)) not in skip]
+    writer = (_CsvWriter(stream, header) if fmt == 'csv'
+              else _JsonLinesWriter(stream))
+    if jobs == 1:
+        _init_worker(cache_path)
+        for record in map(calculate, params):
+            writer.write(record)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(cache_path,)) as executor:
+        try:
+            # map yields results in the order of params
+            for record in executor.map(calculate, params):
+                writer.write(record)
+        except KeyboardInterrupt:
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Calculate apexes, orders and prime graphs of groups.")
+    parser.add_argument('family', help="group family, e.g. PSp, E8 or Alt")
+    parser.add_argument('--dim', default='', type=str,
+                        help="dimensions (degrees for Alt), e.g. 4..40")
+    parser.add_argument('--q', default='', type=str,
+                        help="field orders, e.g. ..1000; non prime powers "
+                             "are skipped")
+    parser.add_argument('-o', '--output',
+                        help="output file; standard output if omitted")
+    parser.add_argument('-f', '--format', choices=('jsonl', 'csv'),
+                        default='jsonl')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument('--resume', action='store_true',
+                        help="skip groups already written to the output file")
+    parser.add_argument('--cache', help="persistent cache file")
+    args = parser.parse_args(argv)
+
+    dimensions = parse_range(args.dim) if args.dim else []
+    orders = parse_range(args.q) if args.q else []
+    params = group_parameters(args.family, dimensions,
+                              [q for q in orders if numeric.is_prime_power(q)])
+
+    if args.output is None:
+        run(params, sys.stdout, args.format, args.jobs, args.cache)
+        return
+    skip = _done_groups(args.output, args.format) if args.resume else set()
+    append = (args.resume and os.path.exists(args.output) and
+              os.path.getsize(args.output) > 0)
+    with open(args.output, 'a' if append else 'w', newline='') as stream:
+        run(params, stream, args.format, args.jobs, args.cache, skip,
+            header=not append)
+
+
+if __name__ == '__main__':
+    main()
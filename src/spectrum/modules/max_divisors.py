@@ -15,56 +15,21 @@ Copyright 2012 Daniel Lytkin.
 
 """
 from spectrum.calculations.groups import Field, ClassicalGroup
-from spectrum.calculations.numeric import first_divisor, Integer
+from spectrum.calculations.numeric import Integer
+from spectrum.calculations.primes import (first_primes, primes_less_than,
+                                          is_prime)
 
 __author__ = 'Daniel Lytkin'
 
 
-def first_primes(n):
-    """Returns n first prime numbers.
-    """
-    ret = [2]
-    n -= 1
-    i = 3
-    while n:
-        while any(i % prime == 0 for prime in ret):
-            i += 2
-        ret.append(i)
-        n -= 1
-    return ret
-
-
-def primes_less_than(n):
-    """Returns list of primes less than n.
-    """
-    if n < 2: return []
-    ret = [2]
-    i = 3
-    while True:
-        while any(i % prime == 0 for prime in ret):
-            i += 2
-        if i >= n:
-            break
-        ret.append(i)
-    return ret
-
-
-def is_prime(n):
-    return n == first_divisor(n)
-
-
 def _prime_factors(integer):
     integer.factorize()
     return set(integer.factors.keys())
 
-_integers = {}
-
 def _get_factorized(base, pow):
-    x = _integers.get((base, pow), None)
-    if x is None:
-        x = Integer(base ** pow - 1)
-        x.factorize()
-        _integers[(base, pow)] = x
+    # factorizations of cyclotomic parts are shared through the factor cache
+    x = Integer.from_power(base, pow, -1)
+    x.factorize()
     return x
 
 
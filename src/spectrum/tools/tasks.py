@@ -0,0 +1,149 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import queue
+import threading
+
+__author__ = 'Daniel Lytkin'
+
+# Background calculations for GUI. Tk widgets must only be touched from the
+# thread running the event loop, so calculations run in worker threads and
+# post their results to a queue, which is polled with widget.after().
+
+_PROGRESS, _DONE, _ERROR = range(3)
+
+
+def complete(generator):
+    """Runs generator of calculation steps (see BackgroundTask) to the end in
+    current thread and returns its value.
+    """
+    while True:
+        try:
+            next(generator)
+        except StopIteration as stop:
+            return stop.value
+
+
+class BackgroundTask:
+    """Runs generator in a worker thread. Each value yielded by generator is
+    passed to `on_progress', the value it returns is passed to `on_done' and
+    raised exception is passed to `on_error'. Callbacks are called from the
+    polling function scheduled by `after', i.e. in the event loop thread.
+
+    Task can be cancelled: generator is not resumed after the next yield and
+    no more callbacks are called.
+    """
+
+    def __init__(self, after, generator, on_progress=None, on_done=None,
+                 on_error=None, poll_interval=50):
+        self._after = after
+        self._generator = generator
+        self._on_progress = on_progress
+        self._on_done = on_done
+        self._on_error = on_error
+        self._poll_interval = poll_interval
+        self._queue = queue.Queue()
+        self._cancelled = threading.Event()
+        self._finished = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def finished(self):
+        """True if task is completed or cancelled and no more callbacks will
+        be called.
+        """
+        return self._finished or self.cancelled
+
+    def start(self):
+        self._thread.start()
+        self._after(self._poll_interval, self._poll)
+        return self
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def join(self, timeout=None):
+        """Waits for worker thread to finish.
+        """
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            while not self._cancelled.is_set():
+                try:
+                    value = next(self._generator)
+                except StopIteration as stop:
+                    self._queue.put((_DONE, stop.value))
+                    return
+                self._queue.put((_PROGRESS, value))
+            self._generator.close()
+        except Exception as e:
+            self._queue.put((_ERROR, e))
+
+    def _poll(self):
+        while not self.cancelled:
+            try:
+                kind, value = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            callback = (self._on_progress, self._on_done,
+                        self._on_error)[kind]
+            if kind != _PROGRESS:
+                self._finished = True
+            if callback is not None:
+                callback(value)
+        if not self.finished:
+            self._after(self._poll_interval, self._poll)
+
+
+class TaskScheduler:
+    """Starts background tasks and keeps track of the running ones, so that
+    they can be cancelled together. Tasks run concurrently, each in its own
+    worker thread.
+
+    Usage:
+        scheduler = TaskScheduler(widget.after)
+        scheduler.submit(calculation(), on_progress=show, on_done=finish)
+    """
+
+    def __init__(self, after, poll_interval=50):
+        self._after = after
+        self._poll_interval = poll_interval
+        self._tasks = []
+
+    @property
+    def running(self):
+        """List of tasks which are neither finished nor cancelled.
+        """
+        self._tasks = [task for task in self._tasks if not task.finished]
+        return list(self._tasks)
+
+    def submit(self, generator, on_progress=None, on_done=None,
+               on_error=None):
+        """Starts new task for given generator and returns it.
+        """
+        task = BackgroundTask(self._after, generator, on_progress, on_done,
+                              on_error, self._poll_interval)
+        self._tasks.append(task)
+        return task.start()
+
+    def cancel_all(self):
+        for task in self.running:
+            task.cancel()
@@ -15,8 +15,10 @@ Copyright 2012 Daniel Lytkin.
 
 """
 
+import collections
 import functools
 import platform
+import threading
 
 __author__ = 'Daniel Lytkin'
 
@@ -27,19 +29,99 @@ class ObjectCache(type):
     """Metaclass for cache-enabled classes. It adds __call__ method to class
     objects, which is called before creating any instances, and searches the
     cache for the object creates with same arguments first.
+
+    Each class has its own bounded cache: when it holds more than
+    `_cache_max' instances (class attribute, `max_size' by default), least
+    recently used ones are evicted, so that classes of large objects don't
+    push out instances of other classes. Class may define classmethod
+    `_cache_key(*args, **kwargs)' returning hashable key, so that different
+    arguments describing the same object share one instance.
+
+    Usage:
+        class Foo(metaclass=ObjectCache):
+            _cache_max = 16
+            ...
+
+        ObjectCache.cache_info()
+        ObjectCache.cache_clear()
+        ObjectCache.set_enabled(False)
     """
-    cache = dict()
+    CacheInfo = collections.namedtuple('CacheInfo',
+                                       'hits misses max_size size')
+
+    caches = {}
+    lock = threading.Lock()
+    max_size = 1024
+    enabled = True
+    hits = 0
+    misses = 0
 
     def __call__(cls, *args, **kwargs):
         # this is called before creating any instances
-        key = tuple([cls.__name__, ] + list(args) + sorted(kwargs.items()))
-        instance = ObjectCache.cache.get(key)
-        if instance is None:
-            #noinspection PyArgumentList
-            instance = type.__call__(cls, *args, **kwargs)
-            ObjectCache.cache[key] = instance
+        if not ObjectCache.enabled:
+            return type.__call__(cls, *args, **kwargs)
+        key_func = getattr(cls, '_cache_key', None)
+        if key_func is not None:
+            key = key_func(*args, **kwargs)
+        else:
+            key = (args, tuple(sorted(kwargs.items())))
+        # instances may be requested from background calculation threads
+        with ObjectCache.lock:
+            cache = ObjectCache.caches.setdefault(cls,
+                                                  collections.OrderedDict())
+            instance = cache.get(key)
+            if instance is not None:
+                ObjectCache.hits += 1
+                cache.move_to_end(key)
+                return instance
+            ObjectCache.misses += 1
+        #noinspection PyArgumentList
+        instance = type.__call__(cls, *args, **kwargs)
+        with ObjectCache.lock:
+            instance = cache.setdefault(key, instance)
+            ObjectCache._evict(cls, cache)
         return instance
 
+    @staticmethod
+    def _evict(cls, cache):
+        max_size = getattr(cls, '_cache_max', ObjectCache.max_size)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+    @staticmethod
+    def cache_info():
+        """Returns named tuple (hits, misses, max_size, size), where size is
+        the total number of cached instances of all classes.
+        """
+        return ObjectCache.CacheInfo(
+            ObjectCache.hits, ObjectCache.misses, ObjectCache.max_size,
+            sum(len(cache) for cache in ObjectCache.caches.values()))
+
+    @staticmethod
+    def cache_clear():
+        """Removes all cached instances and resets statistics.
+        """
+        with ObjectCache.lock:
+            ObjectCache.caches.clear()
+            ObjectCache.hits = ObjectCache.misses = 0
+
+    @staticmethod
+    def set_enabled(enabled):
+        """Enables or disables caching. Disabling does not clear the cache.
+        """
+        ObjectCache.enabled = enabled
+
+    @staticmethod
+    def set_max_size(max_size):
+        """Sets default maximal number of cached instances per class, evicting
+        least recently used ones if necessary. Classes defining `_cache_max'
+        are not affected.
+        """
+        with ObjectCache.lock:
+            ObjectCache.max_size = max_size
+            for cls, cache in ObjectCache.caches.items():
+                ObjectCache._evict(cls, cache)
+
 
 class DocInherit:
     """doc_inherit decorator
@@ -99,12 +181,23 @@ class DocInherit:
 doc_inherit = DocInherit
 
 
+_mixed_classes = {}
+
+
 def mixin(instance, new_class):
-    instance.__class__ = type(
-        '{}_with_{}'.format(instance.__class__.__name__, new_class.__name__),
-        (instance.__class__, new_class),
-        {}
-    )
+    """Changes class of instance to a subclass of its class and new_class.
+    Such subclass is created once for each pair of classes.
+    """
+    bases = instance.__class__, new_class
+    cls = _mixed_classes.get(bases)
+    if cls is None:
+        cls = _mixed_classes.setdefault(bases, type(
+            '{}_with_{}'.format(instance.__class__.__name__,
+                                new_class.__name__),
+            bases,
+            {}
+        ))
+    instance.__class__ = cls
 
 
 class MultiModeStringFormatter:
@@ -119,8 +212,11 @@ class MultiModeStringFormatter:
     @classmethod
     def mixin_to(cls, instance, mode='normal'):
         if not isinstance(instance, MultiModeStringFormatter):
-            instance._original_str = instance.__str__
+            # original __str__ is kept by the shared mixed class, not by
+            # every instance
+            original_str = instance.__class__.__str__
             mixin(instance, cls)
+            instance.__class__._original_str = original_str
             instance.__class__.__str__ = MultiModeStringFormatter.__str__
         instance.str_mode = mode
         return instance
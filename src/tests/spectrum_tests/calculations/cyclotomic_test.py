@@ -0,0 +1,64 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import itertools
+import unittest
+from collections import Counter
+
+from spectrum.calculations.cyclotomic import (FactorCache, cyclotomic_parts,
+                                              cyclotomic_value,
+                                              factorize_power)
+from spectrum.calculations.numeric import Integer, prod
+from spectrum_tests.parametric import parametrized, parameters
+
+__author__ = 'Daniel Lytkin'
+
+
+@parametrized
+class CyclotomicTest(unittest.TestCase):
+    def test_cyclotomic_value(self):
+        # Phi_1(x) = x - 1, Phi_4(x) = x^2 + 1, Phi_6(x) = x^2 - x + 1,
+        # Phi_12(x) = x^4 - x^2 + 1
+        self.assertEqual(4, cyclotomic_value(1, 5))
+        self.assertEqual(26, cyclotomic_value(4, 5))
+        self.assertEqual(21, cyclotomic_value(6, 5))
+        self.assertEqual(601, cyclotomic_value(12, 5))
+
+    @parameters(itertools.product((2, 3, 4, 8, 9, 10), range(1, 13), (-1, 1)))
+    def test_parts(self, params):
+        b, k, sign = params
+        self.assertEqual(b ** k + sign, prod(cyclotomic_parts(b, k, sign)))
+
+    def test_factorize_power(self):
+        self.assertEqual(Counter({3: 2, 5: 1, 7: 1, 13: 1}),
+                         factorize_power(4, 6, -1))
+        self.assertEqual(Counter({3: 3, 19: 1}), factorize_power(8, 3, 1))
+
+    def test_from_power(self):
+        i = Integer.from_power(2 ** 13, 20, -1)
+        self.assertEqual(2 ** 260 - 1, int(i))
+        factors = i.factorize()
+        self.assertEqual(2 ** 260 - 1, prod(p ** k for p, k in factors.items()))
+
+    def test_factor_cache(self):
+        cache = FactorCache(max_size=2)
+        self.assertEqual(Counter({2: 2, 3: 1}), cache.factorize(12))
+        cache.factorize(12)
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        cache.factorize(15)
+        cache.factorize(21)
+        self.assertEqual(2, len(cache))
+        self.assertNotIn(12, cache)
@@ -0,0 +1,113 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import time
+import unittest
+from collections import Counter
+
+from spectrum.calculations import factorization
+from spectrum.calculations.factorization import (Factorizer, ecm, iroot,
+                                                 is_probable_prime,
+                                                 pollard_brent)
+from spectrum.calculations.numeric import prod
+
+__author__ = 'Daniel Lytkin'
+
+
+def _naive_is_prime(n):
+    return n > 1 and all(n % d for d in range(2, int(n ** 0.5) + 1))
+
+
+class FactorizationTest(unittest.TestCase):
+    def test_is_probable_prime_small(self):
+        for n in range(3000):
+            self.assertEqual(_naive_is_prime(n), is_probable_prime(n), msg=n)
+
+    def test_is_probable_prime_pseudoprimes(self):
+        # strong pseudoprimes to several bases and Carmichael numbers
+        for n in (561, 1105, 2047, 3215031751, 3474749660383,
+                  341550071728321, 3825123056546413051):
+            self.assertFalse(is_probable_prime(n), msg=n)
+
+    def test_is_probable_prime_large(self):
+        self.assertTrue(is_probable_prime(2 ** 127 - 1))
+        self.assertFalse(is_probable_prime((2 ** 61 - 1) * (2 ** 31 - 1)))
+
+    def test_iroot(self):
+        self.assertEqual(10 ** 20, iroot(10 ** 60, 3))
+        self.assertEqual(10 ** 20, iroot(10 ** 60 + 1, 3))
+        self.assertEqual(10 ** 20 - 1, iroot(10 ** 60 - 1, 3))
+
+    def test_pollard_brent(self):
+        n = 1000003 * 1000033
+        d = pollard_brent(n, seed=0)
+        self.assertIn(d, (1000003, 1000033))
+
+    def test_ecm(self):
+        n = 1000000007 * 1000000009
+        d = ecm(n, seed=0)
+        self.assertIn(d, (1000000007, 1000000009))
+
+    def test_ecm_twenty_digit_factors(self):
+        p, q = 10000000000000012363, 30000000000000000797
+        start = time.monotonic()
+        d = ecm(p * q, seed=2)
+        self.assertIn(d, (p, q))
+        self.assertLess(time.monotonic() - start, 60)
+
+    def test_sieve_segment(self):
+        primes = factorization._cached_primes(200)
+        for low, high in ((2, 100), (105, 3000), (30000, 40000)):
+            segment = factorization._sieve_segment(low, high, primes)
+            self.assertEqual(
+                [n for n in range(low, high) if _naive_is_prime(n)],
+                [low + i for i, flag in enumerate(segment) if flag])
+
+    def test_factorize(self):
+        expected = Counter({2: 10, 3: 7, 5: 3, 7: 1, 11: 1, 23: 1})
+        self.assertEqual(expected, Factorizer().factorize(495766656000))
+
+    def test_factorize_prime_power(self):
+        p = 2 ** 31 - 1
+        self.assertEqual(Counter({p: 5, 3: 1}),
+                         Factorizer().factorize(3 * p ** 5))
+
+    def test_factorize_large(self):
+        for n in (2 ** 200 - 1, 3 ** 80 - 1, 10 ** 40 + 1):
+            factors = Factorizer().factorize(n)
+            self.assertEqual(n, prod(p ** k for p, k in factors.items()))
+            self.assertTrue(all(is_probable_prime(p) for p in factors))
+
+    def test_smallest_factor(self):
+        engine = Factorizer()
+        self.assertEqual(1, engine.smallest_factor(1))
+        self.assertEqual(2, engine.smallest_factor(2 ** 100))
+        self.assertEqual(1000003, engine.smallest_factor(1000003 * 1000033))
+
+    def test_prime_power_base(self):
+        engine = Factorizer()
+        self.assertEqual(7, engine.prime_power_base(7 ** 30))
+        self.assertIsNone(engine.prime_power_base(6 ** 30))
+
+    def test_set_engine(self):
+        engine = Factorizer(splitters=[pollard_brent])
+        previous = factorization.set_engine(engine)
+        try:
+            self.assertIs(engine, factorization.get_engine())
+            self.assertEqual(Counter({3: 1, 5: 1, 17: 1, 257: 1}),
+                             factorization.factorize(2 ** 16 - 1))
+        finally:
+            factorization.set_engine(previous)
@@ -15,9 +15,15 @@ Copyright 2012 Daniel Lytkin.
 
 """
 import unittest
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import reduce
 
-from spectrum.calculations.groups import Field, SporadicGroup, AlternatingGroup, ClassicalGroup, ExceptionalGroup, Group
+from spectrum.calculations import numeric, spectra
+from spectrum.calculations.groups import set_executor, Field, SporadicGroup, AlternatingGroup, ClassicalGroup, ExceptionalGroup, Group
+from spectrum.calculations.partition import Partitions
+from spectrum.calculations.spectra import alternating
 from spectrum.calculations.spectra.exceptional import RootSystem
+from spectrum.tools.tools import ObjectCache
 from spectrum_tests.calculations import orders_data, spectra_data
 from spectrum_tests.parametric import parametrized, parameters
 
@@ -69,6 +75,12 @@ class GroupsTest(unittest.TestCase):
             self.assertEqual(2, g.field.char)
             self.assertEqual(3, g.field.pow)
 
+    def test_classical_cache(self):
+        g = ClassicalGroup("PSp", 14, Field(2, 5))
+        self.assertIs(g, ClassicalGroup("PSp", 14, 32))
+        self.assertIs(g, ClassicalGroup("PSp", 14, 2, 5))
+        self.assertIsNot(g, ClassicalGroup("Sp", 14, 32))
+
 
 @parametrized
 class OrdersTest(unittest.TestCase):
@@ -111,11 +123,88 @@ class SpectraTest(unittest.TestCase):
     #     g = SporadicGroup("M")
     #     self.assertSequenceEqual(expected, g.apex())
     #
-    # def test_alternating(self):
-    #     expected = [19, 34, 48, 51, 52, 72, 78, 88, 91, 99, 110,
-    #                 120, 126, 132, 165, 168, 180, 195, 231, 315, 420]
-    #     g = AlternatingGroup(21)
-    #     self.assertSequenceEqual(expected, g.apex())
+    def test_parallel_classical(self):
+        groups = [("PSp", 16, 5), ("POmega+", 12, 3), ("Omega-", 10, 4),
+                  ("SO+", 10, 3), ("PSL", 9, 7), ("PSU", 10, 3),
+                  ("Omega+", 12, 8), ("Sp", 10, 4)]
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            for name, dim, q in groups:
+                expected = numeric.maximal_elements(
+                    spectra.classical_spectra[name](dim, Field(q)))
+                self.assertEqual(expected, spectra.parallel_classical_spectra(
+                    name, dim, Field(q), executor, pieces=3))
+            previous = set_executor(executor, 2)
+            try:
+                apex = ClassicalGroup("PSU", 13, 7).apex()
+            finally:
+                set_executor(previous)
+        self.assertEqual(numeric.maximal_elements(
+            spectra.classical_spectra["PSU"](13, Field(7))), apex)
+
+    def test_apex_steps(self):
+        ObjectCache.cache_clear()
+        group = ClassicalGroup("Omega-", 12, 11)
+        steps = group.apex_steps()
+        count = 0
+        with self.assertRaises(StopIteration) as stop:
+            while True:
+                self.assertIsNone(next(steps))
+                count += 1
+        # one step for every chunk of elements
+        size = sum(1 for _ in spectra.classical_spectra["Omega-"](
+            12, Field(11)))
+        self.assertEqual(-(-size // 4096), count)
+        expected = numeric.maximal_elements(
+            spectra.classical_spectra["Omega-"](12, Field(11)))
+        self.assertEqual(expected, stop.exception.value)
+        self.assertEqual(expected, group.apex())
+
+    def test_apex_steps_executor(self):
+        class PendingExecutor:
+            def __init__(self):
+                self.futures = []
+
+            def submit(self, *args):
+                future = Future()
+                self.futures.append(future)
+                return future
+
+        ObjectCache.cache_clear()
+        executor = PendingExecutor()
+        previous = set_executor(executor, 2)
+        try:
+            steps = ClassicalGroup("PSU", 13, 7).apex_steps()
+            # waiting for the executor is interrupted by steps
+            for _ in range(3):
+                self.assertIsNone(next(steps))
+            steps.close()
+        finally:
+            set_executor(previous)
+        self.assertTrue(executor.futures)
+        self.assertTrue(all(future.cancelled()
+                            for future in executor.futures))
+
+    def test_alternating(self):
+        expected = [19, 34, 48, 51, 52, 72, 78, 88, 91, 99, 110,
+                    120, 126, 132, 165, 168, 180, 195, 231, 315, 420]
+        g = AlternatingGroup(21)
+        self.assertSequenceEqual(expected, g.apex())
+
+    @parameters(list(range(1, 31)))
+    def test_alternating_by_partitions(self, n):
+        for even, func in ((True, alternating.alternating_spectra),
+                           (False, alternating.symmetric_spectra)):
+            orders = [reduce(numeric.lcm, x) for x in Partitions(n)
+                      if not even or (len(x) + n) % 2 == 0]
+            apex = func(n)
+            self.assertEqual(numeric.sort_and_filter(orders), apex)
+            self.assertEqual(max(apex), alternating.max_order(n, even))
+
+    def test_alternating_large(self):
+        # Landau's function g(100)
+        self.assertEqual(232792560, alternating.max_order(100))
+        apex = AlternatingGroup(120).apex()
+        self.assertIn(alternating.max_order(120, True), apex)
     #
     # @parameters(spectra_data.classical.keys())
     # def test_classical_spectra(self, params):
@@ -66,6 +66,45 @@ class NumericTest(unittest.TestCase):
         expected = [21, 15, 12, 10, 9, 8]
         self.assertSequenceEqual(expected, sort_and_filter(a, reverse=True))
 
+    def test_divisibility_antichain(self):
+        numbers = [4, 3, 12, 5, 2 * 1009, 1009, 7 * 1013, 6, 30, 1013, 12]
+        expected = [12, 30, 2018, 7091]
+        # result does not depend on the order of insertion
+        for permutation in itertools.islice(
+                itertools.permutations(numbers), 0, 5000, 97):
+            antichain = DivisibilityAntichain(permutation)
+            self.assertEqual(expected, antichain.sorted())
+        antichain = DivisibilityAntichain(numbers)
+        self.assertFalse(antichain.add(15))
+        self.assertTrue(antichain.add(60))
+        self.assertEqual([60, 2018, 7091], antichain.sorted())
+        self.assertEqual(3, len(antichain))
+        self.assertNotIn(12, antichain)
+
+    def test_divisibility_antichain_increasing(self):
+        # every number removes its divisors added before
+        numbers = list(range(1, 600)) + [1009 * 1013, 3 * 1009 * 1013]
+        antichain = DivisibilityAntichain(numbers, max_seen=16)
+        expected = [n for n in numbers
+                    if not any(m != n and m % n == 0 for m in numbers)]
+        self.assertEqual(expected, antichain.sorted())
+        self.assertLessEqual(len(antichain._divisors_cache), 16)
+
+    def test_maximal_elements(self):
+        a = [9, 8, 21, 7, 12, 6, 5, 15, 10, 5, 4, 12, 4, 4, 3, 6, 3, 6, 3, 2,
+             2, 1]
+        expected = [8, 9, 10, 12, 15, 21]
+        self.assertEqual(expected, maximal_elements(iter(a)))
+        self.assertEqual(expected, maximal_elements(a, chunk_size=3))
+        self.assertEqual(expected[::-1], maximal_elements(a, reverse=True))
+
+    def test_iter_maximal(self):
+        a = [3, 4, 12, 7, 5, 10, 9, 1]
+        self.assertEqual([12, 10, 9, 7], list(iter_maximal(a)))
+        # numbers greater than half of the bound are confirmed at once
+        iterator = iter_maximal(iter(a), bound=12)
+        self.assertEqual([12, 7, 10, 9], list(iterator))
+
     def test_first_divisor(self):
         self.assertEqual(3, first_divisor(9))
         self.assertEqual(41, first_divisor(41))
@@ -81,6 +120,14 @@ class NumericTest(unittest.TestCase):
         i.factorize()
         self.assertEqual(expected, i.factors)
 
+    def test_factors_large(self):
+        # (2^13)^20 - 1 has 79 digits
+        i = Integer((2 ** 13) ** 20 - 1)
+        i.factorize()
+        self.assertEqual((2 ** 13) ** 20 - 1, prod(
+            p ** k for p, k in i.factors.items()))
+        self.assertTrue(all(is_prime(p) for p in i.factors))
+
     def test_product(self):
         expected = 495766656000
         product = int(Integer((2, 10), (3, 7), (5, 3), 7, 11, 23))
@@ -111,7 +158,7 @@ class NumericTest(unittest.TestCase):
     def test_is_prime(self):
         expected = {2: True, 3: True, 4: False, 5: True, 3569: False,
                     3571: True, 27644437: True, 27644439: False,
-                    15485863: True}
+                    15485863: True, 2 ** 89 - 1: True, 2 ** 67 - 1: False}
         for number, value in expected.items():
             self.assertEqual(value, is_prime(number), msg=number)
 
@@ -140,6 +187,39 @@ class NumericTest(unittest.TestCase):
         b = 7
         self.assertEqual(5, a % b)
 
+    def test_coprime_base(self):
+        self.assertEqual([2, 3, 5], coprime_base([6, 10]))
+        self.assertEqual([3, 4, 5], coprime_base([12, 20, 4]))
+        # large primes are found by refinement without factorization
+        p, q = 2 ** 61 - 1, 2 ** 89 - 1
+        a = Integer(p * q, 5 * p)
+        self.assertEqual({p: 2, q: 1, 5: 1}, dict(a.refine()))
+
+    def test_integer_gcd_lcm(self):
+        a = Integer(12, 35, 9)
+        b = Integer(10, 21, 49)
+        self.assertEqual(gcd(int(a), int(b)), a.gcd(b))
+        self.assertEqual(lcm(int(a), int(b)), a.lcm(b))
+        self.assertEqual(6, Integer(4, 3).gcd(90))
+        self.assertTrue(Integer(6, 7).divides(Integer(14, 9)))
+        self.assertFalse(Integer(4, 7).divides(Integer(14, 9)))
+        self.assertEqual(9, Integer(14, 9) // Integer(2, 7))
+        self.assertEqual(2, Integer(14) // 5)
+        self.assertTrue(Integer(5) < Integer(6) <= 6)
+
+    def test_integer_zero(self):
+        zero = Integer(0)
+        self.assertEqual(12, zero.gcd(Integer(4, 3)))
+        self.assertEqual(12, Integer(4, 3).gcd(0))
+        self.assertEqual(0, zero.gcd(0))
+        self.assertEqual(0, zero.lcm(12))
+        self.assertEqual(0, Integer(12).lcm(zero))
+        self.assertTrue(Integer(12).divides(zero))
+        self.assertFalse(zero.divides(12))
+        self.assertEqual(0, zero // 5)
+        with self.assertRaises(ValueError):
+            coprime_base([6, 0])
+
     def test_getExponent(self):
         values = {(36, 6): 2,
                   (128, 2): 7,
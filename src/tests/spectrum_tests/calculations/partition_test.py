@@ -15,6 +15,7 @@ Copyright 2012 Daniel Lytkin.
 
 """
 import itertools
+import time
 import unittest
 
 from spectrum.calculations.partition import *
@@ -135,3 +136,124 @@ class PartitionTest(unittest.TestCase):
         p = list(Partitions(10, min_slope=2))
         expected = [[10], [8, 2], [7, 3], [6, 4]]
         self.assertSequenceEqual(expected, p)
+
+    def test_interleaved(self):
+        first, second = iter(Partitions(10)), iter(Partitions(10))
+        next(first)
+        self.assertEqual([10], next(second))
+        self.assertEqual([9, 1], next(first))
+        self.assertEqual(list(Partitions(10))[2:],
+                         [x for pair in zip(first, second) for x in pair][::2])
+
+    def test_in_place(self):
+        partitions = Partitions(6, copy=False)
+        self.assertEqual(list(map(list, partitions)), list(Partitions(6)))
+        seen = set(map(id, partitions))
+        self.assertEqual(1, len(seen))
+
+    @parameters([{}, {'length': 3}, {'max_part': 5}, {'min_length': 4},
+                 {'min_slope': 1, 'max_part': 6}, {'max_slope': 1}])
+    def test_count_and_rank(self, constraints):
+        partitions = Partitions(12, **constraints)
+        expected = list(partitions)
+        self.assertEqual(len(expected), partitions.count())
+        for index, partition in enumerate(expected):
+            self.assertEqual(partition, partitions.unrank(index))
+            self.assertEqual(index, partitions.rank(partition))
+        self.assertRaises(IndexError, partitions.unrank, len(expected))
+
+    def test_chunk(self):
+        partitions = Partitions(20, max_part=8)
+        expected = list(partitions)
+        chunks = [list(partitions.chunk(start, start + 50))
+                  for start in range(0, len(expected), 50)]
+        self.assertEqual(expected, [x for chunk in chunks for x in chunk])
+        self.assertEqual(190569292, Partitions(100).count())
+
+    @parameters([{'min_part': 2, 'max_length': 4}, {'length': 4, 'max_slope': 1},
+                 {'min_slope': 0, 'max_slope': 0}, {'min_slope': 1, 'min_part': 2}])
+    def test_constraints_combined(self, constraints):
+        def slope(seq):
+            return [x - y for x, y in zip(seq, seq[1:] + [0])]
+
+        checks = {'length': lambda x, c: len(x) == c,
+                  'min_part': lambda x, c: x[-1] >= c,
+                  'max_length': lambda x, c: len(x) <= c,
+                  'min_slope': lambda x, c: min(slope(x)) >= c,
+                  'max_slope': lambda x, c: max(slope(x)) <= c}
+        for n in range(1, 16):
+            expected = [x for x in Partitions(n)
+                        if all(checks[key](x, c)
+                               for key, c in constraints.items())]
+            self.assertEqual(expected, list(Partitions(n, **constraints)))
+
+    def test_tight_constraints(self):
+        # partitions into distinct parts differing at least by 3 are
+        # generated without enumerating all partitions of 200
+        partitions = list(Partitions(200, min_slope=3, max_part=40))
+        self.assertEqual(Partitions(200, min_slope=3, max_part=40).count(),
+                         len(partitions))
+        self.assertTrue(all(sum(x) == 200 and x[0] <= 40 for x in partitions))
+        self.assertEqual(len(partitions), len(set(map(tuple, partitions))))
+
+    def test_large_number(self):
+        # completions table does not depend on recursion depth
+        partitions = list(Partitions(300, max_part=3))
+        self.assertEqual(len(partitions), 7651)
+        self.assertEqual(Partitions(1000, max_part=3).count(), 83834)
+        self.assertEqual(next(iter(Partitions(1000, max_part=3))),
+                         [3] * 333 + [1])
+        first = list(itertools.islice(Partitions(300, min_length=3), 3))
+        self.assertEqual(first, [[298, 1, 1], [297, 2, 1], [297, 1, 1, 1]])
+
+    def test_large_count_and_rank(self):
+        partitions = Partitions(500)
+        self.assertEqual(partitions.count(), 2300165032574323995027)
+        partition = partitions.unrank(10 ** 20)
+        self.assertEqual(sum(partition), 500)
+        self.assertEqual(partitions.rank(partition), 10 ** 20)
+        last = partitions.unrank(partitions.count() - 1)
+        self.assertEqual(last, [1] * 500)
+
+    def test_zero(self):
+        self.assertEqual(list(Partitions(0)), [[0]])
+        self.assertEqual(Partitions(0).count(), 1)
+        self.assertEqual(Partitions(0).unrank(0), [0])
+        self.assertEqual(list(Partitions(0, max_part=3)), [])
+
+    def test_loose_constraints(self):
+        # enumeration does not need counts of completions
+        start = time.monotonic()
+        partitions = Partitions(2000, max_length=1000)
+        first = list(itertools.islice(partitions, 1000))
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual([2000], first[0])
+        self.assertFalse(partitions._table)
+        self.assertEqual(1000, len(first))
+        # constraints which do not exclude anything use plain generators
+        self.assertEqual(list(Partitions(12)),
+                         list(Partitions(12, max_part=12, min_length=1)))
+        self.assertEqual(list(Partitions(12, length=4)),
+                         list(Partitions(12, min_length=4, max_length=4)))
+
+    def test_count_by_lengths(self):
+        # partitions of 300 into more than 150 parts are conjugate to ones
+        # with the first part x > 150, followed by any partition of 300 - x
+        longer = sum(Partitions(k).count() for k in range(150))
+        self.assertEqual(Partitions(300).count() - longer,
+                         Partitions(300, max_length=150).count())
+        partitions = Partitions(60, min_length=5, max_length=20, min_part=2,
+                                max_part=9)
+        self.assertEqual(len(list(partitions)), partitions.count())
+
+    def test_shared_table(self):
+        # instances with the same constraints reuse computed completions
+        partitions = Partitions(90, max_length=30, max_slope=5)
+        index = partitions.count() // 2
+        partition = partitions.unrank(index)
+        rows = partitions._rows()
+        size = len(rows)
+        other = Partitions(90, max_length=30, max_slope=5)
+        self.assertIs(rows, other._rows())
+        self.assertEqual([partition], list(other.chunk(index, index + 1)))
+        self.assertEqual(size, len(rows))
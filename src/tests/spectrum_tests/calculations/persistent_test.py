@@ -0,0 +1,85 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import os
+import tempfile
+import unittest
+
+from spectrum.calculations import groups, spectra
+from spectrum.calculations.groups import ClassicalGroup, ExceptionalGroup
+from spectrum.calculations.persistent import PersistentCache, _FORMULA_MODULES
+from spectrum.calculations.semisimple import SpectraElement
+from spectrum.tools.tools import ObjectCache
+
+__author__ = 'Daniel Lytkin'
+
+
+class PersistentCacheTest(unittest.TestCase):
+    def setUp(self):
+        handle, self._path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(handle)
+        self._cache = PersistentCache(self._path)
+        self._previous = groups.set_persistent_cache(self._cache)
+        ObjectCache.cache_clear()
+
+    def tearDown(self):
+        groups.set_persistent_cache(self._previous)
+        self._cache.close()
+        os.remove(self._path)
+        ObjectCache.cache_clear()
+
+    def test_apex_round_trip(self):
+        apex = ClassicalGroup("PSp", 8, 3).apex()
+        ObjectCache.cache_clear()
+        stored = self._cache.get_apex(ClassicalGroup("PSp", 8, 3))
+        self.assertEqual(apex, stored)
+        # provenance of elements must be preserved
+        for expected, actual in zip(apex, stored):
+            self.assertEqual(type(expected), type(actual))
+            if isinstance(expected, SpectraElement):
+                self.assertEqual(expected.str_verbose(), actual.str_verbose())
+
+    def test_order_round_trip(self):
+        order = ExceptionalGroup("E6", 2).order()
+        ObjectCache.cache_clear()
+        stored = self._cache.get_order(ExceptionalGroup("E6", 2))
+        self.assertEqual(order, stored)
+        self.assertEqual(order.factorize(), stored.factors)
+
+    def test_warm_lookup(self):
+        group = ClassicalGroup("PSL", 5, 4)
+        apex = group.apex()
+        ObjectCache.cache_clear()
+        fresh = ClassicalGroup("PSL", 5, 4)
+        self.assertIsNot(group, fresh)
+        self.assertEqual(apex, self._cache.get_apex(fresh))
+        self.assertEqual(apex, fresh.apex())
+
+    def test_other_version_is_ignored(self):
+        ClassicalGroup("PSL", 5, 4).apex()
+        other = PersistentCache(self._path)
+        other._version = 'other'
+        self.assertIsNone(other.get_apex(ClassicalGroup("PSL", 5, 4)))
+        self._cache.purge()
+        self.assertIsNotNone(self._cache.get_apex(ClassicalGroup("PSL", 5, 4)))
+        other.close()
+
+    def test_formula_modules(self):
+        # every module computing apexes or orders defines the version
+        modules = [groups, groups.orders, spectra.alternating,
+                   spectra.classical, spectra.exceptional, spectra.sporadic]
+        for module in modules:
+            self.assertIn(module, _FORMULA_MODULES)
@@ -0,0 +1,73 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import itertools
+import unittest
+
+from spectrum.calculations import factorization
+from spectrum.calculations.primes import PrimeTable
+
+__author__ = 'Daniel Lytkin'
+
+
+def _is_prime_power(n):
+    return n > 1 and len(factorization.factorize(n)) == 1
+
+
+class PrimeTableTest(unittest.TestCase):
+    def setUp(self):
+        # small limits, so that the table is extended and exceeded
+        self.table = PrimeTable(limit=100, max_limit=3000)
+        self.primes = [n for n in range(4000)
+                       if factorization.get_engine().is_prime(n)]
+        self.prime_powers = [n for n in range(4000) if _is_prime_power(n)]
+
+    def test_is_prime(self):
+        expected = set(self.primes)
+        for n in range(-2, 4000):
+            self.assertEqual(n in expected, self.table.is_prime(n), msg=n)
+        self.assertEqual(3000, self.table.limit)
+
+    def test_is_prime_power(self):
+        expected = set(self.prime_powers)
+        for n in range(4000):
+            self.assertEqual(n in expected, self.table.is_prime_power(n),
+                             msg=n)
+
+    def test_primes_in_range(self):
+        self.assertEqual(self.primes, self.table.primes_less_than(4000))
+        self.assertEqual([p for p in self.primes if 90 <= p < 3500],
+                         list(self.table.primes_in_range(90, 3500)))
+        self.assertEqual(self.primes[:500],
+                         list(itertools.islice(
+                             self.table.primes_in_range(0), 500)))
+        self.assertEqual(self.primes[:10], self.table.first_primes(10))
+
+    def test_next_prev_prime(self):
+        for n in range(3500):
+            self.assertEqual(min(p for p in self.primes if p > n),
+                             self.table.next_prime(n), msg=n)
+            self.assertEqual(max((p for p in self.primes if p < n),
+                                 default=None),
+                             self.table.prev_prime(n), msg=n)
+
+    def test_next_prev_prime_power(self):
+        powers = self.prime_powers
+        for n in range(3500):
+            self.assertEqual(min(q for q in powers if q > n),
+                             self.table.next_prime_power(n), msg=n)
+            self.assertEqual(max((q for q in powers if q < n), default=None),
+                             self.table.prev_prime_power(n), msg=n)
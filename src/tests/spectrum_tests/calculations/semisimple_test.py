@@ -20,7 +20,9 @@ from functools import reduce
 
 from spectrum.calculations import numeric
 from spectrum.calculations.partition import Partitions
-from spectrum.calculations.semisimple import SemisimpleElements, MixedElements, SpectraElement
+from spectrum.calculations.semisimple import SemisimpleElements, MixedElements, SpectraElement, PowerTable, \
+    ElementsCache, elements_cache, _bounded_sets, SemisimpleTemplate
+from spectrum.calculations.set import BoundedSets, MaximalBoundedSets
 from spectrum_tests.parametric import parameters, parametrized
 
 __author__ = 'Daniel Lytkin'
@@ -107,6 +109,18 @@ class SpectraElementTest(unittest.TestCase):
         expected = "2 * [2^2 + 1, 2^3 - 1]"
         self.assertEqual(expected, (elem * 2).str_verbose())
 
+    def test_provenance(self):
+        elem = 3 * SpectraElement(q=5, partition=[3, 1], signs=[-1, 1])
+        self.assertEqual([3, 1], elem.partition)
+        self.assertEqual([-1, 1], elem.signs)
+        self.assertEqual(5, elem.q)
+        self.assertEqual(3, elem.quotient)
+        self.assertEqual(3 * 124 * 6 // 2, elem)
+        # table elements have the same provenance
+        table_elem = PowerTable(5, 3).element([3, 1], [-1, 1])
+        self.assertEqual(elem // 3, table_elem)
+        self.assertEqual("[5 + 1, 5^3 - 1]", table_elem.str_verbose())
+
 
 @parametrized
 class SemisimpleTest(unittest.TestCase):
@@ -159,11 +173,12 @@ class SemisimpleTest(unittest.TestCase):
                     [-1, 1, 1, 1], [1, 1, 1, 1]]
         self.assertSequenceEqual(expected, signs)
 
-    def all_semisimple(self, n, q, min_length=1, parity=0, sign=0):
+    def all_semisimple(self, n, q, min_length=1, parity=0, sign=0,
+                       maximal=False):
         # very slow! For every partition of size n it calculates 2^n parity tuples.
         ss = list(
             SemisimpleElements(q, n, min_length=min_length, parity=parity,
-                sign=sign, verbose=False))
+                sign=sign, verbose=False, maximal=maximal))
         signsMod = 0 if parity == 1 else 1
 
         divisible = set()
@@ -197,6 +212,28 @@ class SemisimpleTest(unittest.TestCase):
         n, q, t = params
         self.all_semisimple(n, q, min_length=t)
 
+    @parameters(itertools.product(range(2, 9), range(2, 15), range(1, 4)))
+    def test_maximal_semisimple(self, params):
+        n, q, t = params
+        self.all_semisimple(n, q, min_length=t, maximal=True)
+
+    @parameters(itertools.product(range(2, 9), (2, 3, 5, 8), range(1, 4), (-1, 1)))
+    def test_maximal_semisimple_parity_sign(self, params):
+        n, q, t, p = params
+        self.all_semisimple(n, q, parity=p, min_length=t, maximal=True)
+        self.all_semisimple(n, q, sign=p, min_length=t, maximal=True)
+
+    @parameters(itertools.product((2, 3, 4, 5, 7), (12, 16, 20), range(1, 4)))
+    def test_maximal_semisimple_large(self, params):
+        # maximal mode must give the same maximal elements as full generator
+        q, n, t = params
+        full = list(SemisimpleElements(q, n, min_length=t, verbose=False))
+        pruned = list(SemisimpleElements(q, n, min_length=t, verbose=False,
+                                         maximal=True))
+        self.assertEqual(numeric.maximal_elements(full),
+                         numeric.maximal_elements(pruned))
+        self.assertLess(len(pruned) * 5, len(full))
+
     @parameters(itertools.product(range(2, 11), range(2, 15), range(1, 4), (-1, 1)))
     def test_semisimple_parity(self, params):
         n, q, t, p = params
@@ -207,6 +244,112 @@ class SemisimpleTest(unittest.TestCase):
         n, q, t, p = params
         self.all_semisimple(n, q, sign=p, min_length=t)
 
+    def test_bounded_sets(self):
+        for n in range(12):
+            codes = [0] + [1 << k for k in range(1, n + 1)]
+            sets = list(_bounded_sets(n, codes))
+            self.assertEqual(list(BoundedSets(n)), [p for p, _ in sets])
+            self.assertTrue(all(code == sum(codes[k] for k in p)
+                                for p, code in sets))
+            self.assertEqual(list(MaximalBoundedSets(n)),
+                             [p for p, _ in _bounded_sets(n, codes, True)])
+
+    @parameters(itertools.product((2, 3, 4, 8, 9, 25), (1, 6, 12)))
+    def test_power_table(self, params):
+        q, n = params
+        table = PowerTable(q, n)
+        base = table.base
+        self.assertTrue(all(numeric.gcd(a, b) == 1
+                            for a, b in itertools.combinations(base, 2)))
+        for k in range(1, n + 1):
+            for e in (-1, 1):
+                self.assertEqual(q ** k + e, numeric.prod(
+                    base[i] ** a for i, a in table.exponents(k, e)))
+        for ni in Partitions(n):
+            for ei in itertools.islice(Signs(len(ni)), 8):
+                self.assertEqual(evaluate(q, ni, ei), table.lcm(ni, ei))
+
+    def test_power_table_values_bounded(self):
+        table = PowerTable(3, 12, max_cached=16)
+        for ni in Partitions(12):
+            table.lcm(ni, [1] * len(ni))
+        self.assertLessEqual(len(table._values), 16)
+
+    def test_elements_cache(self):
+        cache = ElementsCache(max_size=5)
+        cache.put('a', (1, 2, 3))
+        self.assertEqual((1, 2, 3), cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual((1, 1), (cache.hits, cache.misses))
+        cache.put('b', (4, 5))
+        cache.put('c', (6, 7))
+        self.assertNotIn('a', cache)
+        self.assertEqual(4, cache.size)
+        cache.put('d', tuple(range(6)))
+        self.assertNotIn('d', cache)
+
+    def test_shared_elements(self):
+        elements_cache.clear()
+        elements = SemisimpleElements(5, 7, parity=1, verbose=False)
+        # partially consumed iteration is not stored
+        next(iter(elements))
+        self.assertEqual(0, len(elements_cache))
+        expected = list(elements)
+        self.assertEqual(1, len(elements_cache))
+        self.assertEqual(expected, list(
+            SemisimpleElements(5, 7, parity=1, verbose=False)))
+        self.assertEqual(1, elements_cache.hits)
+
+    @parameters(itertools.product((2, 3, 5), (1, 3, 4), (
+            {}, {'maximal': True}, {'sign': -1}, {'parity': 1, 'maximal': True},
+            {'min_length': 2, 'sign': 1, 'maximal': True})))
+    def test_split(self, params):
+        q, parts, kwargs = params
+        elements = SemisimpleElements(q, 9, verbose=False, **kwargs)
+        generators = elements.split(parts)
+        self.assertLessEqual(len(generators), parts)
+        self.assertEqual(
+            numeric.maximal_elements(elements),
+            numeric.maximal_elements(itertools.chain(*generators)))
+        mixed = MixedElements(q, 9, lambda k: k + 1, lambda k: 2 ** k,
+                              **kwargs)
+        self.assertEqual(
+            numeric.maximal_elements(mixed),
+            numeric.maximal_elements(itertools.chain(*mixed.split(parts))))
+
+    def test_split_maximal_is_lazy(self):
+        # pieces are counted without building the template
+        elements = SemisimpleElements(5, 11, min_length=2, parity=-1,
+                                      verbose=False, maximal=True)
+        generators = elements.split(4)
+        self.assertEqual(len(generators), 4)
+        self.assertIsNone(
+            SemisimpleTemplate(11, min_length=2, parity=-1)._terms)
+        self.assertEqual(
+            numeric.maximal_elements(elements),
+            numeric.maximal_elements(itertools.chain(*generators)))
+
+    @parameters([{}, {'min_length': 3}, {'sign': 1}, {'sign': -1, 'min_length': 2},
+                 {'parity': 1}, {'parity': -1, 'min_length': 2}])
+    def test_template(self, kwargs):
+        template = SemisimpleTemplate(10, **kwargs)
+        # the same template is used for all fields
+        self.assertIs(template, SemisimpleTemplate(10, **kwargs))
+        self.assertIs(template, SemisimpleTemplate(
+            10, kwargs.get('min_length', 1), kwargs.get('parity', 0),
+            kwargs.get('sign', 0)))
+        for q in (2, 3, 4, 7, 9):
+            full = SemisimpleElements(q, 10, verbose=False, **kwargs)
+            self.assertEqual(numeric.maximal_elements(full),
+                             numeric.maximal_elements(template.elements(q)))
+        self.assertEqual(len(template), len(template.expressions()))
+
+    def test_template_expressions(self):
+        template = SemisimpleTemplate(3, sign=1)
+        self.assertEqual(["q^3 - 1", "[q - 1, q^2 - 1]"],
+                         template.expressions())
+        self.assertEqual([26, 8], list(template.elements(3)))
+
     def test_mixed(self):
         n = 3
         q = 9
@@ -85,3 +85,25 @@ class SetTest(unittest.TestCase):
         sets = list(FullBoundedSets(n))
         expected = [x for x in BoundedSets(n) if sum(x) == n]
         self.assertSequenceEqual(list(expected), sets)
+
+    @parameters([(n, parts) for n in (0, 1, 3, 12, 21) for parts in (1, 3, 7)])
+    def test_split(self, params):
+        n, parts = params
+        for cls in (BoundedSets, MaximalBoundedSets, FullBoundedSets):
+            generators = cls.split(n, parts)
+            self.assertLessEqual(len(generators), parts)
+            self.assertSequenceEqual(list(cls(n)),
+                                     [x for g in generators for x in g])
+
+    def test_leading_range(self):
+        sets = list(MaximalBoundedSets(10, max_leading=6, min_leading=5))
+        expected = [x for x in MaximalBoundedSets(10) if 5 <= x[0] <= 6]
+        self.assertSequenceEqual(expected, sets)
+        # there are no maximal sets with leading element 3
+        self.assertSequenceEqual([], list(MaximalBoundedSets(10, 3, 3)))
+
+    def test_in_place(self):
+        sets = FullBoundedSets(15, copy=False)
+        self.assertSequenceEqual(list(FullBoundedSets(15)),
+                                 [list(x) for x in sets])
+        self.assertEqual(1, len(set(map(id, sets))))
@@ -96,3 +96,36 @@ class GraphTest(unittest.TestCase):
 
         self.assertEqual([1, 3, 4], g.neighbors(0))
         self.assertEqual([1, 3, 4], g.neighbors(2))
+
+    def test_neighbors_mask(self):
+        g = Graph(range(5))
+        g.add_edges([(0, 1), (0, 3), (0, 4)])
+        self.assertEqual(0b11010, g.neighbors_mask(0))
+        self.assertEqual(0b00001, g.neighbors_mask(3))
+
+    def test_index(self):
+        g = Graph()
+        g.add_edges([(7, 5), (5, 2)])
+        self.assertEqual(1, g.index(5))
+        self.assertIsNone(g.index(3))
+
+    def test_iter_max_cocliques(self):
+        # cycle of length 6 has two maximal cocliques
+        g = Graph(range(6))
+        g.add_edges((i, (i + 1) % 6) for i in range(6))
+        iterator = g.iter_max_cocliques()
+        cocliques = {tuple(sorted(next(iterator))),
+                     tuple(sorted(next(iterator)))}
+        self.assertSetEqual({(0, 2, 4), (1, 3, 5)}, cocliques)
+        self.assertIsNone(next(iterator, None))
+
+    def test_max_cocliques_empty_graph(self):
+        self.assertEqual([[]], Graph().max_cocliques())
+        self.assertEqual([[]], list(Graph().iter_max_cocliques()))
+
+    def test_max_cocliques_time_budget(self):
+        g = Graph(range(40))
+        cocliques = g.max_cocliques(time_budget=0)
+        self.assertEqual(1, len(cocliques))
+        self.assertTrue(all(not g.adjacent(a, b) for a in cocliques[0]
+                            for b in cocliques[0]))
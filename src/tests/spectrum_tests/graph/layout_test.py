@@ -14,11 +14,13 @@ Copyright 2012 Daniel Lytkin.
    limitations under the License.
 
 """
+import math
+import random
 import unittest
 
 from spectrum.graph.geometry import Point
 from spectrum.graph.graph import Graph
-from spectrum.graph.layout import Layout
+from spectrum.graph.layout import Layout, SpringLayout, BarnesHutLayout
 
 __author__ = 'Daniel Lytkin'
 
@@ -35,3 +37,99 @@ class LayoutTest(unittest.TestCase):
 
         self.layout.reset()
         self.assertEqual((0.42, 0.42), self.layout[1])
+
+    def test_spring_layout_step(self):
+        layout = SpringLayout(self.graph, width=100, height=80)
+        layout[0] = Point(0, 0)
+        layout.set_lock(0, True)
+        for _ in range(50):
+            layout.step()
+        self.assertEqual((0, 0), layout[0])
+        for vertex in range(5):
+            x, y = layout[vertex]
+            self.assertTrue(0 <= x <= 100 and 0 <= y <= 80)
+        self.assertGreaterEqual(layout.total_kinetic_energy(), 0)
+
+    def test_spring_layout_new_vertex(self):
+        layout = SpringLayout(self.graph)
+        self.graph.add_vertex(5)
+        layout[5] = Point(1, 1)
+        layout.step()
+        self.assertEqual(6, len(layout._vx))
+
+    def test_spring_layout_converges(self):
+        layout = SpringLayout(self.graph)
+        self.assertFalse(layout.converged)
+        for _ in range(2000):
+            layout.step()
+            if layout.converged:
+                break
+        self.assertTrue(layout.converged)
+        # moving a vertex makes layout iterate again
+        layout[0] = Point(0, 0)
+        self.assertFalse(layout.converged)
+        layout.step()
+        self.assertFalse(layout.converged)
+
+    def test_barnes_hut_forces(self):
+        graph = Graph(range(50))
+        exact = SpringLayout(graph)
+        approximate = BarnesHutLayout(graph, theta=0)
+        xs = [exact[v].x for v in range(50)]
+        ys = [exact[v].y for v in range(50)]
+        forces = []
+        for layout in (exact, approximate):
+            fx, fy = [0.0] * 50, [0.0] * 50
+            layout._repulsion_forces(xs, ys, fx, fy)
+            forces.append((fx, fy))
+        for a, b in zip(forces[0][0] + forces[0][1],
+                        forces[1][0] + forces[1][1]):
+            self.assertAlmostEqual(a, b, delta=1e-9 * max(1, abs(a)))
+
+    def test_barnes_hut_accuracy(self):
+        n = 300
+        rand = random.Random(0)
+        graph = Graph(range(n))
+        graph.add_edges({(i, rand.randrange(i)) for i in range(1, n)})
+        xs = [rand.uniform(0, 400) for _ in range(n)]
+        ys = [rand.uniform(0, 400) for _ in range(n)]
+        forces = []
+        for layout in (SpringLayout(graph),
+                       BarnesHutLayout(graph, theta=0.5)):
+            fx, fy = [0.0] * n, [0.0] * n
+            layout._repulsion_forces(xs, ys, fx, fy)
+            forces.append((fx, fy))
+        (ex, ey), (ax, ay) = forces
+        error = sum(math.hypot(ax[i] - ex[i], ay[i] - ey[i])
+                    for i in range(n))
+        total = sum(math.hypot(ex[i], ey[i]) for i in range(n))
+        self.assertLess(error, 0.01 * total)
+
+    def test_barnes_hut_converges(self):
+        n = 50
+        rand = random.Random(0)
+        graph = Graph(range(n))
+        graph.add_edges({(i, rand.randrange(n)) for i in range(n)} -
+                        {(i, i) for i in range(n)})
+        state = random.getstate()
+        random.seed(1)
+        try:
+            layout = BarnesHutLayout(graph, theta=0.5, width=1000,
+                                     height=1000)
+        finally:
+            random.setstate(state)
+        for _ in range(1500):
+            layout.step()
+            if layout.converged:
+                break
+        self.assertTrue(layout.converged)
+        self.assertLess(layout.total_kinetic_energy(), 1.0)
+
+    def test_barnes_hut_step(self):
+        layout = BarnesHutLayout(self.graph, theta=0.5, width=100, height=80)
+        layout[0] = layout[1] = Point(10, 10)
+        for _ in range(20):
+            layout.step()
+        for vertex in range(5):
+            x, y = layout[vertex]
+            self.assertTrue(0 <= x <= 100 and 0 <= y <= 80)
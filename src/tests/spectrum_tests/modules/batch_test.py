@@ -0,0 +1,77 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from spectrum.modules import batch
+
+__author__ = 'Daniel Lytkin'
+
+
+class BatchTest(unittest.TestCase):
+    def test_parse_range(self):
+        self.assertEqual([2, 3, 4], batch.parse_range('..4'))
+        self.assertEqual([4, 6, 10, 11, 12], batch.parse_range('4,6,10..12'))
+
+    def test_group_parameters(self):
+        params = batch.group_parameters('PSp', range(3, 7), [2, 3, 4])
+        self.assertEqual([('PSp', 4, 2), ('PSp', 4, 3), ('PSp', 4, 4),
+                          ('PSp', 6, 2), ('PSp', 6, 3), ('PSp', 6, 4)],
+                         params)
+        self.assertEqual([('2B2', 8), ('2B2', 32)],
+                         batch.group_parameters('2B2', (), [4, 8, 16, 32]))
+        with self.assertRaises(ValueError):
+            batch.group_parameters('XYZ', [4], [2])
+
+    def test_calculate(self):
+        record = batch.calculate(('PSp', 4, 3))
+        self.assertEqual('PSp(4, 3)', record['group'])
+        self.assertEqual(25920, record['order'])
+        self.assertEqual([5, 9, 12], record['apex'])
+        self.assertEqual([2, 3, 5], record['vertices'])
+        self.assertEqual([[2, 3]], record['edges'])
+
+    def test_parallel_order(self):
+        params = batch.group_parameters('PSL', range(2, 5), range(2, 10))
+        serial, parallel = io.StringIO(), io.StringIO()
+        batch.run(params, serial, jobs=1)
+        batch.run(params, parallel, jobs=2)
+        self.assertEqual(serial.getvalue(), parallel.getvalue())
+
+    def test_resume(self):
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        try:
+            batch.main(['PSL', '--dim', '3', '--q', '..5', '-o', path, '-j',
+                        '1'])
+            # simulate interruption in the middle of a line
+            with open(path) as f:
+                lines = f.readlines()
+            with open(path, 'w') as f:
+                f.writelines(lines[:2])
+                f.write(lines[2][:10])
+            batch.main(['PSL', '--dim', '3', '--q', '..5', '-o', path, '-j',
+                        '1', '--resume'])
+            with open(path) as f:
+                resumed = f.readlines()
+            self.assertEqual(lines, resumed)
+            self.assertEqual('PSL(3, 2)', json.loads(resumed[0])['group'])
+        finally:
+            os.remove(path)
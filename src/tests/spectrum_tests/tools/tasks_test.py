@@ -0,0 +1,120 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import threading
+import time
+import unittest
+
+from spectrum.tools.tasks import TaskScheduler
+
+__author__ = 'Daniel Lytkin'
+
+
+class FakeEventLoop:
+    """Collects callbacks scheduled with after() and runs them on demand.
+    """
+
+    def __init__(self):
+        self.callbacks = []
+        self.thread = threading.current_thread()
+
+    def after(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def run(self, scheduler, timeout=5):
+        deadline = time.monotonic() + timeout
+        while scheduler.running and time.monotonic() < deadline:
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback()
+            time.sleep(0.001)
+
+
+class TaskSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.loop = FakeEventLoop()
+        self.scheduler = TaskScheduler(self.loop.after)
+
+    def test_progress_and_result(self):
+        def calculation():
+            for i in range(3):
+                yield i
+            return 'done'
+
+        progress, results, threads = [], [], set()
+
+        def on_progress(value):
+            threads.add(threading.current_thread())
+            progress.append(value)
+
+        self.scheduler.submit(calculation(), on_progress=on_progress,
+                              on_done=results.append)
+        self.loop.run(self.scheduler)
+        self.assertEqual([0, 1, 2], progress)
+        self.assertEqual(['done'], results)
+        # callbacks are called in the event loop thread
+        self.assertSetEqual({self.loop.thread}, threads)
+
+    def test_error(self):
+        def calculation():
+            yield 1
+            raise ValueError("test")
+
+        errors = []
+        self.scheduler.submit(calculation(), on_error=errors.append)
+        self.loop.run(self.scheduler)
+        self.assertEqual(1, len(errors))
+        self.assertIsInstance(errors[0], ValueError)
+
+    def test_cancel(self):
+        release = threading.Event()
+        closed = []
+
+        def calculation():
+            try:
+                yield 1
+                release.wait(5)
+                yield 2
+            finally:
+                closed.append(True)
+
+        progress, results = [], []
+        task = self.scheduler.submit(calculation(), on_progress=progress.append,
+                                     on_done=results.append)
+        self.scheduler.cancel_all()
+        release.set()
+        task.join(5)
+        self.loop.run(self.scheduler)
+        self.assertTrue(task.cancelled)
+        self.assertEqual([], progress)
+        self.assertEqual([], results)
+        self.assertEqual([True], closed)
+        self.assertEqual([], self.scheduler.running)
+
+    def test_concurrent(self):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def calculation(name):
+            # both tasks must run at the same time to pass the barrier
+            barrier.wait()
+            yield name
+
+        progress = []
+        for name in 'ab':
+            self.scheduler.submit(calculation(name),
+                                  on_progress=progress.append)
+        self.loop.run(self.scheduler)
+        self.assertEqual(['a', 'b'], sorted(progress))
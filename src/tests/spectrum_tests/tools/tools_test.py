@@ -0,0 +1,96 @@
+"""
+Copyright 2012 Daniel Lytkin.
+
+   Licensed under the Apache License, Version 2.0 (the "License");
+   you may not use this file except in compliance with the License.
+   You may obtain a copy of the License at
+
+       http://www.apache.org/licenses/LICENSE-2.0
+
+   Unless required by applicable law or agreed to in writing, software
+   distributed under the License is distributed on an "AS IS" BASIS,
+   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+   See the License for the specific language governing permissions and
+   limitations under the License.
+
+"""
+import unittest
+
+from spectrum.tools.tools import MultiModeStringFormatter, ObjectCache
+
+__author__ = 'Daniel Lytkin'
+
+
+class Cached(metaclass=ObjectCache):
+    def __init__(self, value, extra=None):
+        self.value = value
+
+
+class SmallCached(metaclass=ObjectCache):
+    _cache_max = 1
+
+    def __init__(self, value):
+        self.value = value
+
+
+class ObjectCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._max_size = ObjectCache.max_size
+        ObjectCache.cache_clear()
+
+    def tearDown(self):
+        ObjectCache.set_enabled(True)
+        ObjectCache.set_max_size(self._max_size)
+        ObjectCache.cache_clear()
+
+    def test_same_instance(self):
+        self.assertIs(Cached(1), Cached(1))
+        self.assertIsNot(Cached(1), Cached(2))
+        self.assertIs(Cached(1, extra=2), Cached(1, extra=2))
+        info = ObjectCache.cache_info()
+        self.assertEqual((3, 3), (info.hits, info.misses))
+
+    def test_lru_eviction(self):
+        ObjectCache.set_max_size(2)
+        a = Cached(1)
+        Cached(2)
+        Cached(1)  # now 2 is least recently used
+        Cached(3)
+        self.assertEqual(2, ObjectCache.cache_info().size)
+        self.assertIs(a, Cached(1))
+        self.assertEqual(3, ObjectCache.cache_info().misses)
+        Cached(2)
+        self.assertEqual(4, ObjectCache.cache_info().misses)
+
+    def test_class_bound(self):
+        ObjectCache.set_max_size(2)
+        a = Cached(1)
+        Cached(2)
+        SmallCached(1)
+        b = SmallCached(2)
+        # eviction in one class does not touch another
+        self.assertIs(a, Cached(1))
+        self.assertIs(b, SmallCached(2))
+        self.assertIsNot(b, SmallCached(1))
+        self.assertEqual(3, ObjectCache.cache_info().size)
+
+    def test_disable(self):
+        ObjectCache.set_enabled(False)
+        self.assertIsNot(Cached(1), Cached(1))
+        self.assertEqual(0, ObjectCache.cache_info().size)
+
+    def test_clear(self):
+        a = Cached(1)
+        ObjectCache.cache_clear()
+        self.assertIsNot(a, Cached(1))
+
+
+class MultiModeStringFormatterTest(unittest.TestCase):
+    def test_mixin_to(self):
+        a = MultiModeStringFormatter.mixin_to(Cached(1))
+        b = MultiModeStringFormatter.mixin_to(Cached(2), mode='mixed')
+        # mixed class is created once
+        self.assertIs(type(a), type(b))
+        self.assertIsInstance(a, Cached)
+        self.assertEqual('normal', a.str_mode)
+        self.assertEqual('mixed', b.str_mode)